@@ -10,7 +10,7 @@ This is an Astropy affiliated package.
 from ._astropy_init import *
 # ----------------------------------------------------------------------------
 
-from tardisnuclear.ejecta import Ejecta
+from tardisnuclear.ejecta import Ejecta, EjectaSet
 from tardisnuclear.nuclear_data import DecayRadiation
 
 import logging
@@ -0,0 +1,347 @@
+"""
+Command line interface
+
+    tardisnuclear run manifest.yml --processes 8
+
+The manifest (YAML, which needs pyyaml, or JSON) lists the yield files
+(see `tardisnuclear.io.read_yann_file`) and epoch grids of the light
+curves::
+
+    output_dir: light_curves
+    format: csv                 # or parquet
+    cutoff_em_energy: 20        # keV
+    epochs: {start: 50, stop: 1500, num: 300}
+    jobs:
+      - yield_file: models/ddt_n100.dat
+      - yield_file: models/merger.dat
+        name: merger
+        epochs: [100, 200, 500, 1000]
+
+Relative paths are relative to the manifest. `yield_files` can be given
+instead of (or in addition to) `jobs` as a glob pattern.
+
+    tardisnuclear build-snapshot snapshot_dir Ni56 Co57 Ti44 --version 1.0
+    tardisnuclear run manifest.yml --snapshot snapshot_dir
+
+builds a nuclear data snapshot from the local database and runs without
+accessing the database. The workers attach to the nuclear data in shared
+memory instead of reading it.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from multiprocessing import Pool
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# nuclear data attached by every worker process
+_worker_nuclear_data = None
+
+
+def _import_yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError('Reading YAML manifests requires pyyaml '
+                          '(pip install pyyaml) - or use a JSON manifest')
+    return yaml
+
+
+def read_manifest(fname):
+    """
+    Read a YAML or JSON manifest and resolve its paths and epochs
+
+    Parameters
+    ----------
+
+    fname: ~str
+
+    Returns
+    -------
+        : ~dict
+        with output_dir, format, cutoff_em_energy and jobs, each job being a
+        dict with name, yield_file and epochs (numpy.ndarray)
+    """
+    with open(fname) as fh:
+        if os.path.splitext(fname)[1] in ('.yml', '.yaml'):
+            manifest = _import_yaml().safe_load(fh)
+        else:
+            manifest = json.load(fh)
+
+    base_dir = os.path.dirname(os.path.abspath(fname))
+
+    def resolve(path):
+        return os.path.join(base_dir, os.path.expanduser(path))
+
+    job_list = list(manifest.get('jobs', []))
+    if 'yield_files' in manifest:
+        job_list += [{'yield_file': yield_file} for yield_file in
+                     sorted(glob.glob(resolve(manifest['yield_files'])))]
+    if len(job_list) == 0:
+        raise ValueError('Manifest {0} has no jobs'.format(fname))
+
+    jobs = []
+    for job in job_list:
+        yield_file = resolve(job['yield_file'])
+        epochs = job.get('epochs', manifest.get('epochs', None))
+        if epochs is None:
+            raise ValueError('No epochs for {0}'.format(yield_file))
+        jobs.append({'name': job.get('name', os.path.splitext(
+                        os.path.basename(yield_file))[0]),
+                     'yield_file': yield_file,
+                     'epochs': _make_epochs(epochs)})
+
+    return {'output_dir': resolve(manifest.get('output_dir', '.')),
+            'format': manifest.get('format', 'csv'),
+            'cutoff_em_energy': manifest.get('cutoff_em_energy', 20.0),
+            'jobs': jobs}
+
+
+def _make_epochs(epochs):
+    if isinstance(epochs, dict):
+        if epochs.get('log', False):
+            return np.logspace(np.log10(epochs['start']),
+                               np.log10(epochs['stop']), epochs['num'])
+        return np.linspace(epochs['start'], epochs['stop'], epochs['num'])
+    return np.asarray(epochs, dtype=np.float64)
+
+
+def _preload_decay_radiation(yield_files):
+    """
+    Read the decay radiation of all decay chains once into the shared
+    cache of `tardisnuclear.nuclear_data`
+
+    Returns
+    -------
+        : ~list of str
+        isotopes of the union of all decay chains
+    """
+    from tardisnuclear.io import read_yann_file
+    from tardisnuclear.decay_chain import get_closed_nuclide_set
+    from tardisnuclear.nuclear_data import DecayRadiation
+    from tardisnuclear.nuclides import get_nuc_name
+
+    isotopes = set()
+    for yield_file in yield_files:
+        isotopes.update(read_yann_file(yield_file).index)
+    isotopes = [get_nuc_name(nuc_id)
+                for nuc_id in get_closed_nuclide_set(isotopes)]
+    DecayRadiation(isotopes)
+    return isotopes
+
+
+def _init_worker(handle):
+    from tardisnuclear.shared_data import SharedNuclearData
+
+    global _worker_nuclear_data
+    if handle is None:
+        # no union chain - every job is decayed on its own
+        _worker_nuclear_data = None
+        return
+    # the decay chains of the jobs are built from the published nuclear
+    # constants
+    _worker_nuclear_data = SharedNuclearData.attach(handle)
+    _worker_nuclear_data.install()
+
+
+def _run_job(job, output_dir, output_format, cutoff_em_energy):
+    import pandas as pd
+    from astropy import units as u
+    from tardisnuclear.decay_chain import get_closed_nuclide_set
+    from tardisnuclear.io import read_yann_file, write_dataframe
+    from tardisnuclear.models.base import make_energy_injection_model
+
+    start = time.perf_counter()
+    masses = read_yann_file(job['yield_file'])
+    masses = masses[masses > 0]
+    epochs = job['epochs']
+    nuclear_data = _worker_nuclear_data
+    if nuclear_data is None:
+        # the union chain has no closed form - decay the ejecta of this job
+        model = make_energy_injection_model(
+            cutoff_em_energy=cutoff_em_energy * u.keV, **masses)
+        injected_energy = model.calculate_injected_energy_per_s(epochs)
+        injected_energy.index = pd.Index(epochs, name='epoch')
+    else:
+        # closed-form decay of the union chain of all jobs, reported for the
+        # decay chain of this job only
+        injected_energy = nuclear_data.calculate_injected_energy_per_s(
+            nuclear_data.get_numbers(masses), epochs)
+        isotope_idx = nuclear_data.nuclear_constants.get_index(
+            get_closed_nuclide_set(masses.index))
+        injected_energy = pd.DataFrame(
+            injected_energy[:, isotope_idx],
+            index=pd.Index(epochs, name='epoch'),
+            columns=[nuclear_data.isotopes[i] for i in isotope_idx])
+    injected_energy['total'] = injected_energy.sum(axis=1)
+
+    if output_format == 'parquet':
+        fname = os.path.join(output_dir, job['name'] + '.parquet')
+        write_dataframe(injected_energy.reset_index(), fname, index=False)
+    else:
+        fname = os.path.join(output_dir, job['name'] + '.csv')
+        injected_energy.to_csv(fname)
+    return job['name'], fname, len(epochs), time.perf_counter() - start
+
+
+def _star_run_job(args):
+    return _run_job(*args)
+
+
+def run_manifest(manifest, processes=None):
+    """
+    Compute the light curves of all jobs of a manifest (see `read_manifest`)
+    in a process pool and write every light curve as soon as it is done
+
+    The nuclear data of the union of all decay chains is read once (from
+    the installed snapshot or the database) and published in shared
+    memory; every job is then decayed in closed form on this chain. If the
+    union chain has no closed form (degenerate decay constants) every job
+    decays its own ejecta instead.
+
+    Parameters
+    ----------
+
+    manifest: ~dict
+
+    processes: ~int
+        number of worker processes; `None` uses all cores and 1 runs in
+        this process [default = None]
+
+    Returns
+    -------
+        : ~dict
+        throughput summary
+    """
+    from astropy import units as u
+    from tardisnuclear.shared_data import (SharedNuclearData,
+                                           get_nuclear_data_arrays,
+                                           publish_nuclear_data)
+
+    global _worker_nuclear_data
+
+    if manifest['format'] not in ('csv', 'parquet'):
+        raise ValueError('Unknown output format {0}'.format(
+            manifest['format']))
+    if not os.path.exists(manifest['output_dir']):
+        os.makedirs(manifest['output_dir'])
+
+    start = time.time()
+    jobs = manifest['jobs']
+    isotopes = _preload_decay_radiation([job['yield_file'] for job in jobs])
+    cutoff_em_energy = manifest['cutoff_em_energy'] * u.keV
+    shared = None
+    _worker_nuclear_data = None
+    try:
+        if processes == 1:
+            _worker_nuclear_data = SharedNuclearData(get_nuclear_data_arrays(
+                isotopes, cutoff_em_energy=cutoff_em_energy))
+        else:
+            shared = publish_nuclear_data(isotopes,
+                                          cutoff_em_energy=cutoff_em_energy)
+    except ValueError as error:
+        logger.warning('No closed-form decay of the union of all decay '
+                       'chains ({0}) - decaying every job on its own'.format(
+            error))
+    preload_time = time.time() - start
+
+    job_args = [(job, manifest['output_dir'], manifest['format'],
+                 manifest['cutoff_em_energy']) for job in jobs]
+    job_time = 0.0
+    n_epochs = 0
+    pool = None
+    try:
+        if processes == 1:
+            results = (_run_job(*args) for args in job_args)
+        else:
+            pool = Pool(processes, initializer=_init_worker,
+                        initargs=(None if shared is None else shared.handle, ))
+            results = pool.imap_unordered(_star_run_job, job_args)
+        for i, (name, fname, job_n_epochs, job_duration) in enumerate(
+                results):
+            job_time += job_duration
+            n_epochs += job_n_epochs
+            logger.info('[{0}/{1}] {2} -> {3} ({4:.2f} s)'.format(
+                i + 1, len(jobs), name, fname, job_duration))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if shared is not None:
+            shared.unlink()
+
+    wall_time = time.time() - start
+    return {'jobs': len(jobs), 'epochs': n_epochs,
+            'wall_time': wall_time, 'preload_time': preload_time,
+            'job_time': job_time, 'jobs_per_s': len(jobs) / wall_time,
+            'epochs_per_s': n_epochs / wall_time}
+
+
+def _run_command(args):
+    if args.snapshot is not None:
+        from tardisnuclear.io.snapshot import load_snapshot
+        load_snapshot(args.snapshot)
+    summary = run_manifest(read_manifest(args.manifest),
+                           processes=args.processes)
+    print('{jobs} light curves ({epochs} epochs) in {wall_time:.1f} s '
+          '(nuclear data {preload_time:.1f} s): {jobs_per_s:.2f} jobs/s, '
+          '{epochs_per_s:.1f} epochs/s'.format(**summary))
+
+
+def _build_snapshot_command(args):
+    from tardisnuclear.io.snapshot import build_snapshot
+    manifest = build_snapshot(args.path, args.nuclides, version=args.version)
+    print('Snapshot {0} with {1} isotopes in {2} (id {3})'.format(
+        manifest['version'], len(manifest['isotopes']), args.path,
+        manifest['snapshot_id'][:12]))
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='tardisnuclear',
+        description='Radioactive decay light curves of supernova ejecta')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser(
+        'run', help='compute the light curves of the yield files in a '
+                    'manifest')
+    run_parser.add_argument('manifest', help='YAML or JSON manifest')
+    run_parser.add_argument('-j', '--processes', type=int, default=None,
+                            help='number of worker processes '
+                                 '[default = all cores]')
+    run_parser.add_argument('--snapshot', default=None,
+                            help='nuclear data snapshot directory')
+    run_parser.set_defaults(func=_run_command)
+
+    snapshot_parser = subparsers.add_parser(
+        'build-snapshot', help='build a nuclear data snapshot of nuclides '
+                               'and their decay chains from the local '
+                               'database')
+    snapshot_parser.add_argument('path', help='snapshot directory')
+    snapshot_parser.add_argument('nuclides', nargs='+',
+                                 help='e.g. Ni56 Co57 Ti44')
+    snapshot_parser.add_argument('--version', default=None,
+                                 help='version label [default = date]')
+    snapshot_parser.set_defaults(func=_build_snapshot_command)
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else
+                        logging.WARNING, format='%(message)s')
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
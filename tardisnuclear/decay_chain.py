@@ -0,0 +1,556 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from astropy import units as u
+
+from tardisnuclear.nuclides import get_nuc_id, get_nuc_name
+from tardisnuclear.nuclear_constants import (NuclearConstants,
+                                             get_decay_children,
+                                             get_nuclear_constants)
+
+day_to_s = u.day.to(u.s)
+
+_decay_chain_cache = {}
+
+
+def get_rounding_error(n_terms, dtype):
+    """
+    Bound on the relative rounding error of a sum of `n_terms` products of
+    non-negative (rounded) factors in floating point type `dtype`
+
+    Parameters
+    ----------
+    n_terms : int
+    dtype : numpy.dtype
+
+    Returns
+    -------
+        : float
+    """
+    return float((n_terms + 2) * np.finfo(dtype).eps)
+
+
+def get_closed_nuclide_set(nuclides):
+    """
+    All nuclides and their decay children
+
+    Parameters
+    ----------
+    nuclides : list of str or int
+        nuclide names or ids
+
+    Returns
+    -------
+        : list of int
+        sorted nuclide ids
+    """
+    nuc_ids = set()
+    stack = [get_nuc_id(nuclide) for nuclide in nuclides]
+    while stack:
+        nuc_id = stack.pop()
+        if nuc_id in nuc_ids:
+            continue
+        nuc_ids.add(nuc_id)
+        stack.extend(child_id for child_id, _ in get_decay_children(nuc_id))
+    return sorted(nuc_ids)
+
+
+def get_decay_chain(nuclides):
+    """
+    Get the (shared) decay chain of the nuclides and all their children
+
+    Parameters
+    ----------
+    nuclides : list of str or int
+        nuclide names or ids
+
+    Returns
+    -------
+        : DecayChain
+    """
+    nuc_ids = tuple(get_closed_nuclide_set(nuclides))
+    decay_chain = _decay_chain_cache.get(nuc_ids, None)
+    # rebuild if other nuclear constants were installed since (e.g. from a
+    # nuclear data snapshot)
+    if (decay_chain is None or
+            decay_chain.nuclear_constants is not get_nuclear_constants(
+                nuc_ids)):
+        decay_chain = _decay_chain_cache[nuc_ids] = DecayChain(nuc_ids)
+    return decay_chain
+
+
+class DecayChain(object):
+    """
+    Closed-form (Bateman) decay of a closed set of nuclides.
+
+    The decay dN/dt = A N is solved by the eigendecomposition
+    A = V diag(-lambda) V^-1, which can be computed by substitution as A is
+    triangular in a parents-first ordering. The number of nuclei at time t
+    is then N(t) = V diag(exp(-lambda t)) V^-1 N(0) for any number of
+    compositions and epochs at once.
+
+    Parameters
+    ----------
+    nuc_ids : list of int
+        nuclide ids - every decay child must be in the list
+    """
+
+    # double precision propagator elements formed at once for the lower
+    # precision decay
+    max_chunk_elements = 2**20
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Build the chain from the arrays of `NuclearConstants.get_arrays`
+        with the 'eigenvectors' and 'inverse_eigenvectors' of the chain
+        (e.g. memory-mapped or shared) without reading pyne and without
+        decomposing the decay matrix again
+
+        Parameters
+        ----------
+        arrays : dict of numpy.ndarray
+
+        Returns
+        -------
+            : DecayChain
+        """
+        decay_chain = cls.__new__(cls)
+        decay_chain._set_nuclear_constants(
+            NuclearConstants.from_arrays(arrays))
+        decay_chain.eigenvectors = arrays['eigenvectors']
+        decay_chain.inverse_eigenvectors = arrays['inverse_eigenvectors']
+        return decay_chain
+
+    def __init__(self, nuc_ids):
+        self._set_nuclear_constants(get_nuclear_constants(nuc_ids))
+        self.eigenvectors, self.inverse_eigenvectors = (
+            self._decompose_decay_matrix(self.decay_matrix))
+
+    def _set_nuclear_constants(self, nuclear_constants):
+        self.nuclear_constants = nuclear_constants
+        self.nuc_ids = self.nuclear_constants.nuc_ids
+        self.isotopes = self.nuclear_constants.isotopes
+        self.decay_constants = self.nuclear_constants.decay_constants
+        self.atomic_masses = self.nuclear_constants.atomic_masses
+        self.decay_matrix = self._make_decay_matrix()
+
+    def install(self):
+        """
+        Install the nuclear constants of the chain (see
+        `NuclearConstants.install`) and the chain itself for
+        `get_decay_chain`
+        """
+        self.nuclear_constants.install()
+        _decay_chain_cache[tuple(self.nuc_ids)] = self
+
+    def __len__(self):
+        return len(self.nuc_ids)
+
+    def _make_decay_matrix(self):
+        nuc_idx = self.nuclear_constants.nuc_idx
+        decay_matrix = np.diag(-self.decay_constants)
+        for i, nuc_id in enumerate(self.nuc_ids):
+            if self.decay_constants[i] == 0.0:
+                continue
+            for child_id, branch_ratio in (
+                    self.nuclear_constants.decay_children[i]):
+                if child_id not in nuc_idx:
+                    raise ValueError('Decay child {0} of {1} is not in the '
+                                     'decay chain'.format(
+                        get_nuc_name(child_id), get_nuc_name(nuc_id)))
+                decay_matrix[nuc_idx[child_id], i] += (
+                    self.decay_constants[i] * branch_ratio)
+        return decay_matrix
+
+    @staticmethod
+    def _get_parents_first_order(decay_matrix):
+        n = len(decay_matrix)
+        children = [np.flatnonzero(
+            (decay_matrix[:, i] != 0) & (np.arange(n) != i))
+            for i in range(n)]
+        visited = np.zeros(n, dtype=bool)
+        order = []
+
+        def visit(i):
+            visited[i] = True
+            for child in children[i]:
+                if not visited[child]:
+                    visit(child)
+            order.append(i)
+
+        for i in range(n):
+            if not visited[i]:
+                visit(i)
+        return np.array(order[::-1])
+
+    @classmethod
+    def _decompose_decay_matrix(cls, decay_matrix):
+        """
+        Eigenvectors of the decay matrix (columns) and their inverse
+
+        Returns
+        -------
+        eigenvectors : numpy.ndarray
+        inverse_eigenvectors : numpy.ndarray
+        """
+        order = cls._get_parents_first_order(decay_matrix)
+        triangular_matrix = decay_matrix[np.ix_(order, order)]
+        diagonal = np.diag(triangular_matrix)
+        n = len(diagonal)
+
+        triangular_eigenvectors = np.eye(n)
+        for k in range(n):
+            for i in range(k + 1, n):
+                numerator = triangular_matrix[i, k:i].dot(
+                    triangular_eigenvectors[k:i, k])
+                if numerator == 0.0:
+                    continue
+                if diagonal[k] == diagonal[i]:
+                    raise ValueError('Degenerate decay constants in the '
+                                     'decay chain')
+                triangular_eigenvectors[i, k] = numerator / (diagonal[k] -
+                                                             diagonal[i])
+
+        eigenvectors = np.empty_like(triangular_eigenvectors)
+        eigenvectors[np.ix_(order, order)] = triangular_eigenvectors
+        inverse_eigenvectors = np.empty_like(triangular_eigenvectors)
+        inverse_eigenvectors[np.ix_(order, order)] = np.linalg.inv(
+            triangular_eigenvectors)
+        return eigenvectors, inverse_eigenvectors
+
+    def get_decay_factors(self, epochs):
+        """
+        exp(-lambda t) for every epoch and nuclide
+
+        Parameters
+        ----------
+        epochs : numpy or quantity array
+            (days if not a quantity)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_nuclides)
+        """
+        epochs_s = np.atleast_1d(u.Quantity(epochs, u.day).to(u.s).value)
+        return np.exp(-np.outer(epochs_s, self.decay_constants))
+
+    def get_propagator(self, epochs):
+        """
+        Matrices that map the number of nuclei at t=0 onto the number of
+        nuclei at each epoch. All entries are non-negative - the round-off
+        below zero is clipped.
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_nuclides, n_nuclides)
+        """
+        decay_factors = self.get_decay_factors(epochs)
+        return np.maximum(np.einsum('ik,tk,kj->tij', self.eigenvectors,
+                                    decay_factors, self.inverse_eigenvectors),
+                          0.0)
+
+    def get_cancellation_error(self):
+        """
+        Bound on the double precision round-off of
+        V diag(exp(-lambda t)) V^-1 N relative to the total number of nuclei
+        sum(N) for any t >= 0, including the clipping of round-off below
+        zero (which moves an entry by at most as much). The eigenvectors are
+        taken as exact - their own error is of the order of the residual of
+        V V^-1 - I.
+
+        Returns
+        -------
+            : float
+        """
+        return 2 * get_rounding_error(len(self), np.float64) * np.abs(
+            self.eigenvectors).dot(np.abs(self.inverse_eigenvectors)).max()
+
+    def decay_numbers(self, numbers, epochs, dtype=np.float64,
+                      return_error=False):
+        """
+        Decay the number of nuclei of one or many compositions
+
+        In double precision the eigenbasis is used directly. For lower
+        precision (e.g. numpy.float32) the propagator is computed in double
+        precision for chunks of `max_chunk_elements` / n_nuclides^2 epochs
+        and then stored and contracted in `dtype` into the result, so that
+        no double precision array of the size of the result is formed. All
+        entries of the propagator and of the number of nuclei are
+        non-negative, so this contraction has no cancellation and its
+        relative error is bounded by `get_rounding_error`. Both paths clip
+        the round-off below zero.
+
+        The returned error bounds |decayed - exact| / sum(numbers) for every
+        nuclide and epoch (the decay conserves the total number of nuclei):
+        the rounding in `dtype` plus the double precision cancellation of
+        the eigenbasis (`get_cancellation_error`).
+
+        Parameters
+        ----------
+        numbers : numpy.ndarray
+            number of nuclei of shape (..., n_nuclides) in chain order (in any
+            unit, e.g. per atomic mass unit of ejecta for single precision)
+        epochs : numpy or quantity array
+            (days if not a quantity)
+        dtype : numpy.dtype
+            floating point type of the result [default = numpy.float64]
+        return_error : bool
+            also return the error bound relative to the total number of
+            nuclei [default = False]
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (..., n_epochs, n_nuclides)
+        relative_error : float
+            only if `return_error`
+        """
+        dtype = np.dtype(dtype)
+        numbers = np.asarray(numbers)
+        if dtype == np.float64:
+            eigen_numbers = numbers.dot(self.inverse_eigenvectors.T)
+            decay_factors = self.get_decay_factors(epochs)
+            decayed_numbers = (eigen_numbers[..., np.newaxis, :] *
+                               decay_factors).dot(self.eigenvectors.T)
+            # the cancellation in the eigenbasis can leave round-off below
+            # zero for (initially) absent nuclides
+            np.maximum(decayed_numbers, 0.0, out=decayed_numbers)
+        else:
+            # the total number of nuclei is conserved by the decay
+            if numbers.sum(axis=-1).max() > np.finfo(dtype).max:
+                raise ValueError('The number of nuclei exceeds the range of '
+                                 '{0} - use scaled units'.format(dtype))
+            epochs = np.atleast_1d(u.Quantity(epochs, u.day).value)
+            numbers = numbers.astype(dtype)
+            decayed_numbers = np.empty(
+                numbers.shape[:-1] + (len(epochs), len(self)), dtype=dtype)
+            chunk_size = max(1, self.max_chunk_elements // len(self)**2)
+            for start in range(0, len(epochs), chunk_size):
+                chunk = slice(start, start + chunk_size)
+                np.einsum('...j,tij->...ti', numbers,
+                          self.get_propagator(epochs[chunk]).astype(dtype),
+                          out=decayed_numbers[..., chunk, :])
+
+        if return_error:
+            return decayed_numbers, (get_rounding_error(len(self), dtype) +
+                                     self.get_cancellation_error())
+        return decayed_numbers
+
+    def get_branching_matrix(self):
+        """
+        Branch ratios from every parent (column) to its children (rows)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_nuclides, n_nuclides)
+        """
+        branching_matrix = self.decay_matrix - np.diag(np.diag(
+            self.decay_matrix))
+        unstable = self.decay_constants > 0
+        branching_matrix[:, unstable] /= self.decay_constants[unstable]
+        return branching_matrix
+
+    def decay_numbers_sampled(self, numbers, epochs, decay_constants):
+        """
+        Decay with a different set of decay constants for every sample (e.g.
+        Monte Carlo realizations of the half-lives) with the branching of
+        this chain. The eigendecomposition is computed for all samples at
+        once by substitution in the parents-first order of the chain.
+
+        Parameters
+        ----------
+        numbers : numpy.ndarray
+            number of nuclei of shape (n_nuclides, ) or
+            (n_samples, n_nuclides) in chain order
+        epochs : numpy or quantity array
+            (days if not a quantity)
+        decay_constants : numpy.ndarray
+            decay constants (1/s) of shape (n_samples, n_nuclides)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_samples, n_epochs, n_nuclides)
+        """
+        decay_constants = np.atleast_2d(decay_constants)
+        n_samples, n = decay_constants.shape
+        order = self._get_parents_first_order(self.decay_matrix)
+        ordered_constants = decay_constants[:, order]
+        ordered_branching = self.get_branching_matrix()[np.ix_(order, order)]
+
+        # A_s = B diag(lambda_s) - diag(lambda_s) is lower triangular
+        off_diagonal = ordered_branching * ordered_constants[:, np.newaxis, :]
+        triangular_eigenvectors = np.zeros((n_samples, n, n))
+        triangular_eigenvectors[:, np.arange(n), np.arange(n)] = 1.0
+        for k in range(n):
+            for i in range(k + 1, n):
+                numerator = np.einsum('sj,sj->s', off_diagonal[:, i, k:i],
+                                      triangular_eigenvectors[:, k:i, k])
+                if not numerator.any():
+                    continue
+                denominator = ordered_constants[:, i] - ordered_constants[:, k]
+                if np.any(denominator[numerator != 0] == 0):
+                    raise ValueError('Degenerate decay constants in the '
+                                     'decay chain')
+                triangular_eigenvectors[:, i, k] = np.where(
+                    numerator != 0, numerator / np.where(
+                        denominator == 0, 1.0, denominator), 0.0)
+
+        eigenvectors = np.empty_like(triangular_eigenvectors)
+        eigenvectors[:, order[:, np.newaxis], order] = triangular_eigenvectors
+        inverse_eigenvectors = np.empty_like(triangular_eigenvectors)
+        inverse_eigenvectors[:, order[:, np.newaxis], order] = np.linalg.inv(
+            triangular_eigenvectors)
+
+        epochs_s = np.atleast_1d(u.Quantity(epochs, u.day).to(u.s).value)
+        decay_factors = np.exp(-decay_constants[:, np.newaxis, :] *
+                               epochs_s[np.newaxis, :, np.newaxis])
+        eigen_numbers = np.einsum('sij,sj->si', inverse_eigenvectors,
+                                  np.broadcast_to(numbers, (n_samples, n)))
+        return np.maximum(np.einsum('sik,stk,sk->sti', eigenvectors,
+                                    decay_factors, eigen_numbers,
+                                    optimize=True), 0.0)
+
+    def get_step_propagator(self, dt_s):
+        """
+        Matrix that advances the number of nuclei by one time step
+
+        Parameters
+        ----------
+        dt_s : float
+            time step in seconds
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_nuclides, n_nuclides)
+        """
+        return np.maximum((self.eigenvectors *
+                           np.exp(-self.decay_constants * dt_s)).dot(
+            self.inverse_eigenvectors), 0.0)
+
+    def get_stepper(self, numbers, epoch=0.0, **kwargs):
+        """
+        Incremental decay of the number of nuclei starting at `epoch`
+        (see `DecayStepper`)
+        """
+        return DecayStepper(self, numbers, epoch=epoch, **kwargs)
+
+    def __repr__(self):
+        return '<DecayChain {0}>'.format(' '.join(self.isotopes))
+
+
+class DecayStepper(object):
+    """
+    Stateful decay of one or many compositions that is advanced forward in
+    time step by step, e.g. over a stream of observation epochs.
+
+    Only the current number of nuclei is kept. Each step is one product
+    with the propagator of its step size, and the propagators are cached
+    per step size so that regular epoch grids cost one matrix product per
+    epoch independent of the history.
+
+    Parameters
+    ----------
+    decay_chain : DecayChain
+
+    numbers : numpy.ndarray
+        number of nuclei of shape (..., n_nuclides) in chain order at `epoch`
+
+    epoch : float or quantity
+        start epoch (days if not a quantity) [default = 0]
+
+    max_cached_steps : int
+        maximum number of cached step propagators [default = 32]
+    """
+
+    def __init__(self, decay_chain, numbers, epoch=0.0, max_cached_steps=32):
+        self.decay_chain = decay_chain
+        self.numbers = np.array(numbers, dtype=np.float64)
+        if self.numbers.shape[-1] != len(decay_chain):
+            raise ValueError('numbers has {0} nuclides, the decay chain has '
+                             '{1}'.format(self.numbers.shape[-1],
+                                          len(decay_chain)))
+        self.epoch_s = u.Quantity(epoch, u.day).to(u.s).value
+        self.max_cached_steps = max_cached_steps
+        self._step_propagators = OrderedDict()
+
+    @property
+    def epoch(self):
+        return self.epoch_s / day_to_s
+
+    def _get_step_propagator(self, dt_s):
+        if dt_s in self._step_propagators:
+            self._step_propagators.move_to_end(dt_s)
+        else:
+            self._step_propagators[dt_s] = (
+                self.decay_chain.get_step_propagator(dt_s))
+            while len(self._step_propagators) > self.max_cached_steps:
+                self._step_propagators.popitem(last=False)
+        return self._step_propagators[dt_s]
+
+    def step(self, dt):
+        """
+        Advance the decay by `dt`
+
+        Parameters
+        ----------
+        dt : float or quantity
+            time step (days if not a quantity)
+
+        Returns
+        -------
+            : numpy.ndarray
+            current number of nuclei of shape (..., n_nuclides)
+        """
+        dt_s = float(u.Quantity(dt, u.day).to(u.s).value)
+        if dt_s < 0:
+            raise ValueError('Can only step forward in time '
+                             '(dt = {0} s)'.format(dt_s))
+        if dt_s > 0:
+            self.numbers = self.numbers.dot(self._get_step_propagator(dt_s).T)
+            self.epoch_s += dt_s
+        return self.numbers
+
+    def advance_to(self, epoch):
+        """
+        Advance the decay to `epoch` (days if not a quantity)
+
+        Returns
+        -------
+            : numpy.ndarray
+            number of nuclei of shape (..., n_nuclides)
+        """
+        epoch_s = float(u.Quantity(epoch, u.day).to(u.s).value)
+        # round the step to the microsecond so that regular grids reuse the
+        # cached propagators despite floating point noise in the epochs
+        return self.step(round(epoch_s - self.epoch_s, 6) * u.s)
+
+    def iter_epochs(self, epochs):
+        """
+        Decay over a (possibly unbounded) stream of increasing epochs
+
+        Parameters
+        ----------
+        epochs : iterable of float or quantity
+            (days if not quantities)
+
+        Yields
+        ------
+        epoch : float
+            epoch in days
+        numbers : numpy.ndarray
+            copy of the number of nuclei of shape (..., n_nuclides)
+        """
+        for epoch in epochs:
+            numbers = self.advance_to(epoch)
+            yield self.epoch, numbers.copy()
+
+    def __repr__(self):
+        return '<DecayStepper at {0:g} d over {1}>'.format(self.epoch,
+                                                          self.decay_chain)
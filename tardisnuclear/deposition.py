@@ -0,0 +1,211 @@
+import numpy as np
+
+from astropy import units as u, constants as const
+
+classical_electron_radius = const.a0.cgs.value * const.alpha.value**2
+electron_rest_energy = (const.m_e * const.c**2).cgs.value
+amu_to_g = u.u.to(u.g)
+day_to_s = u.day.to(u.s)
+
+
+def klein_nishina_cross_section(energy):
+    """
+    Klein-Nishina total and energy absorption cross sections per electron.
+    The energy absorption cross section is the total minus the energy
+    scattering cross section and is the relevant opacity for deposition.
+
+    Parameters
+    ----------
+    energy : numpy.ndarray
+        photon energies in erg
+
+    Returns
+    -------
+    total_cross_section : numpy.ndarray
+        in cm^2
+    absorption_cross_section : numpy.ndarray
+        in cm^2
+    """
+    # the closed form suffers from cancellation at low energies - below
+    # 0.5 keV photoabsorption dominates by orders of magnitude anyway
+    x = np.maximum(np.asarray(energy, dtype=np.float64) /
+                   electron_rest_energy, 1e-3)
+    log_term = np.log1p(2 * x)
+    re2 = classical_electron_radius**2
+    total_cross_section = 2 * np.pi * re2 * (
+        (1 + x) / x**2 * (2 * (1 + x) / (1 + 2 * x) - log_term / x) +
+        log_term / (2 * x) - (1 + 3 * x) / (1 + 2 * x)**2)
+    scattering_cross_section = np.pi * re2 * (
+        log_term / x**3 +
+        2 * (1 + x) * (2 * x**2 - 2 * x - 1) / (x**2 * (1 + 2 * x)**2) +
+        8 * x**2 / (3 * (1 + 2 * x)**3))
+    return total_cross_section, total_cross_section - scattering_cross_section
+
+
+class GammaRayDeposition(object):
+    """
+    Time-dependent trapping of the X-ray and gamma-ray lines of a decay
+    chain in homologously expanding ejecta. Each line is trapped with
+    1 - exp(-tau) with tau = kappa(E, t) * eta * M / (v t)^2, where kappa is
+    the Klein-Nishina energy absorption opacity plus optionally the
+    photoabsorption opacity of the decayed ejecta composition. The ejecta
+    mass and composition are read at every evaluation; built with
+    `from_energy_injection` they are those of the current parameter values
+    of the model (e.g. after a fit).
+
+    Parameters
+    ----------
+    decay_radiation : ~tardisnuclear.nuclear_data.DecayRadiation
+
+    ejecta : ~tardisnuclear.ejecta.Ejecta
+        its isotopes give the order of the energy injection model columns
+
+    velocity : float or astropy.Quantity
+        characteristic ejecta velocity (km/s if float)
+
+    photo_absorption : bool
+        add the composition weighted photoabsorption opacity
+        (`Ejecta.get_mass_attenuation`) [default = False]
+
+    electrons_per_nucleon : float
+        [default = 0.5]
+
+    geometry_factor : float
+        eta - 3 / (4 pi) for the central column of a uniform sphere
+        [default = 3 / (4 pi)]
+    """
+
+    @classmethod
+    def from_energy_injection(cls, energy_injection, velocity, **kwargs):
+        """
+        Deposition that reads the ejecta of an energy injection model (with
+        the masses of its current parameter values) at every evaluation
+
+        Parameters
+        ----------
+        energy_injection : ~tardisnuclear.models.base.BaseEnergyInjection
+
+        velocity : float or astropy.Quantity
+            characteristic ejecta velocity (km/s if float)
+
+        **kwargs :
+            passed to `GammaRayDeposition`
+
+        Returns
+        -------
+            : GammaRayDeposition
+        """
+        deposition = cls(energy_injection.decay_radiation,
+                         energy_injection.ejecta, velocity, **kwargs)
+        deposition.energy_injection = energy_injection
+        return deposition
+
+    def __init__(self, decay_radiation, ejecta, velocity,
+                 photo_absorption=False, electrons_per_nucleon=0.5,
+                 geometry_factor=3 / (4 * np.pi)):
+        self._ejecta = ejecta
+        self.energy_injection = None
+        self.isotopes = list(ejecta.isotopes)
+        self.velocity_cm_s = u.Quantity(velocity, u.km / u.s).to(
+            u.cm / u.s).value
+        self.geometry_factor = geometry_factor
+        self.photo_absorption = photo_absorption
+
+        self.lines = decay_radiation.get_line_list(self.isotopes)
+        line_energy = self.lines.energy.values
+        self.line_energy_ev = u.Quantity(line_energy, u.erg).to(u.eV).value
+
+        _, absorption_cross_section = klein_nishina_cross_section(line_energy)
+        self.compton_opacity = (absorption_cross_section *
+                                electrons_per_nucleon / amu_to_g)
+
+        self.energy_per_decay_matrix = np.zeros((len(self.lines),
+                                                 len(self.isotopes)))
+        self.energy_per_decay_matrix[np.arange(len(self.lines)),
+                                     self.lines.isotope_idx.values] = (
+            self.lines.energy_per_decay.values)
+
+    @property
+    def ejecta(self):
+        if self.energy_injection is not None:
+            return self.energy_injection.ejecta
+        return self._ejecta
+
+    @property
+    def mass_g(self):
+        return self.ejecta.mass_g
+
+    def calculate_opacity(self, time):
+        """
+        Opacity of every line
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_lines) in cm^2/g
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        opacity = np.broadcast_to(self.compton_opacity,
+                                  (len(time), len(self.compton_opacity)))
+        if self.photo_absorption:
+            opacity = opacity + self.ejecta.get_mass_attenuation(
+                self.line_energy_ev, time)
+        return opacity
+
+    def calculate_optical_depth(self, time):
+        """
+        Optical depth of every line
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_lines)
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        time_s = time * day_to_s
+        column_density = (self.geometry_factor * self.ejecta.mass_g /
+                          (self.velocity_cm_s * time_s)**2)
+        return column_density[:, np.newaxis] * self.calculate_opacity(time)
+
+    def calculate_trapping_fraction(self, time):
+        """
+        Fraction of the energy of every line that is deposited
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_lines)
+        """
+        return -np.expm1(-self.calculate_optical_depth(time))
+
+    def calculate_deposited_energy_per_decay(self, time):
+        """
+        Deposited electromagnetic energy per decay for every isotope
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_isotopes) in erg
+        """
+        return self.calculate_trapping_fraction(time).dot(
+            self.energy_per_decay_matrix)
@@ -1,17 +1,161 @@
+import os
+import hashlib
 from collections import OrderedDict
 
 import pandas as pd
 from pyne.material import Material
-from pyne import data
-from pyne import nucname
 
 import numpy as np
 
 from astropy import units as u
 
+from tardisnuclear.io.read_henke import HenkeCrossSections
+from tardisnuclear.io.yields import (read_yann_file, read_yield_directory,
+                                     read_yield_grid)
+from tardisnuclear.decay_chain import (get_decay_chain, get_rounding_error,
+                                       get_closed_nuclide_set)
+from tardisnuclear.nuclear_constants import (get_nuclear_constants,
+                                             get_nuclear_data_version)
+from tardisnuclear.nuclides import (get_nuc_id, get_nuc_name, get_znum,
+                                    get_element)
+
 msun_to_cgs = u.Msun.to(u.g)
 u_to_g = u.u.to(u.g)
 
+class DecayCache(object):
+    """
+    Bounded LRU cache of decayed fraction arrays with an optional on-disk
+    tier. Keys identify the nuclear data version, the decay chain, the
+    composition and the epochs, so that files written with other nuclear
+    data (another snapshot or pyne version) are not read back.
+
+    Parameters
+    ----------
+
+    maxsize: ~int
+        maximum number of arrays held in memory [default = 128]
+
+    max_nbytes: ~int
+        maximum number of bytes held in memory [default = 256 MiB]
+
+    cache_dir: ~str
+        directory for the on-disk tier; disabled if None [default = None]
+
+    data_version: ~str
+        nuclear data version in the keys; None uses
+        `tardisnuclear.nuclear_constants.get_nuclear_data_version`
+        [default = None]
+    """
+
+    def __init__(self, maxsize=128, max_nbytes=256 * 2**20, cache_dir=None,
+                 data_version=None):
+        self.maxsize = maxsize
+        self.max_nbytes = max_nbytes
+        self.cache_dir = cache_dir
+        self._data_version = data_version
+        if cache_dir is not None and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._cache = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def data_version(self):
+        if self._data_version is not None:
+            return self._data_version
+        return get_nuclear_data_version()
+
+    def make_key(self, nuc_ids, composition, epochs):
+        key_hash = hashlib.sha1(self.data_version.encode())
+        for item in (nuc_ids, composition, epochs):
+            item = np.ascontiguousarray(item)
+            key_hash.update(str(item.dtype).encode())
+            key_hash.update(item.tobytes())
+        return key_hash.hexdigest()
+
+    def _get_disk_fname(self, key):
+        return os.path.join(self.cache_dir, '{0}.npy'.format(key))
+
+    def get(self, key):
+        """
+        Get an array from the cache
+
+        Returns
+        -------
+            : ~numpy.ndarray or None
+            read-only array or None if the key is not in the cache
+        """
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        if self.cache_dir is not None:
+            fname = self._get_disk_fname(key)
+            if os.path.exists(fname):
+                self.disk_hits += 1
+                value = np.load(fname)
+                value.setflags(write=False)
+                self._put_memory(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def _put_memory(self, key, value):
+        value.setflags(write=False)
+        if key in self._cache:
+            self.nbytes -= self._cache.pop(key).nbytes
+        # arrays larger than the memory tier only go to disk
+        if value.nbytes > self.max_nbytes:
+            return
+        self._cache[key] = value
+        self.nbytes += value.nbytes
+        while (len(self._cache) > self.maxsize or
+               self.nbytes > self.max_nbytes):
+            self.nbytes -= self._cache.popitem(last=False)[1].nbytes
+
+    def put(self, key, value):
+        value = np.array(value)
+        self._put_memory(key, value)
+        if self.cache_dir is not None:
+            fname = self._get_disk_fname(key)
+            tmp_fname = '{0}.{1}.tmp.npy'.format(fname[:-4], os.getpid())
+            np.save(tmp_fname, value)
+            os.replace(tmp_fname, fname)
+
+    def clear(self, disk=False):
+        self._cache.clear()
+        self.nbytes = 0
+        if disk and self.cache_dir is not None:
+            for fname in os.listdir(self.cache_dir):
+                if fname.endswith('.npy'):
+                    os.remove(os.path.join(self.cache_dir, fname))
+
+    @property
+    def stats(self):
+        return OrderedDict([('hits', self.hits), ('disk_hits', self.disk_hits),
+                            ('misses', self.misses),
+                            ('size', len(self._cache)),
+                            ('maxsize', self.maxsize),
+                            ('nbytes', self.nbytes),
+                            ('max_nbytes', self.max_nbytes)])
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return ('<DecayCache hits={hits} disk_hits={disk_hits} '
+                'misses={misses} size={size}/{maxsize} '
+                'nbytes={nbytes}/{max_nbytes}>'.format(**self.stats))
+
+
+# shared by all Ejecta unless set per instance (None disables caching)
+decay_cache = DecayCache()
+
+
 class Ejecta(object):
     """
     Radioactive Ejecta composition
@@ -29,13 +173,9 @@ class Ejecta(object):
 
     @classmethod
     def from_yann_file(cls, fname):
-        data = pd.read_table(fname,
-                             names=['isotope', 'mass'], delim_whitespace=True)
-
-        data = data.set_index('isotope')
-        mass = data.mass.sum()
-        data['norm_mass'] = data.mass / mass
-        composition = data.norm_mass.to_dict()
+        masses = read_yann_file(fname)
+        mass = masses.sum()
+        composition = (masses / mass).to_dict()
 
         return cls(mass, composition)
 
@@ -60,10 +200,12 @@ class Ejecta(object):
     def __init__(self, mass_msol, composition):
         self.mass_g = mass_msol * msun_to_cgs
         self.material = Material(self._normalize_composition(composition))
-        self._pad_material()
-        atomic_masses = self.get_masses()
-        self.n_per_g = [1 / atomic_masses[item]
-                            for item in self.get_all_children_nuc_name()]
+        self._update_nuclear_constants()
+        self.decay_cache = decay_cache
+        self._decay_cache_key_base = None
+        self.henke_cross_sections = None
+        self._element_cross_sections = {}
+        self._mass_attenuation_cache = {}
 
 
     @property
@@ -75,43 +217,40 @@ class Ejecta(object):
 
     def __setitem__(self, key, value):
         self.material.__setitem__(key, value)
+        if get_nuc_id(key) not in self.nuclear_constants.nuc_idx:
+            self._update_nuclear_constants()
+        self._decay_cache_key_base = None
+        self._mass_attenuation_cache.clear()
 
     def keys(self):
         return self.material.keys()
 
     @property
     def isotopes(self):
-        return [nucname.name(id) for id in self.keys()]
+        return [get_nuc_name(nuc_id) for nuc_id in self.keys()]
+
+    def _update_nuclear_constants(self):
+        self.nuclear_constants = get_nuclear_constants(
+            get_closed_nuclide_set(self.material.keys()))
+        self._pad_material()
+        self.n_per_g = 1 / self.nuclear_constants.atomic_masses
 
     def get_decay_constant(self):
-        return OrderedDict((nuc_name, data.decay_const(nuc_id))
-                for nuc_id, nuc_name in zip(self.get_all_children(),
-                                            self.get_all_children_nuc_name()))
+        return OrderedDict(zip(self.nuclear_constants.isotopes,
+                               self.nuclear_constants.decay_constants))
 
     def get_half_life(self):
-        return [data.half_life(nuc_id) for nuc_id in self.keys()]
+        return list(self.nuclear_constants.half_lives)
 
     def get_masses(self):
-        return {nuc_name:data.atomic_mass(nuc_id) * u_to_g
-                for nuc_id, nuc_name in zip(self.keys(), self.isotopes)}
+        return dict(zip(self.nuclear_constants.isotopes,
+                        self.nuclear_constants.atomic_masses))
 
     def get_all_children(self):
-        children_set = set()
-        def get_child(nuc_id):
-            children = data.decay_children(nuc_id)
-            if len(children) != 0:
-                children_set.update(children)
-                for child_nuc_id in children:
-                    get_child(child_nuc_id)
-
-        for nuc_id in self.material:
-            children_set.add(nuc_id)
-            get_child(nuc_id)
-
-        return sorted(children_set)
+        return list(self.nuclear_constants.nuc_ids)
 
     def get_all_children_nuc_name(self):
-        return [nucname.name(nuc_id) for nuc_id in self.get_all_children()]
+        return list(self.nuclear_constants.isotopes)
 
 
     @staticmethod
@@ -128,6 +267,59 @@ class Ejecta(object):
             except KeyError:
                 self.material[isotope] = 0.0
 
+    def _decay_fractions(self, epochs, out=None):
+        """
+        Decay the ejecta material into an array
+
+        Parameters
+        ----------
+
+        epochs: numpy.ndarray
+            epochs in days
+
+        out: ~numpy.ndarray
+            buffer of shape (n_epochs, n_isotopes) to write into
+            [default = None]
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            mass fractions of shape (n_epochs, n_isotopes) in chain order
+        """
+        isotope_children = self.get_all_children()
+        if out is None:
+            out = np.empty((len(epochs), len(isotope_children)))
+        elif out.shape != (len(epochs), len(isotope_children)):
+            raise ValueError('out has shape {0} - expected {1}'.format(
+                out.shape, (len(epochs), len(isotope_children))))
+
+        if self.decay_cache is not None:
+            cache_key = self._get_decay_cache_key(epochs)
+            cached_fractions = self.decay_cache.get(cache_key)
+            if cached_fractions is not None:
+                out[:] = cached_fractions
+                return out
+
+        day_to_s = 24 * 3600
+        for i, epoch in enumerate(epochs):
+            new_material = self.material.decay(epoch * day_to_s)
+            out[i] = [0.0 if key not in new_material else new_material[key]
+                      for key in isotope_children]
+
+        if self.decay_cache is not None:
+            self.decay_cache.put(cache_key, out)
+        return out
+
+    def _get_decay_cache_key(self, epochs):
+        if self._decay_cache_key_base is None:
+            nuc_ids = np.array(self.get_all_children(), dtype=np.int64)
+            composition = np.array([self.material[nuc_id]
+                                    for nuc_id in nuc_ids])
+            self._decay_cache_key_base = (nuc_ids, composition)
+        nuc_ids, composition = self._decay_cache_key_base
+        return self.decay_cache.make_key(nuc_ids, composition,
+                                         np.asarray(epochs, dtype=np.float64))
+
     def decay(self, epochs):
         """
         Decay the ejecta material
@@ -142,36 +334,152 @@ class Ejecta(object):
             : ~pd.DataFrame
 
         """
-        epochs = u.Quantity(epochs, u.day)
-        isotope_children = self.get_all_children()
-        columns = self.get_all_children_nuc_name()
-        decayed_fractions = pd.DataFrame(index=epochs.value, columns=columns,
-                                       dtype=np.float64)
-        day_to_s = 24 * 3600
-        for epoch, row in decayed_fractions.iterrows():
-            new_material = self.material.decay(epoch * day_to_s)
-            fractions = [0.0 if key not in new_material else new_material[key]
-                         for key in isotope_children]
-            row.values[:] = fractions
-        return decayed_fractions
+        epochs = np.atleast_1d(u.Quantity(epochs, u.day).value)
+        return pd.DataFrame(self._decay_fractions(epochs), index=epochs,
+                            columns=self.get_all_children_nuc_name())
 
-    def get_decayed_numbers(self, epochs):
-        epochs = u.Quantity(epochs, u.day)
+    def get_decayed_numbers(self, epochs, out=None, as_dataframe=True):
+        """
+        Number of nuclei of each isotope after decay
+
+        Parameters
+        ----------
+
+        epochs: numpy or quantity array
+
+        out: ~numpy.ndarray
+            buffer of shape (n_epochs, n_isotopes) to write into; reuse
+            the same buffer to avoid allocations [default = None]
+
+        as_dataframe: ~bool
+            wrap the result in a DataFrame (without copying) [default = True]
+
+        Returns
+        -------
+            : ~pd.DataFrame or ~numpy.ndarray
+
+        """
+        epochs = np.atleast_1d(u.Quantity(epochs, u.day).value)
 
-        fractions = self.decay(epochs)
+        numbers = self._decay_fractions(epochs, out=out)
+        numbers *= self.mass_g * self.n_per_g
 
-        return fractions * self.mass_g * self.n_per_g
+        if as_dataframe:
+            return pd.DataFrame(numbers, index=epochs,
+                                columns=self.get_all_children_nuc_name(),
+                                copy=False)
+        else:
+            return numbers
 
+    def get_elements(self):
+        """
+        Elements of the decay chain
+
+        Returns
+        -------
+        elements : list of str
+        element_idx : numpy.ndarray
+            index into `elements` for each isotope of the decay chain
+        """
+        z_numbers = [get_znum(nuc_id) for nuc_id in self.get_all_children()]
+        element_names = {get_znum(nuc_id): get_element(nuc_id)
+                         for nuc_id in self.get_all_children()}
+        unique_z_numbers = sorted(element_names)
+        elements = [element_names[z_number] for z_number in unique_z_numbers]
+        element_idx = np.searchsorted(unique_z_numbers, z_numbers)
+        return elements, element_idx
+
+    def get_element_mass_fractions(self, epochs):
+        """
+        Decay the ejecta and sum the mass fractions by element
+
+        Parameters
+        ----------
+
+        epochs: numpy or quantity array
+
+        Returns
+        -------
+            : ~pd.DataFrame
+
+        """
+        elements, element_idx = self.get_elements()
+        isotope_to_element = np.zeros((len(element_idx), len(elements)))
+        isotope_to_element[np.arange(len(element_idx)), element_idx] = 1.0
+        decayed_fractions = self.decay(epochs)
+        return pd.DataFrame(decayed_fractions.values.dot(isotope_to_element),
+                            index=decayed_fractions.index, columns=elements)
+
+    def get_mass_attenuation(self, energies, epochs):
+        """
+        Composition weighted photoabsorption mass attenuation coefficient of
+        the decayed ejecta. The element cross sections are looked up once per
+        set of elements and energy grid and the mixture is cached per epoch,
+        so that only new epochs are decayed. Changing the composition clears
+        the epoch cache.
+
+        Parameters
+        ----------
 
+        energies: numpy or quantity array
+            photon energies (eV if not a quantity)
+
+        epochs: numpy or quantity array
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            array of shape (n_epochs, n_energies) in cm^2/g
+        """
+        energies = np.atleast_1d(u.Quantity(energies, u.eV).value)
+        epochs = np.atleast_1d(u.Quantity(epochs, u.day).value)
+        energy_key = energies.tobytes()
+        elements, _ = self.get_elements()
+        # new isotopes can add elements to the decay chain
+        cross_section_key = (tuple(elements), energy_key)
+
+        if cross_section_key not in self._element_cross_sections:
+            if self.henke_cross_sections is None:
+                self.henke_cross_sections = HenkeCrossSections.from_hdf5()
+            self._element_cross_sections[cross_section_key] = (
+                self.henke_cross_sections.get_cross_section(
+                    np.array(elements)[:, np.newaxis], energies))
+
+        epoch_cache = self._mass_attenuation_cache.setdefault(energy_key, {})
+        new_epochs = np.unique([epoch for epoch in epochs
+                                if epoch not in epoch_cache])
+        if len(new_epochs) > 0:
+            element_fractions = self.get_element_mass_fractions(new_epochs)
+            mass_attenuation = element_fractions.values.dot(
+                self._element_cross_sections[cross_section_key])
+            epoch_cache.update(zip(new_epochs, mass_attenuation))
+
+        return np.array([epoch_cache[epoch] for epoch in epochs])
+
+    def get_decay_stepper(self, **kwargs):
+        """
+        Incremental decay of the number of nuclei from t=0, e.g. for
+        streaming epochs (see `tardisnuclear.decay_chain.DecayStepper`)
+
+        Returns
+        -------
+            : ~tardisnuclear.decay_chain.DecayStepper
+        """
+        decay_chain = get_decay_chain(self.keys())
+        numbers = (np.array([self.material[nuc_id]
+                             for nuc_id in decay_chain.nuc_ids]) *
+                   self.mass_g / decay_chain.atomic_masses)
+        return decay_chain.get_stepper(numbers, **kwargs)
 
     def __repr__(self):
         return self.material.__str__()
 
     def get_numbers(self):
         N = {}
-        for nuc_id, nuc_name in zip(self.keys(), self.isotopes):
-            mass = self.material[nuc_id] * self.mass_g
-            N[nuc_name] =  (1 / (data.atomic_mass(nuc_id) * u_to_g) * mass)
+        for nuc_id, nuc_name, n_per_g in zip(self.nuclear_constants.nuc_ids,
+                                             self.nuclear_constants.isotopes,
+                                             self.n_per_g):
+            N[nuc_name] = n_per_g * self.material[nuc_id] * self.mass_g
         return N
 
 
@@ -180,3 +488,169 @@ class Ejecta(object):
         return self.get_number()
 
 
+class EjectaSet(object):
+    """
+    Many radioactive ejecta compositions over one shared decay chain. The
+    compositions are stored as one contiguous (n_ejecta, n_isotopes) array
+    of mass fractions in chain order and are decayed in one batched
+    operation.
+
+    Parameters
+    ----------
+
+    mass_msol: ~numpy.ndarray
+        masses in solar masses of shape (n_ejecta, )
+
+    composition: ~pd.DataFrame
+        compositions of shape (n_ejecta, n_input_isotopes) with isotope
+        columns, e.g. Ni56; each row will be normalized to 1 (rows without
+        mass stay zero)
+    """
+
+    @classmethod
+    def from_masses(cls, masses):
+        """
+        Initialize from isotope masses
+
+        Parameters
+        ----------
+
+        masses: ~pd.DataFrame
+            masses in solar masses of shape (n_ejecta, n_input_isotopes)
+            with isotope columns (see `tardisnuclear.io.read_yield_grid`)
+        """
+        return cls(masses.sum(axis=1).values, masses)
+
+    @classmethod
+    def from_yield_directory(cls, path, pattern='*', processes=None):
+        return cls.from_masses(read_yield_directory(path, pattern=pattern,
+                                                    processes=processes))
+
+    @classmethod
+    def from_yield_grid(cls, fname):
+        return cls.from_masses(read_yield_grid(fname))
+
+    def __init__(self, mass_msol, composition):
+        self.decay_chain = get_decay_chain(composition.columns)
+        self.index = composition.index
+        self.mass_g = np.asarray(mass_msol, dtype=np.float64) * msun_to_cgs
+
+        chain_idx = {isotope: i for i, isotope in
+                     enumerate(self.decay_chain.isotopes)}
+        column_idx = [chain_idx[get_nuc_name(isotope)]
+                      for isotope in composition.columns]
+        self.fractions = np.zeros((len(composition), len(self.decay_chain)))
+        self.fractions[:, column_idx] = composition.values
+        self.normalize()
+
+    def __len__(self):
+        return len(self.fractions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return EjectaSet(self.mass_g[item] / msun_to_cgs,
+                             pd.DataFrame(self.fractions[item],
+                                          index=self.index[item],
+                                          columns=self.isotopes))
+        composition = {isotope: fraction for isotope, fraction in
+                       zip(self.isotopes, self.fractions[item])
+                       if fraction > 0}
+        return Ejecta(self.mass_g[item] / msun_to_cgs, composition)
+
+    @property
+    def isotopes(self):
+        return self.decay_chain.isotopes
+
+    @property
+    def n_per_g(self):
+        return 1 / self.decay_chain.atomic_masses
+
+    def normalize(self):
+        """
+        Normalize every composition to 1 in place; compositions without any
+        mass (e.g. models of a yield grid without these isotopes) stay zero
+        """
+        fraction_sums = self.fractions.sum(axis=1)
+        has_mass = fraction_sums > 0
+        self.fractions[has_mass] /= fraction_sums[has_mass, np.newaxis]
+
+    def get_numbers(self):
+        """
+        Initial number of nuclei
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            array of shape (n_ejecta, n_isotopes)
+        """
+        return self.fractions * self.mass_g[:, np.newaxis] * self.n_per_g
+
+    def get_decayed_numbers(self, epochs):
+        """
+        Number of nuclei after decay for all compositions at once
+
+        Parameters
+        ----------
+
+        epochs: numpy or quantity array
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            array of shape (n_ejecta, n_epochs, n_isotopes)
+        """
+        return self.decay_chain.decay_numbers(self.get_numbers(), epochs)
+
+    def get_decay_stepper(self, **kwargs):
+        """
+        Incremental decay of all compositions from t=0 (see
+        `tardisnuclear.decay_chain.DecayStepper`)
+
+        Returns
+        -------
+            : ~tardisnuclear.decay_chain.DecayStepper
+        """
+        return self.decay_chain.get_stepper(self.get_numbers(), **kwargs)
+
+    def decay(self, epochs, dtype=np.float64, return_error=False):
+        """
+        Decay all compositions
+
+        Parameters
+        ----------
+
+        epochs: numpy or quantity array
+
+        dtype: ~numpy.dtype
+            floating point type of the result [default = numpy.float64]
+
+        return_error: ~bool
+            also return the expected relative error [default = False]
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            mass fractions of shape (n_ejecta, n_epochs, n_isotopes)
+            normalized to 1 like `Ejecta.decay`
+
+        relative_error: ~float
+            bound on the error of the mass fractions (see
+            `DecayChain.decay_numbers`); only if `return_error`
+        """
+        # decay the number of nuclei per atomic mass unit of ejecta, which
+        # is within the range of single precision
+        atomic_masses_u = self.decay_chain.atomic_masses / u_to_g
+        decayed_numbers, relative_error = self.decay_chain.decay_numbers(
+            self.fractions / atomic_masses_u, epochs, dtype=dtype,
+            return_error=True)
+        decayed_masses = decayed_numbers * atomic_masses_u.astype(dtype)
+        decayed_masses /= decayed_masses.sum(axis=2)[..., np.newaxis]
+        if return_error:
+            # the normalization adds a sum over the isotopes
+            return decayed_masses, relative_error + get_rounding_error(
+                len(self.decay_chain), dtype)
+        return decayed_masses
+
+    def __repr__(self):
+        return '<EjectaSet {0} compositions over {1}>'.format(
+            len(self), self.decay_chain)
@@ -1,3 +1,12 @@
 from tardisnuclear.io.nndc.base import (get_decay_radiation,
                                         store_decay_radiation,
                                         download_decay_radiation)
+from tardisnuclear.io.read_henke import (HenkeCrossSections,
+                                        store_henke_tables)
+from tardisnuclear.io.yields import (read_yann_file, read_yield_directory,
+                                     read_yield_grid)
+from tardisnuclear.io.export import (write_dataframe, ParquetStreamWriter,
+                                     export_decay, export_injected_energy,
+                                     export_posterior)
+from tardisnuclear.io.snapshot import (build_snapshot, NuclearDataSnapshot,
+                                       load_snapshot)
@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+
+from astropy import units as u
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Exporting to parquet requires pyarrow '
+                          '(pip install pyarrow)')
+    return pyarrow, pyarrow.parquet
+
+
+def write_dataframe(df, path, partition_cols=None, compression='zstd',
+                    index=True):
+    """
+    Write a dataframe to parquet
+
+    Parameters
+    ----------
+
+    df: ~pd.DataFrame
+
+    path: ~str
+        parquet file or, with `partition_cols`, dataset directory
+
+    partition_cols: ~list of str
+        columns to partition the dataset directory by (e.g. 'model')
+        [default = None]
+
+    compression: ~str
+        parquet compression codec [default = 'zstd']
+
+    index: ~bool
+        store the index as a column [default = True]
+    """
+    pa, pq = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=index)
+    if partition_cols is None:
+        pq.write_table(table, path, compression=compression)
+    else:
+        pq.write_to_dataset(table, path, partition_cols=partition_cols,
+                            compression=compression)
+
+
+class ParquetStreamWriter(object):
+    """
+    Streaming parquet writer that appends dataframe chunks as row groups
+    to one file, so that outputs larger than memory can be written chunk by
+    chunk. The schema is taken from the first chunk. With `partition_cols`
+    every chunk is added to a partitioned dataset directory instead.
+
+    Parameters
+    ----------
+
+    path: ~str
+        parquet file or, with `partition_cols`, dataset directory
+
+    partition_cols: ~list of str
+        columns to partition the dataset directory by (e.g. 'model')
+        [default = None]
+
+    compression: ~str
+        parquet compression codec [default = 'zstd']
+
+    index: ~bool
+        store the index as a column [default = False]
+    """
+
+    def __init__(self, path, partition_cols=None, compression='zstd',
+                 index=False):
+        self.pa, self.pq = _import_pyarrow()
+        self.path = path
+        self.partition_cols = partition_cols
+        self.compression = compression
+        self.index = index
+        self.writer = None
+        self.n_rows = 0
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=self.index)
+        if self.partition_cols is not None:
+            self.pq.write_to_dataset(table, self.path,
+                                     partition_cols=self.partition_cols,
+                                     compression=self.compression)
+        else:
+            if self.writer is None:
+                self.writer = self.pq.ParquetWriter(
+                    self.path, table.schema, compression=self.compression)
+            self.writer.write_table(table)
+        self.n_rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _get_decay_chunks(ejecta_set, epochs, chunk_size):
+    epochs = np.atleast_1d(u.Quantity(epochs, u.day).value)
+    for start in range(0, len(ejecta_set), chunk_size):
+        chunk = ejecta_set[start:start + chunk_size]
+        mass_fractions = chunk.decay(epochs)
+        df = pd.DataFrame(mass_fractions.reshape(-1, len(chunk.isotopes)),
+                          columns=chunk.isotopes)
+        df.insert(0, 'epoch', np.tile(epochs, len(chunk)))
+        df.insert(0, 'model', np.repeat(np.asarray(chunk.index, dtype=str),
+                                        len(epochs)))
+        yield df
+
+
+def export_decay(ejecta, epochs, path, chunk_size=1024, partition_cols=None,
+                 compression='zstd'):
+    """
+    Export the decayed mass fractions of an `Ejecta` or `EjectaSet`
+
+    `Ejecta` are written with an epoch column and one column per isotope.
+    `EjectaSet` are written in long rows of (model, epoch) with one column
+    per isotope, sorted by model and epoch and streamed `chunk_size` models
+    per row group so that predicates on model and epoch can skip row groups.
+
+    Parameters
+    ----------
+
+    ejecta: ~tardisnuclear.Ejecta or ~tardisnuclear.EjectaSet
+
+    epochs: numpy or quantity array
+        (days if not a quantity)
+
+    path: ~str
+        parquet file or, with `partition_cols`, dataset directory
+
+    chunk_size: ~int
+        number of models per row group [default = 1024]
+
+    partition_cols: ~list of str
+        columns to partition the dataset directory by (e.g. 'model')
+        [default = None]
+
+    compression: ~str
+        parquet compression codec [default = 'zstd']
+
+    Returns
+    -------
+        : ~int
+        number of rows written
+    """
+    from tardisnuclear.ejecta import EjectaSet
+
+    if isinstance(ejecta, EjectaSet):
+        with ParquetStreamWriter(path, partition_cols=partition_cols,
+                                 compression=compression) as writer:
+            for df in _get_decay_chunks(ejecta, epochs, chunk_size):
+                writer.write(df)
+        return writer.n_rows
+
+    decayed = ejecta.decay(epochs)
+    decayed.index.name = 'epoch'
+    write_dataframe(decayed.reset_index(), path,
+                    partition_cols=partition_cols, compression=compression,
+                    index=False)
+    return len(decayed)
+
+
+def export_injected_energy(energy_injection, epochs, path, chunk_size=1024,
+                           partition_cols=None, compression='zstd'):
+    """
+    Export the injected energy per second (erg/s) of every isotope of an
+    energy injection model with an epoch column, streamed `chunk_size`
+    epochs per row group
+
+    Parameters
+    ----------
+
+    energy_injection: ~tardisnuclear.models.base.BaseEnergyInjection
+
+    epochs: ~numpy.ndarray
+        epochs in days
+
+    path: ~str
+        parquet file or, with `partition_cols`, dataset directory
+
+    chunk_size: ~int
+        number of epochs per row group [default = 1024]
+
+    partition_cols: ~list of str
+        columns to partition the dataset directory by (e.g. 'epoch')
+        [default = None]
+
+    compression: ~str
+        parquet compression codec [default = 'zstd']
+
+    Returns
+    -------
+        : ~int
+        number of rows written
+    """
+    epochs = np.atleast_1d(epochs)
+    with ParquetStreamWriter(path, partition_cols=partition_cols,
+                             compression=compression) as writer:
+        for start in range(0, len(epochs), chunk_size):
+            injected_energy = energy_injection.calculate_injected_energy_per_s(
+                epochs[start:start + chunk_size])
+            injected_energy.index.name = 'epoch'
+            writer.write(injected_energy.reset_index())
+    return writer.n_rows
+
+
+def export_posterior(result, path, chunk_size=100000, partition_cols=None,
+                     compression='zstd'):
+    """
+    Export the posterior samples of a MultiNest result, streamed
+    `chunk_size` samples per row group
+
+    Parameters
+    ----------
+
+    result: ~tardisnuclear.multinest.fitting.MultiNestResult
+
+    path: ~str
+        parquet file or, with `partition_cols`, dataset directory
+
+    chunk_size: ~int
+        number of samples per row group [default = 100000]
+
+    partition_cols: ~list of str
+        columns to partition the dataset directory by [default = None]
+
+    compression: ~str
+        parquet compression codec [default = 'zstd']
+
+    Returns
+    -------
+        : ~int
+        number of rows written
+    """
+    posterior_data = result.posterior_data
+    with ParquetStreamWriter(path, partition_cols=partition_cols,
+                             compression=compression) as writer:
+        for start in range(0, len(posterior_data), chunk_size):
+            chunk = posterior_data.iloc[start:start + chunk_size]
+            chunk = chunk.rename_axis('sample').reset_index()
+            writer.write(chunk)
+    return writer.n_rows
@@ -16,7 +16,7 @@ from tardisnuclear.config import get_data_dir
 
 TARDISNUCLEAR_DATA_DIR = get_data_dir()
 
-from pyne import nucname
+from tardisnuclear.nuclides import get_nuc_name
 from abc import ABCMeta
 
 
@@ -94,8 +94,8 @@ def _get_nuclear_database_path():
 
 def _sanitize_nuclear_string(nuclear_string):
     try:
-        sanitized_nuclear_string = nucname.name(nuclear_string)
-    except RuntimeError:
+        sanitized_nuclear_string = get_nuc_name(nuclear_string)
+    except ValueError:
         raise ValueError('{0} not a valid isotope string'.format(
             nuclear_string))
     else:
@@ -184,13 +184,19 @@ def store_decay_radiation(nuclear_string, force_update=False):
 
 
 
-def get_decay_radiation(nuclear_string, data_set_idx=0):
+def get_decay_radiation(nuclear_string, data_set_idx=0, interactive=True):
     nuclear_string = _sanitize_nuclear_string(nuclear_string)
     fname = _get_nuclear_database_path()
 
+    def ask_download():
+        if not interactive:
+            raise IOError('{0} not in database {1}'.format(nuclear_string,
+                                                          fname))
+        return not input('{0} not in database - download [Y/n]'.format(
+            nuclear_string)).lower() == 'n'
+
     if not os.path.exists(fname):
-        if (not input('{0} not in database - download [Y/n]'.format(
-                nuclear_string)).lower() == 'n'):
+        if ask_download():
             store_decay_radiation(nuclear_string)
         else:
             raise ValueError('{0} not in database'.format(
@@ -207,9 +213,7 @@ def get_decay_radiation(nuclear_string, data_set_idx=0):
                     nuclear_string))
                 return {}
             else:
-                if (not input(
-                        '{0} not in database - download [Y/n]'.format(
-                            nuclear_string)).lower() == 'n'):
+                if ask_download():
                     ds.close()
                     store_decay_radiation(nuclear_string)
                 else:
@@ -233,18 +237,37 @@ class BaseParser(metaclass=ABCMeta):
         return df
 
     @staticmethod
-    def _sanititze_table(df):
+    def _split_uncertainty(value_string):
+        """
+        Split an NNDC value with its uncertainty in units of the last
+        digits, e.g. '846.770 4' -> (846.770, 0.004) and
+        '99.9399 % 20' -> (99.9399, 0.0020)
+        """
+        tokens = value_string.replace('%', ' ').split()
+        value = float(tokens[0])
+        if len(tokens) < 2 or not tokens[1].isdigit():
+            return value, 0.0
+        mantissa, _, exponent = tokens[0].lower().partition('e')
+        decimals = len(mantissa.partition('.')[2])
+        return value, int(tokens[1]) * 10.0**(int(exponent or 0) - decimals)
+
+    @classmethod
+    def _sanititze_table(cls, df):
         df = df.dropna()
+        kev_to_erg = u.keV.to(u.erg)
         if 'energy' in df.columns:
-            df.energy = df.energy.apply(lambda x: u.Quantity(
-                float(x.split()[0]), u.keV).to(u.erg).value)
+            energy = df.energy.apply(cls._split_uncertainty)
+            df.energy = [value * kev_to_erg for value, _ in energy]
+            df['energy_uncert'] = [uncert * kev_to_erg for _, uncert in energy]
         if 'end_point_energy' in df.columns:
             df.end_point_energy = df.end_point_energy.apply(lambda x: u.Quantity(
                 float(x.split()[0]), u.keV).to(u.erg).value)
 
         if 'intensity' in df.columns:
-            df.intensity = df.intensity.apply(lambda x:
-                                              float(x.split('%')[0])/100.)
+            intensity = df.intensity.apply(cls._split_uncertainty)
+            df.intensity = [value / 100. for value, _ in intensity]
+            df['intensity_uncert'] = [uncert / 100.
+                                      for _, uncert in intensity]
 
         if 'dose' in df.columns:
             del df['dose']
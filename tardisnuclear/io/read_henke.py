@@ -1,7 +1,23 @@
+import os
+import glob
+import logging
+from io import StringIO
+
+import numpy as np
+import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
+from astropy import units as u, constants as const
+
+logger = logging.getLogger(__name__)
+
 base_url = 'http://henke.lbl.gov/cgi-bin/pert_cgi.pl'
+scattering_factor_url = 'http://henke.lbl.gov/optical_constants/sf/{0}.nff'
+
+classical_electron_radius = const.a0.cgs.value * const.alpha.value**2
+hc_ev_cm = (const.h * const.c).to(u.eV * u.cm).value
+avogadro = const.N_A.value
 
 
 def get_photo_absorption_cross_section(element_code, energy):
@@ -13,3 +29,187 @@ def get_photo_absorption_cross_section(element_code, energy):
             return float(item.text.split(':')[1].strip().replace('cm^2/g', ''))
 
 
+def _get_henke_database_path():
+    from tardisnuclear.config import get_data_dir
+    return os.path.join(get_data_dir(), 'henke.h5')
+
+
+def _get_element_atomic_mass(element_code):
+    from pyne import data, nucname
+    return data.atomic_mass(nucname.id(element_code))
+
+
+def read_scattering_factor_table(fname_or_buffer):
+    """
+    Read a Henke atomic scattering factor table (.nff)
+
+    Parameters
+    ----------
+    fname_or_buffer: ~str or file-like
+
+    Returns
+    -------
+        : pandas.DataFrame
+        with columns energy (eV), f1 and f2
+    """
+    table = pd.read_csv(fname_or_buffer, sep=r'\s+', skiprows=1,
+                        names=['energy', 'f1', 'f2'])
+    return table[table.f2 > 0].reset_index(drop=True)
+
+
+def download_scattering_factor_table(element_code):
+    data_url = scattering_factor_url.format(element_code.lower())
+    logger.info('Downloading data from {0}'.format(data_url))
+    response = requests.get(data_url)
+    response.raise_for_status()
+    return read_scattering_factor_table(StringIO(response.text))
+
+
+def store_henke_tables(element_codes=None, source_dir=None,
+                       force_update=False):
+    """
+    Ingest Henke scattering factor tables into the local HDF5 store. The
+    tables are either read from a directory of .nff files (e.g. the
+    unpacked archive from henke.lbl.gov) or downloaded per element.
+
+    Parameters
+    ----------
+    element_codes: ~list of str
+        elements to ingest, e.g. ['Fe', 'Co', 'Ni']; all .nff files in
+        `source_dir` if None [default = None]
+
+    source_dir: ~str
+        directory with .nff files; tables are downloaded if None
+        [default = None]
+
+    force_update: ~bool
+        overwrite existing tables [default = False]
+    """
+    if element_codes is None:
+        if source_dir is None:
+            raise ValueError('Either element_codes or source_dir is required')
+        element_codes = [os.path.splitext(os.path.basename(fname))[0]
+                         for fname in glob.glob(os.path.join(source_dir,
+                                                             '*.nff'))]
+
+    fname = _get_henke_database_path()
+    with pd.HDFStore(fname, mode='a') as ds:
+        atomic_masses = ds['atomic_masses'] if 'atomic_masses' in ds else (
+            pd.Series(dtype=np.float64))
+        for element_code in element_codes:
+            element_code = element_code.title()
+            if element_code in atomic_masses.index and not force_update:
+                logger.debug('{0} is already in the database'.format(
+                    element_code))
+                continue
+            if source_dir is None:
+                table = download_scattering_factor_table(element_code)
+            else:
+                table = read_scattering_factor_table(os.path.join(
+                    source_dir, '{0}.nff'.format(element_code.lower())))
+            ds[element_code] = table
+            atomic_masses[element_code] = _get_element_atomic_mass(
+                element_code)
+        ds['atomic_masses'] = atomic_masses
+
+
+class HenkeCrossSections(object):
+    """
+    Photoabsorption cross sections from tabulated Henke scattering factors.
+    All tables are held as one contiguous array in log-log space and are
+    interpolated vectorized over elements and energies.
+
+    Parameters
+    ----------
+
+    tables: ~dict
+        element code to pandas.DataFrame with columns energy (eV) and f2
+
+    atomic_masses: ~dict
+        element code to atomic mass in u
+    """
+
+    @classmethod
+    def from_hdf5(cls, fname=None):
+        """
+        Read all tables from the local HDF5 store (see `store_henke_tables`)
+        """
+        if fname is None:
+            fname = _get_henke_database_path()
+        with pd.HDFStore(fname, mode='r') as ds:
+            atomic_masses = ds['atomic_masses']
+            tables = {element_code: ds[element_code]
+                      for element_code in atomic_masses.index}
+        return cls(tables, atomic_masses.to_dict())
+
+    def __init__(self, tables, atomic_masses):
+        self.element_codes = sorted(tables)
+        self.element_idx = {element_code: i for i, element_code in
+                            enumerate(self.element_codes)}
+
+        log_energies = []
+        log_cross_sections = []
+        for element_code in self.element_codes:
+            table = tables[element_code]
+            energy = table.energy.values.astype(np.float64)
+            # sigma_a = 2 r_e lambda f2 per atom - converted to cm^2/g
+            cross_section = (2 * classical_electron_radius *
+                             (hc_ev_cm / energy) * table.f2.values *
+                             avogadro / atomic_masses[element_code])
+            log_energies.append(np.log(energy))
+            log_cross_sections.append(np.log(cross_section))
+
+        self.offsets = np.cumsum([0] + [len(item) for item in log_energies])
+        self.log_energy = np.concatenate(log_energies)
+        self.log_cross_section = np.concatenate(log_cross_sections)
+
+    def _get_element_idx(self, element_codes):
+        try:
+            return np.array([self.element_idx[element_code.title()]
+                             for element_code in element_codes])
+        except KeyError as e:
+            raise ValueError('Element {0} not in the Henke database'.format(
+                e.args[0]))
+
+    def get_cross_section(self, element_codes, energies, fill_value=0.0):
+        """
+        Photoabsorption cross sections by log-log interpolation
+
+        Parameters
+        ----------
+
+        element_codes: ~str or list of str
+            element symbols broadcast against `energies`
+
+        energies: ~numpy.ndarray or astropy.Quantity
+            photon energies (eV if not a Quantity)
+
+        fill_value: ~float
+            value outside of the tabulated energy range [default = 0.0]
+
+        Returns
+        -------
+            : numpy.ndarray
+            cross sections in cm^2/g
+        """
+        energies = u.Quantity(energies, u.eV).value
+        element_idx = self._get_element_idx(
+            np.atleast_1d(element_codes).ravel()).reshape(
+            np.shape(element_codes))
+        element_idx, log_energy = np.broadcast_arrays(
+            element_idx, np.log(energies))
+        shape = element_idx.shape
+        element_idx, log_energy = element_idx.ravel(), log_energy.ravel()
+
+        cross_section = np.empty(element_idx.shape)
+        for idx in np.unique(element_idx):
+            mask = np.flatnonzero(element_idx == idx)
+            start, stop = self.offsets[idx], self.offsets[idx + 1]
+            cross_section[mask] = np.exp(np.interp(
+                log_energy[mask], self.log_energy[start:stop],
+                self.log_cross_section[start:stop]))
+            outside = ((log_energy[mask] < self.log_energy[start]) |
+                       (log_energy[mask] > self.log_energy[stop - 1]))
+            cross_section[mask[outside]] = fill_value
+        cross_section = cross_section.reshape(shape)
+        return cross_section
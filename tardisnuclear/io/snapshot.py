@@ -0,0 +1,260 @@
+import os
+import json
+import hashlib
+import logging
+import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+MANIFEST_FNAME = 'manifest.json'
+
+# snapshots (path, snapshot_id) whose checksums were verified in this process
+_verified_snapshots = set()
+
+
+def _get_file_sha256(fname, block_size=2**20):
+    sha256 = hashlib.sha256()
+    with open(fname, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _get_snapshot_id(files):
+    return hashlib.sha256(''.join(
+        '{0}:{1};'.format(name, files[name]['sha256'])
+        for name in sorted(files)).encode('ascii')).hexdigest()
+
+
+def _collect_channel_arrays(decay_radiation_list):
+    """
+    Concatenate the decay radiation tables of all isotopes per channel into
+    one array per column with offsets per isotope
+    """
+    channels = sorted(set().union(*[decay_radiation.keys() for
+                                    decay_radiation in decay_radiation_list]))
+    arrays = {}
+    for channel in channels:
+        tables = [decay_radiation.get(channel, None)
+                  for decay_radiation in decay_radiation_list]
+        lengths = [0 if table is None else len(table) for table in tables]
+        columns = []
+        for table in tables:
+            if table is not None:
+                columns += [column for column in table.columns
+                            if column not in columns and
+                            column != 'energy_per_decay']
+        arrays['{0}.offsets'.format(channel)] = np.concatenate(
+            ([0], np.cumsum(lengths))).astype(np.int64)
+        for column in columns:
+            # tables from older databases have no uncertainty columns
+            values = np.concatenate([
+                np.asarray(table[column].values) if column in table.columns
+                else np.zeros(len(table))
+                for table in tables
+                if table is not None and len(table) > 0] or [np.zeros(0)])
+            if values.dtype.kind in 'fiub':
+                values = values.astype(np.float64)
+            else:
+                values = values.astype(str)
+            arrays['{0}.{1}'.format(channel, column)] = values
+    return arrays
+
+
+def build_snapshot(path, nuclides, version=None):
+    """
+    Build a nuclear data snapshot of the nuclides and all their decay
+    children from the local decay radiation database (nothing is
+    downloaded).
+
+    The snapshot is a directory of .npy files - the nuclear constants and
+    decay branches (see `NuclearConstants.get_arrays`), the decay matrix
+    and the concatenated decay radiation tables - with a manifest.json that
+    records the version and the sha256 of every file.
+
+    Parameters
+    ----------
+
+    path: ~str
+        snapshot directory
+
+    nuclides: ~list of str
+        nuclide names or ids
+
+    version: ~str
+        version label of the snapshot [default = None uses the date]
+
+    Returns
+    -------
+        : ~dict
+        manifest
+    """
+    from tardisnuclear.decay_chain import get_decay_chain
+    from tardisnuclear.io.nndc.base import get_decay_radiation
+
+    decay_chain = get_decay_chain(nuclides)
+    decay_radiation_list = [get_decay_radiation(isotope, interactive=False)
+                            for isotope in decay_chain.isotopes]
+
+    arrays = decay_chain.nuclear_constants.get_arrays()
+    arrays.update({'isotopes': np.array(decay_chain.isotopes, dtype=str),
+                   'decay_matrix': decay_chain.decay_matrix})
+    arrays.update(_collect_channel_arrays(decay_radiation_list))
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+    files = {}
+    for name, array in sorted(arrays.items()):
+        fname = os.path.join(path, name + '.npy')
+        np.save(fname, array, allow_pickle=False)
+        files[name] = {'sha256': _get_file_sha256(fname),
+                       'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    created = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    manifest = {'format_version': SNAPSHOT_FORMAT_VERSION,
+                'version': version if version is not None else created[:10],
+                'created': created,
+                'isotopes': decay_chain.isotopes,
+                'snapshot_id': _get_snapshot_id(files),
+                'files': files}
+    with open(os.path.join(path, MANIFEST_FNAME), 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+    logger.info('Built nuclear data snapshot {0} ({1} isotopes) in '
+                '{2}'.format(manifest['version'], len(decay_chain), path))
+    return manifest
+
+
+class NuclearDataSnapshot(object):
+    """
+    Read-only, memory-mapped nuclear data snapshot (see `build_snapshot`).
+
+    The checksums of the files are verified once per process on the first
+    load; all arrays are then memory-mapped so that many processes on a
+    node share the same pages. The decay radiation tables wrap views of the
+    memory-mapped arrays (only text columns are copied).
+
+    Parameters
+    ----------
+
+    path: ~str
+        snapshot directory
+
+    verify: ~bool
+        verify the sha256 checksums [default = True]
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = os.path.abspath(path)
+        with open(os.path.join(self.path, MANIFEST_FNAME)) as fh:
+            self.manifest = json.load(fh)
+        if self.manifest['format_version'] != SNAPSHOT_FORMAT_VERSION:
+            raise IOError('Snapshot format version {0} is not supported '
+                          '(expected {1})'.format(
+                self.manifest['format_version'], SNAPSHOT_FORMAT_VERSION))
+        if verify:
+            self.verify()
+        self.arrays = {name: np.load(os.path.join(self.path, name + '.npy'),
+                                     mmap_mode='r', allow_pickle=False)
+                       for name in self.manifest['files']}
+        self.isotopes = list(self.manifest['isotopes'])
+        self.channels = sorted(name.split('.')[0] for name in self.arrays
+                               if name.endswith('.offsets'))
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    def verify(self):
+        """
+        Verify the checksums of all files (once per process)
+        """
+        key = (self.path, self.manifest['snapshot_id'])
+        if key in _verified_snapshots:
+            return
+        files = self.manifest['files']
+        if _get_snapshot_id(files) != self.manifest['snapshot_id']:
+            raise IOError('Snapshot manifest {0} is corrupt'.format(
+                self.path))
+        for name, file_info in files.items():
+            sha256 = _get_file_sha256(os.path.join(self.path, name + '.npy'))
+            if sha256 != file_info['sha256']:
+                raise IOError('Checksum mismatch for {0} in snapshot '
+                              '{1}'.format(name, self.path))
+        _verified_snapshots.add(key)
+
+    def __getitem__(self, item):
+        return self.arrays[item]
+
+    def get_decay_radiation(self, isotope):
+        """
+        Decay radiation tables of an isotope in the format of
+        `tardisnuclear.io.get_decay_radiation`
+
+        Returns
+        -------
+            : ~dict
+            channel name to ~pd.DataFrame
+        """
+        isotope_idx = self.isotopes.index(isotope)
+        decay_radiation = {}
+        for channel in self.channels:
+            offsets = self.arrays['{0}.offsets'.format(channel)]
+            start, stop = offsets[isotope_idx], offsets[isotope_idx + 1]
+            if start == stop:
+                continue
+            prefix = channel + '.'
+            decay_radiation[channel] = pd.DataFrame(
+                {name[len(prefix):]: array[start:stop]
+                 for name, array in self.arrays.items()
+                 if name.startswith(prefix) and name != prefix + 'offsets'},
+                copy=False)
+        return decay_radiation
+
+    def get_nuclear_constants(self):
+        """
+        Nuclear constants table of all nuclides of the snapshot over the
+        memory-mapped arrays
+
+        Returns
+        -------
+            : ~tardisnuclear.nuclear_constants.NuclearConstants
+        """
+        from tardisnuclear.nuclear_constants import NuclearConstants
+        return NuclearConstants.from_arrays(self.arrays)
+
+    def install(self):
+        """
+        Install the nuclear constants and decay branches of all nuclides for
+        `get_nuclear_constants`, `get_decay_children` and `get_decay_chain`
+        and put the decay radiation of all isotopes into the cache of
+        `tardisnuclear.nuclear_data.DecayRadiation`, so that nothing in the
+        snapshot is read from pyne or the NNDC database. The snapshot id
+        becomes the nuclear data version of the decay cache keys.
+        """
+        from tardisnuclear.nuclear_data import DecayRadiation
+        from tardisnuclear.nuclear_constants import set_installed_snapshot_id
+        self.get_nuclear_constants().install()
+        set_installed_snapshot_id(self.manifest['snapshot_id'])
+        DecayRadiation.add_to_cache({isotope: self.get_decay_radiation(isotope)
+                                     for isotope in self.isotopes})
+
+    def __repr__(self):
+        return '<NuclearDataSnapshot {0} ({1} isotopes) at {2}>'.format(
+            self.version, len(self.isotopes), self.path)
+
+
+def load_snapshot(path, verify=True):
+    """
+    Load a nuclear data snapshot and install it for `DecayRadiation`
+
+    Returns
+    -------
+        : ~NuclearDataSnapshot
+    """
+    snapshot = NuclearDataSnapshot(path, verify=verify)
+    snapshot.install()
+    return snapshot
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tardisnuclear.ejecta import EjectaSet
+from tardisnuclear.io.export import (export_decay, export_injected_energy,
+                                     export_posterior)
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+pytest.importorskip('pyarrow')
+
+epochs = np.linspace(5, 300, 7)
+
+
+class PosteriorResult(object):
+    # export_posterior only reads the posterior samples of a MultiNestResult
+    def __init__(self, posterior_data):
+        self.posterior_data = posterior_data
+
+
+@pytest.mark.parametrize('partition_cols', [None, ['model']])
+def test_export_decay_round_trip(tmpdir, partition_cols):
+    masses = pd.DataFrame({'Ni56': [0.6, 0.3, 0.1], 'Ni57': [0.02, 0.0, 0.01]},
+                          index=['a', 'b', 'c'])
+    ejecta_set = EjectaSet.from_masses(masses)
+    path = str(tmpdir.join('decay.parquet'))
+    n_rows = export_decay(ejecta_set, epochs, path, chunk_size=2,
+                          partition_cols=partition_cols)
+    assert n_rows == len(masses) * len(epochs)
+
+    df = pd.read_parquet(path)
+    df['model'] = df['model'].astype(str)
+    df = df.sort_values(['model', 'epoch']).reset_index(drop=True)
+    assert len(df) == n_rows
+    np.testing.assert_allclose(
+        df[ejecta_set.isotopes].values,
+        ejecta_set.decay(epochs).reshape(-1, len(ejecta_set.isotopes)))
+
+
+@pytest.mark.parametrize('partition_cols', [None, ['epoch']])
+def test_export_injected_energy_round_trip(tmpdir, partition_cols):
+    add_decay_radiation()
+    model = make_energy_injection_model(Ni56=0.6)
+    path = str(tmpdir.join('energy.parquet'))
+    n_rows = export_injected_energy(model, epochs, path, chunk_size=3,
+                                    partition_cols=partition_cols)
+    assert n_rows == len(epochs)
+
+    df = pd.read_parquet(path)
+    df['epoch'] = df['epoch'].astype(np.float64)
+    df = df.sort_values('epoch').set_index('epoch')
+    injected_energy = model.calculate_injected_energy_per_s(epochs)
+    np.testing.assert_allclose(df.index.values, epochs)
+    np.testing.assert_allclose(df[injected_energy.columns].values,
+                               injected_energy.values)
+
+
+def test_export_posterior_round_trip(tmpdir):
+    posterior_data = pd.DataFrame(
+        {'posterior': np.full(10, 0.1), 'x': np.arange(10.0),
+         'ni56': np.linspace(0.1, 1, 10), 'run': np.arange(10) % 2})
+    result = PosteriorResult(posterior_data)
+    path = str(tmpdir.join('posterior'))
+    assert export_posterior(result, path, chunk_size=4,
+                            partition_cols=['run']) == 10
+
+    df = pd.read_parquet(path)
+    df = df.sort_values('sample').reset_index(drop=True)
+    np.testing.assert_array_equal(df['sample'].values, np.arange(10))
+    np.testing.assert_allclose(df['ni56'].values, posterior_data['ni56'].values)
+    np.testing.assert_array_equal(df['run'].astype(int).values,
+                                  posterior_data['run'].values)
@@ -1,4 +1,53 @@
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from astropy import units as u
+
+from tardisnuclear.io.read_henke import (HenkeCrossSections,
+                                         read_scattering_factor_table)
 
 
 def test_henke_fe():
-    pass
+    # excerpt in the .nff layout around the Fe K edge at 7112 eV
+    nff = StringIO('E(eV)\tf1\tf2\n'
+                   '1000.0\t21.3\t9.06\n'
+                   '7000.0\t23.9\t0.494\n'
+                   '7200.0\t21.2\t3.91\n'
+                   '10000.0\t25.9\t2.27\n'
+                   '30000.0\t26.1\t0.0\n')
+    table = read_scattering_factor_table(nff)
+    assert list(table.energy) == [1000., 7000., 7200., 10000.]
+    henke = HenkeCrossSections({'Fe': table}, {'Fe': 55.845})
+
+    # sigma = 2 r_e (h c / E) f2 N_A / A with r_e = 2.8179403262e-13 cm,
+    # h c = 1.239841984e-4 eV cm and N_A = 6.02214076e23 / mol
+    energy = np.array([1000., 7200.])
+    expected = (2 * 2.8179403262e-13 * 1.239841984e-4 / energy *
+                np.array([9.06, 3.91]) * 6.02214076e23 / 55.845)
+    np.testing.assert_allclose(henke.get_cross_section('Fe', energy),
+                               expected, rtol=1e-8)
+    np.testing.assert_allclose(
+        henke.get_cross_section('Fe', 7.2 * u.keV), expected[1], rtol=1e-8)
+    # the K edge raises the absorption across it
+    below, above = henke.get_cross_section('Fe', [7000., 7200.])
+    assert above > 7 * below
+
+
+def test_henke_cross_section_interpolation():
+    table = pd.DataFrame({'energy': [10., 100., 1000., 10000.],
+                          'f2': [1., 2., 1., 0.1]})
+    henke = HenkeCrossSections({'Fe': table, 'Ni': table},
+                               {'Fe': 55.845, 'Ni': 58.693})
+
+    tabulated = henke.get_cross_section('Fe', table.energy.values)
+    # log-log interpolation between tabulated points is exact for power laws
+    mid = henke.get_cross_section('fe', np.sqrt(100. * 1000.))
+    np.testing.assert_allclose(mid, np.sqrt(tabulated[1] * tabulated[2]))
+
+    mixed = henke.get_cross_section(['Fe', 'Ni'], [1000., 1000.])
+    np.testing.assert_allclose(mixed[0] / mixed[1], 58.693 / 55.845)
+
+    outside = henke.get_cross_section('Fe', [1., 1e5])
+    np.testing.assert_array_equal(outside, 0.0)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from tardisnuclear import decay_chain, nuclear_constants, nuclear_data
+from tardisnuclear.decay_chain import get_decay_chain
+from tardisnuclear.io import snapshot
+from tardisnuclear.io.snapshot import NuclearDataSnapshot, build_snapshot
+from tardisnuclear.nuclear_constants import get_nuclear_constants
+from tardisnuclear.tests.helpers import make_decay_radiation
+
+constant_names = ['decay_constants', 'half_lives', 'half_life_uncertainties',
+                  'atomic_masses']
+
+
+@pytest.fixture
+def snapshot_path(tmpdir, monkeypatch):
+    # the caches are filled by install - restore them after every test
+    for module, name in [(nuclear_constants, '_decay_children_cache'),
+                         (nuclear_constants, '_nuclide_constants_cache'),
+                         (nuclear_constants, '_nuclear_constants_cache'),
+                         (decay_chain, '_decay_chain_cache'),
+                         (nuclear_data, '_decay_radiation_cache')]:
+        monkeypatch.setattr(module, name, {})
+    monkeypatch.setattr(snapshot, '_verified_snapshots', set())
+
+    decay_radiation = make_decay_radiation()
+    monkeypatch.setattr(
+        'tardisnuclear.io.nndc.base.get_decay_radiation',
+        lambda isotope, interactive=True: decay_radiation[isotope])
+    path = str(tmpdir.join('snapshot'))
+    build_snapshot(path, ['Ni56'], version='test')
+    return path
+
+
+def test_snapshot_round_trip(snapshot_path, monkeypatch):
+    live_chain = get_decay_chain(['Ni56'])
+    live_constants = live_chain.nuclear_constants
+
+    nuclear_data_snapshot = NuclearDataSnapshot(snapshot_path)
+    assert nuclear_data_snapshot.isotopes == ['Fe56', 'Co56', 'Ni56']
+    nuclear_data_snapshot.install()
+
+    # nothing may be read from pyne after the installation
+    monkeypatch.setattr(nuclear_constants, 'data', None)
+    installed_constants = get_nuclear_constants(live_constants.nuc_ids)
+    assert installed_constants is not live_constants
+    for name in constant_names:
+        array = getattr(installed_constants, name)
+        np.testing.assert_array_equal(array, getattr(live_constants, name))
+        assert np.shares_memory(array, nuclear_data_snapshot[name])
+    assert installed_constants.decay_children == live_constants.decay_children
+
+    installed_chain = get_decay_chain(['Ni56'])
+    assert installed_chain.nuclear_constants is installed_constants
+    np.testing.assert_array_equal(installed_chain.decay_matrix,
+                                  live_chain.decay_matrix)
+    # sub-chains are built from the installed constants as well
+    assert get_decay_chain(['Co56']).isotopes == ['Fe56', 'Co56']
+
+    for isotope, tables in make_decay_radiation().items():
+        cached_tables = nuclear_data._decay_radiation_cache[isotope]
+        for channel, table in tables.items():
+            cached_table = cached_tables[channel]
+            for column in ('energy', 'intensity', 'energy_uncert'):
+                np.testing.assert_array_equal(cached_table[column].values,
+                                              table[column].values)
+            assert np.shares_memory(
+                cached_table['energy'].values,
+                nuclear_data_snapshot['{0}.energy'.format(channel)])
+
+
+def test_snapshot_checksum(snapshot_path):
+    fname = '{0}/decay_constants.npy'.format(snapshot_path)
+    array = np.load(fname)
+    array[-1] *= 2
+    np.save(fname, array)
+    with pytest.raises(IOError):
+        NuclearDataSnapshot(snapshot_path)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tardisnuclear.io.yields import (read_yann_file, read_yield_directory,
+                                     read_yield_grid,
+                                     _normalize_isotope_columns)
+
+
+def write_yield_directory(tmpdir):
+    tmpdir.join('model_a.dat').write('ni56 0.5\nNi56 0.1\nco55 0.01\n')
+    tmpdir.join('model_b.dat').write('Ni56 0.3\nti44 1e-5\nni57 0.02\n')
+    tmpdir.mkdir('subdir')
+    return str(tmpdir)
+
+
+def test_read_yann_file(tmpdir):
+    write_yield_directory(tmpdir)
+    masses = read_yann_file(tmpdir.join('model_b.dat').strpath)
+    assert masses['Ni56'] == 0.3
+    assert masses['ti44'] == 1e-5
+
+
+def test_normalize_isotope_columns():
+    yields = pd.DataFrame([[0.5, 0.1, 0.01], [0.3, 0.0, 0.0]],
+                          index=['a', 'b'], columns=['ni56', 'Ni56', 'co55'])
+    yields = _normalize_isotope_columns(yields)
+    # sorted in nuclide id order with the duplicates summed
+    assert list(yields.columns) == ['Co55', 'Ni56']
+    np.testing.assert_allclose(yields.Ni56, [0.6, 0.3])
+    np.testing.assert_allclose(yields.Co55, [0.01, 0.0])
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_read_yield_directory(tmpdir, processes):
+    path = write_yield_directory(tmpdir)
+    yields = read_yield_directory(path, processes=processes)
+    assert list(yields.index) == ['model_a.dat', 'model_b.dat']
+    assert list(yields.columns) == ['Ti44', 'Co55', 'Ni56', 'Ni57']
+    np.testing.assert_allclose(yields.loc['model_a.dat'],
+                               [0.0, 0.01, 0.6, 0.0])
+    np.testing.assert_allclose(yields.loc['model_b.dat'],
+                               [1e-5, 0.0, 0.3, 0.02])
+
+
+def test_read_yield_directory_pattern(tmpdir):
+    path = write_yield_directory(tmpdir)
+    yields = read_yield_directory(path, pattern='*_b.dat', processes=1)
+    assert list(yields.index) == ['model_b.dat']
+    with pytest.raises(IOError):
+        read_yield_directory(path, pattern='*.yields', processes=1)
+
+
+def test_read_yield_grid(tmpdir):
+    fname = tmpdir.join('grid.dat')
+    fname.write('m2 Ni56 0.3\nm1 ni56 0.5\nm1 Ni56 0.1\nm1 co55 0.01\n'
+                'm2 ni57 0.02\n')
+    yields = read_yield_grid(fname.strpath)
+    # models stay in file order
+    assert list(yields.index) == ['m2', 'm1']
+    assert list(yields.columns) == ['Co55', 'Ni56', 'Ni57']
+    np.testing.assert_allclose(yields.loc['m1'], [0.01, 0.6, 0.0])
+    np.testing.assert_allclose(yields.loc['m2'], [0.0, 0.3, 0.02])
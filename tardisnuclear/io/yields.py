@@ -0,0 +1,107 @@
+import os
+import glob
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from tardisnuclear.nuclides import get_nuc_id, get_nuc_name
+
+
+def read_yann_file(fname):
+    """
+    Read a single nucleosynthesis yield file with whitespace separated
+    isotope and mass (solar masses) columns
+
+    Parameters
+    ----------
+
+    fname: ~str
+
+    Returns
+    -------
+        : ~pd.Series
+        masses indexed by isotope
+    """
+    data = pd.read_csv(fname, sep=r'\s+', header=None,
+                       names=['isotope', 'mass'],
+                       dtype={'isotope': str, 'mass': np.float64})
+    return data.groupby('isotope').mass.sum()
+
+
+def _normalize_isotope_columns(yields):
+    """
+    Normalize the isotope names (e.g. ni56 -> Ni56) and sort the columns in
+    nuclide id order
+    """
+    yields = yields.rename(columns={isotope: get_nuc_name(isotope)
+                                    for isotope in yields.columns})
+    yields = yields.T.groupby(level=0).sum().T
+    yields.columns.name = None
+    return yields[sorted(yields.columns, key=get_nuc_id)]
+
+
+def read_yield_directory(path, pattern='*', processes=None):
+    """
+    Read a directory of yield files (see `read_yann_file`) into one
+    composition matrix with a shared isotope index. The files are read in
+    parallel.
+
+    Parameters
+    ----------
+
+    path: ~str
+        directory with the yield files
+
+    pattern: ~str
+        glob pattern for the yield files [default = '*']
+
+    processes: ~int
+        number of worker processes; `None` uses all cores and 1 reads in
+        this process [default = None]
+
+    Returns
+    -------
+        : ~pd.DataFrame
+        masses in solar masses of shape (n_models, n_isotopes) indexed by
+        file name; isotopes missing from a model have zero mass
+    """
+    fnames = sorted(fname for fname in glob.glob(os.path.join(path, pattern))
+                    if os.path.isfile(fname))
+    if len(fnames) == 0:
+        raise IOError('No yield files matching {0} in {1}'.format(pattern,
+                                                                  path))
+    if processes == 1:
+        yield_list = [read_yann_file(fname) for fname in fnames]
+    else:
+        with Pool(processes) as pool:
+            yield_list = pool.map(read_yann_file, fnames)
+
+    yields = pd.DataFrame(yield_list,
+                          index=[os.path.basename(fname) for fname in fnames])
+    return _normalize_isotope_columns(yields.fillna(0.0))
+
+
+def read_yield_grid(fname):
+    """
+    Read a concatenated yield grid with whitespace separated model, isotope
+    and mass (solar masses) columns
+
+    Parameters
+    ----------
+
+    fname: ~str
+
+    Returns
+    -------
+        : ~pd.DataFrame
+        masses in solar masses of shape (n_models, n_isotopes) indexed by
+        model; isotopes missing from a model have zero mass
+    """
+    data = pd.read_csv(fname, sep=r'\s+', header=None,
+                       names=['model', 'isotope', 'mass'],
+                       dtype={'model': str, 'isotope': str,
+                              'mass': np.float64})
+    yields = data.pivot_table(index='model', columns='isotope', values='mass',
+                              aggfunc='sum', fill_value=0.0, sort=False)
+    return _normalize_isotope_columns(yields)
@@ -1,13 +1,25 @@
+import logging
+from collections import OrderedDict
+
 import numpy as np
+from scipy import optimize
 
 from astropy.modeling import FittableModel, Parameter
 from astropy import units as u
-from pyne import nucname
 import pandas as pd
 
+from tardisnuclear.nuclides import get_nuc_name, is_nuclide
 from tardisnuclear.ejecta import Ejecta, msun_to_cgs
+from tardisnuclear.decay_chain import get_decay_chain, day_to_s
+
+from tardisnuclear.nuclear_data import (DecayRadiation, energy_channels,
+                                        lepton_channels, em_channels)
+from tardisnuclear.models.emulator import LightCurveEmulator
+from tardisnuclear.models.integration import (integrate_adaptive,
+                                              integrate_exponentials)
+from tardisnuclear.deposition import GammaRayDeposition
 
-from tardisnuclear.nuclear_data import DecayRadiation
+logger = logging.getLogger(__name__)
 
 mpc_to_cm = u.Mpc.to(u.cm)
 
@@ -17,33 +29,75 @@ class BaseEnergyInjection(FittableModel):
 
     standard_broadcasting = False
 
+    energy_channels = energy_channels
+
+    # number of epoch grids whose unit light curves are cached
+    max_cached_unit_light_curves = 32
+
     def __init__(self, cutoff_em_energy, **kwargs):
         super(BaseEnergyInjection, self).__init__(**kwargs)
 
         self._init_ejecta(kwargs)
-        decay_constant = self.ejecta.get_decay_constant()
-
-        self.decay_constant = pd.DataFrame(data=[decay_constant.values()],
-                                           columns=decay_constant.keys())
+        nuclear_constants = self.ejecta.nuclear_constants
+        self.decay_constant = pd.DataFrame(
+            data=[nuclear_constants.decay_constants],
+            columns=nuclear_constants.isotopes)
         self.decay_radiation = DecayRadiation(
             self.ejecta.get_all_children_nuc_name())
 
-        self.em_energy_per_decay = self._get_em_energy_per_decay(
-            cutoff_energy=cutoff_em_energy)
+        self.cutoff_em_energy = u.Quantity(cutoff_em_energy, u.eV)
+        self.channel_energy_per_decay = self._get_channel_energy_per_decay(
+            cutoff_energy=self.cutoff_em_energy)
+        self.em_energy_per_decay = self._get_em_energy_per_decay()
         self.lepton_energy_per_decay = self._get_lepton_energy_per_decay()
+        self._unit_light_curves = OrderedDict()
+        self.emulator = None
 
 
     def _init_ejecta(self, isotope_dict):
-        titled_isotope_dict = {name.title() : value * u.Msun
+        titled_isotope_dict = {get_nuc_name(name) : value * u.Msun
                                for name, value in isotope_dict.items()}
-        self.ejecta = Ejecta.from_masses(**titled_isotope_dict)
+        self._ejecta = Ejecta.from_masses(**titled_isotope_dict)
+        self._ejecta_parameters = self.parameters.copy()
+
+    @property
+    def ejecta(self):
+        """
+        Ejecta with the isotope masses of the current parameter values (it
+        is updated when the parameters changed, e.g. after a fit)
+        """
+        if not np.array_equal(self.parameters, self._ejecta_parameters):
+            self._update_ejecta(self.parameters)
+            self._ejecta_parameters = self.parameters.copy()
+        return self._ejecta
 
     def _update_ejecta(self, isotope_masses):
         assert len(isotope_masses) == len(self.param_names)
         total_mass = np.sum(isotope_masses)
-        self.ejecta.mass_g = total_mass * msun_to_cgs
+        self._ejecta.mass_g = total_mass * msun_to_cgs
+        if total_mass == 0:
+            return
         for isotope_name, isotope_mass in zip(self.param_names, isotope_masses):
-            self.ejecta[isotope_name.title()] = isotope_mass / total_mass
+            self._ejecta[get_nuc_name(isotope_name)] = (isotope_mass /
+                                                       total_mass)
+
+    def _get_channel_energy_per_decay(self, cutoff_energy=np.inf):
+        """
+        Get the energy per decay in each of the `energy_channels` for each of
+        the isotopes (see `DecayRadiation.get_channel_energy_per_decay`)
+
+        Parameters
+        ----------
+        cutoff_energy : float or astropy.Quantity
+            count photon energies up to this value [default = +inf]
+
+        Returns
+        -------
+            : pandas.DataFrame
+            of shape (n_channels, n_isotopes)
+        """
+        return self.decay_radiation.get_channel_energy_per_decay(
+            self.ejecta.isotopes, cutoff_em_energy=cutoff_energy)
 
     def _get_lepton_energy_per_decay(self):
         """
@@ -54,54 +108,68 @@ class BaseEnergyInjection(FittableModel):
             : pandas.DataFrame
 
         """
-        energies_per_decay = np.zeros(len(self.ejecta.isotopes))
-        for channel in ['beta_plus', 'beta_minus', 'electrons']:
-            energy_per_decay = []
-            for isotope in self.ejecta.isotopes:
-                decay_rad = self.decay_radiation[isotope].get(channel, None)
-                if decay_rad is None:
-                    energy_per_decay.append(0.0)
-                else:
-                    energy_per_decay.append(decay_rad.energy.sum())
-            energies_per_decay += energy_per_decay
-        data = [
-            self.decay_radiation[isotope].get(
-                'total_lepton_energy_per_decay', 0.0)
-            for isotope in self.ejecta.isotopes]
+        data = self.channel_energy_per_decay.loc[
+            list(lepton_channels)].sum(axis=0).values
+        return pd.DataFrame(data=[data], columns=self.ejecta.isotopes)
+
+    def _get_em_energy_per_decay(self):
+        """
+        Get the electromagnetic energy per decay (below the cutoff energy)
+        for each of the isotopes
+
+        Returns
+        -------
+            : pandas.DataFrame
+        """
+        data = self.channel_energy_per_decay.loc[
+            list(em_channels)].sum(axis=0).values
         return pd.DataFrame(data=[data], columns=self.ejecta.isotopes)
 
-    def _get_em_energy_per_decay(self, cutoff_energy=np.inf):
+    def calculate_channel_energy_per_s(self, time):
         """
-        Get the electromagnetic energy per decay for each of the isotopes
+        Luminosity in each of the `energy_channels`
 
         Parameters
         ----------
-        cutoff_energy : float or astropy.Quantity
-            count energies up to this value into the energy contribution
-            [default = +inf]
+        time : numpy.ndarray
+            epochs in days
 
         Returns
         -------
             : pandas.DataFrame
+            of shape (n_epochs, n_channels)
         """
-        cutoff_energy = u.Quantity(cutoff_energy, u.eV).to('erg').value
-        energies_per_decay = []
-        for isotope in self.ejecta.isotopes:
-            xray = self.decay_radiation[isotope].get('x_rays', None)
-            gammaray = self.decay_radiation[isotope].get('gamma_rays', None)
+        channel_energy_per_decay_rate = (self.channel_energy_per_decay.values *
+                                         self.decay_constant.values)
+        decayed_numbers = self.ejecta.get_decayed_numbers(time)
+        return pd.DataFrame(
+            decayed_numbers.values.dot(channel_energy_per_decay_rate.T),
+            index=decayed_numbers.index, columns=self.energy_channels)
+
+    def _calculate_single_channel_energy_per_s(self, channel, time):
+        energy_per_s = ((self.channel_energy_per_decay.loc[[channel]] *
+            self.decay_constant.values).values *
+                        self.ejecta.get_decayed_numbers(time))
+        return energy_per_s
+
+    def calculate_beta_minus_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('beta_minus', time)
+
+    def calculate_beta_plus_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('beta_plus', time)
+
+    def calculate_annihilation_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('annihilation',
+                                                           time)
 
-            if (xray is None) and (gammaray is None):
-                energies_per_decay.append(0)
-                continue
-            em_table = pd.concat([xray, gammaray]).sort_values('energy')
-            cutoff_energy_id = em_table.energy.searchsorted(cutoff_energy)
-            energies_per_decay.append(
-                (em_table.energy[:cutoff_energy_id] *
-                 em_table.intensity[:cutoff_energy_id]).sum())
+    def calculate_electron_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('electrons', time)
 
-        return pd.DataFrame(data=[energies_per_decay],
-                            columns=self.ejecta.isotopes)
+    def calculate_x_ray_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('x_rays', time)
 
+    def calculate_gamma_ray_energy_per_s(self, time):
+        return self._calculate_single_channel_energy_per_s('gamma_rays', time)
 
     def calculate_lepton_energy_per_s(self, time):
         energy_per_s = ((self.lepton_energy_per_decay *
@@ -114,15 +182,320 @@ class BaseEnergyInjection(FittableModel):
         return energy_per_s
 
 
+    def make_gamma_ray_deposition(self, velocity, **kwargs):
+        """
+        Make a gamma-ray deposition model for the lines of this decay chain
+        that follows the isotope masses of the current parameter values
+
+        Parameters
+        ----------
+        velocity : float or astropy.Quantity
+            characteristic ejecta velocity (km/s if float)
+        **kwargs :
+            passed to `GammaRayDeposition`
+
+        Returns
+        -------
+            : GammaRayDeposition
+        """
+        return GammaRayDeposition.from_energy_injection(self, velocity,
+                                                        **kwargs)
+
+    def calculate_deposited_em_energy_per_s(self, time, deposition):
+        energy_per_s = (
+            deposition.calculate_deposited_energy_per_decay(time) *
+            self.decay_constant.values * self.ejecta.get_decayed_numbers(time))
+        return energy_per_s
+
     def calculate_injected_energy_per_s(self, time):
-        energy_per_s = ((
-            (self.em_energy_per_decay + self.lepton_energy_per_decay) *
-            self.decay_constant).values * self.ejecta.get_decayed_numbers(time))
+        # the sum over the channels so that the channels add up to the total
+        energy_per_decay_rate = (
+            self.channel_energy_per_decay.values.sum(axis=0) *
+            self.decay_constant.values)
+        energy_per_s = (energy_per_decay_rate *
+                        self.ejecta.get_decayed_numbers(time))
         return energy_per_s
 
+    def get_initial_numbers(self, decay_chain):
+        """
+        Initial number of nuclei of the current parameter values (isotope
+        masses)
+
+        Parameters
+        ----------
+        decay_chain : DecayChain
+            a chain containing all isotopes of the model
+
+        Returns
+        -------
+            : numpy.ndarray
+            in chain order
+        """
+        mass_g = np.zeros(len(decay_chain))
+        mass_g[decay_chain.nuclear_constants.get_index(
+            [get_nuc_name(name) for name in self.param_names])] = (
+            self.parameters * msun_to_cgs)
+        return mass_g / decay_chain.atomic_masses
+
+    def get_injected_energy_exponentials(self):
+        """
+        Write the injected energy (erg/s) of the current parameter values as
+        a sum of exponentials sum_k a_k exp(-lambda_k t) using the closed-form
+        decay
+
+        Returns
+        -------
+        decay_constants : numpy.ndarray
+            lambda_k in 1/s
+        amplitudes : numpy.ndarray
+            a_k in erg/s
+        """
+        decay_chain = get_decay_chain(self.ejecta.isotopes)
+        numbers = self.get_initial_numbers(decay_chain)
+        energy_per_decay_rate = (decay_chain.decay_constants * (
+            self.em_energy_per_decay + self.lepton_energy_per_decay)[
+            decay_chain.isotopes].values[0])
+        amplitudes = (energy_per_decay_rate.dot(decay_chain.eigenvectors) *
+                      decay_chain.inverse_eigenvectors.dot(numbers))
+        return decay_chain.decay_constants, amplitudes
+
+    def integrate_injected_energy(self, t_min, t_max, rtol=1e-8,
+                                  analytic=True):
+        """
+        Injected energy (erg) between two epochs. The light curve is
+        integrated exactly as a sum of exponentials if the closed-form decay
+        is available and otherwise with `integrate_adaptive`, which refines
+        the epoch grid where the light curve is curved.
+
+        Parameters
+        ----------
+        t_min : float
+            first epoch in days
+        t_max : float
+            last epoch in days
+        rtol : float
+            relative tolerance of the adaptive integration [default = 1e-8]
+        analytic : bool
+            use the closed-form integral if possible [default = True]
+
+        Returns
+        -------
+            : float
+        """
+        if analytic:
+            try:
+                decay_constants, amplitudes = (
+                    self.get_injected_energy_exponentials())
+            except ValueError:
+                logger.info('No closed-form decay for this chain - '
+                            'integrating adaptively')
+            else:
+                return integrate_exponentials(
+                    decay_constants, amplitudes, t_min * day_to_s,
+                    t_max * day_to_s)
+
+        integral, n_evaluations = integrate_adaptive(
+            lambda time: self.calculate_injected_energy_per_s(
+                time).values.sum(axis=1), t_min, t_max, rtol=rtol)
+        return integral * day_to_s
+
+    def integrate_deposited_em_energy(self, t_min, t_max, deposition,
+                                      rtol=1e-6):
+        """
+        Deposited electromagnetic energy (erg) between two epochs, integrated
+        with `integrate_adaptive`
+
+        Parameters
+        ----------
+        t_min : float
+            first epoch in days
+        t_max : float
+            last epoch in days
+        deposition : GammaRayDeposition
+        rtol : float
+            relative tolerance [default = 1e-6]
+
+        Returns
+        -------
+            : float
+        """
+        integral, n_evaluations = integrate_adaptive(
+            lambda time: np.sum(self.calculate_deposited_em_energy_per_s(
+                time, deposition), axis=1), t_min, t_max, rtol=rtol)
+        return integral * day_to_s
+
+    def _calculate_unit_light_curves(self, time):
+        """
+        Calculate the luminosity of one solar mass of each of the initial
+        isotopes by running the full decay once per isotope
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_params) in erg/s/Msun
+        """
+        mass_g = self.ejecta.mass_g
+        fractions = [self.ejecta[get_nuc_name(param_name)]
+                     for param_name in self.param_names]
+
+        energy_per_decay_rate = ((
+            (self.em_energy_per_decay + self.lepton_energy_per_decay) *
+            self.decay_constant).values[0])
+        decayed_numbers = np.empty((len(time), len(energy_per_decay_rate)))
+
+        unit_light_curves = np.empty((len(time), len(self.param_names)))
+        try:
+            for i in range(len(self.param_names)):
+                unit_masses = np.zeros(len(self.param_names))
+                unit_masses[i] = 1.0
+                self._update_ejecta(unit_masses)
+                self.ejecta.get_decayed_numbers(time, out=decayed_numbers,
+                                                as_dataframe=False)
+                unit_light_curves[:, i] = decayed_numbers.dot(
+                    energy_per_decay_rate)
+        finally:
+            self._ejecta.mass_g = mass_g
+            for param_name, fraction in zip(self.param_names, fractions):
+                self._ejecta[get_nuc_name(param_name)] = fraction
+
+        return unit_light_curves
+
+    def get_unit_light_curves(self, time):
+        """
+        Get the basis of unit-mass light curves for the initial isotopes.
+        The luminosity is linear in the initial isotope masses so that
+        the light curve of any composition is the product of this basis with
+        the vector of masses (in the order of `param_names`). The basis is
+        calculated only once per epoch grid and the last
+        `max_cached_unit_light_curves` grids are kept.
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_params) in erg/s/Msun
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        if self.emulator is not None and self.emulator.covers(time):
+            return self.emulator(time)
+        time_key = time.tobytes()
+        if time_key in self._unit_light_curves:
+            self._unit_light_curves.move_to_end(time_key)
+        else:
+            self._unit_light_curves[time_key] = (
+                self._calculate_unit_light_curves(time))
+            while (len(self._unit_light_curves) >
+                   self.max_cached_unit_light_curves):
+                self._unit_light_curves.popitem(last=False)
+        return self._unit_light_curves[time_key]
+
+    def build_emulator(self, t_min, t_max, rtol=1e-4, **kwargs):
+        """
+        Switch to an interpolating emulator of the unit light curves for
+        epochs between `t_min` and `t_max`. The emulator is built on an
+        adaptive grid from the exact decay and is verified to agree with it
+        to `rtol` at three check points per grid interval (see
+        `LightCurveEmulator`). Epochs outside of the range use the exact
+        calculation.
+
+        Parameters
+        ----------
+        t_min : float
+            first epoch in days (> 0)
+        t_max : float
+            last epoch in days
+        rtol : float
+            maximum relative error [default = 1e-4]
+
+        Returns
+        -------
+            : LightCurveEmulator
+        """
+        self.emulator = LightCurveEmulator(self._calculate_unit_light_curves,
+                                           t_min, t_max, rtol=rtol, **kwargs)
+        return self.emulator
+
+    def fit_masses(self, time, luminosity, luminosity_err=None):
+        """
+        Fit the initial isotope masses to a bolometric light curve with a
+        non-negative least squares solver on the unit light curve basis
+
+        Parameters
+        ----------
+        time : numpy.ndarray
+            epochs in days
+        luminosity : numpy.ndarray
+            luminosity in erg/s
+        luminosity_err : numpy.ndarray
+            uncertainty of the luminosity in erg/s [default = None]
+
+        Returns
+        -------
+        masses : numpy.ndarray
+            masses in solar masses in the order of `param_names`
+        residual_norm : float
+            norm of the (weighted) residual
+        """
+        unit_light_curves = self.get_unit_light_curves(time)
+        luminosity = np.asarray(luminosity, dtype=np.float64)
+        if luminosity_err is None:
+            luminosity_err = np.ones_like(luminosity)
+        return nnls_fit(unit_light_curves, luminosity, luminosity_err)
+
     def evaluate(self, time, *args):
-        self._update_ejecta(args)
-        return (time, self.calculate_injected_energy_per_s(time).sum(axis=1).values)
+        # the light curve is linear in the masses - the ejecta is only
+        # updated when it is used (see `ejecta`)
+        return (time, self.get_unit_light_curves(time).dot(np.ravel(args)))
+
+    def fit_deriv(self, time, *args):
+        """
+        Analytic derivatives of the light curve with respect to the isotope
+        masses. As the light curve is linear in the masses these are the unit
+        light curves themselves and do not depend on the masses.
+
+        Returns
+        -------
+            : list of numpy.ndarray
+            one derivative (erg/s/Msun) per parameter
+        """
+        return list(self.get_unit_light_curves(time).T)
+
+
+def nnls_fit(unit_light_curves, luminosity, luminosity_err):
+    """
+    Solve for the non-negative linear coefficients (masses) of a basis of
+    unit light curves
+
+    Parameters
+    ----------
+    unit_light_curves : numpy.ndarray
+        basis of shape (n_epochs, n_params)
+    luminosity : numpy.ndarray
+        observed light curve of shape (n_epochs, )
+    luminosity_err : numpy.ndarray
+        uncertainty of the observed light curve of shape (n_epochs, )
+
+    Returns
+    -------
+    masses : numpy.ndarray
+    residual_norm : float
+    """
+    # scale the basis to order unity - the luminosities are ~1e43 erg/s
+    scale = np.abs(unit_light_curves).max(axis=0)
+    scale[scale == 0.0] = 1.0
+    weighted_basis = unit_light_curves / luminosity_err[:, np.newaxis] / scale
+    scaled_masses, residual_norm = optimize.nnls(
+        weighted_basis, luminosity / luminosity_err)
+    return scaled_masses / scale, residual_norm
 
 def make_energy_injection_model(cutoff_em_energy=20*u.keV, **kwargs):
     """
@@ -136,8 +509,9 @@ def make_energy_injection_model(cutoff_em_energy=20*u.keV, **kwargs):
 
     init_kwargs = {}
     for isotope_name in kwargs:
-        if not nucname.isnuclide(isotope_name):
-            raise ValueError('{0} is not a nuclide name')
+        if not is_nuclide(isotope_name):
+            raise ValueError('{0} is not a nuclide name'.format(
+                isotope_name))
         class_dict[isotope_name.lower()] = Parameter()
         init_kwargs[isotope_name.lower()] = kwargs[isotope_name]
 
@@ -159,6 +533,12 @@ class RSquared(FittableModel):
                               (4 * np.pi * (distance * mpc_to_cm)**2))
         return epoch, luminosity_density
 
+    @staticmethod
+    def fit_deriv(epoch, luminosity, distance):
+        luminosity_density = (luminosity /
+                              (4 * np.pi * (distance * mpc_to_cm)**2))
+        return [-2 * luminosity_density / distance]
+
 
 class BolometricChi2Likelihood(FittableModel):
 
@@ -0,0 +1,179 @@
+import logging
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+logger = logging.getLogger(__name__)
+
+
+class LightCurveEmulator(object):
+    """
+    Interpolating emulator of unit light curves. The light curves are
+    calculated exactly on an adaptive grid in log(time) and interpolated with
+    cubic splines in log(time)-log(luminosity).
+
+    Every interval of the grid is checked against the exact calculation at
+    its quarter points, and intervals are bisected until the spline agrees
+    to `rtol` at all check points of the final grid. The exact values at the
+    check points are kept, so a bisection only evaluates the two new quarter
+    points of each half (the old quarter points become the new midpoints).
+    The tolerance is verified at these points only - between them the error
+    is that of the spline, which for light curves that are smooth on the
+    scale of the check points stays within `rtol`.
+
+    Parameters
+    ----------
+
+    unit_light_curve_function: ~callable
+        function that maps epochs (days) to an array of shape
+        (n_epochs, n_params), e.g. the exact unit light curves of an
+        energy injection model
+
+    t_min: ~float
+        first epoch covered by the emulator in days (> 0)
+
+    t_max: ~float
+        last epoch covered by the emulator in days
+
+    rtol: ~float
+        maximum relative error at the check points [default = 1e-4]
+
+    n_initial: ~int
+        number of initial grid points [default = 16]
+
+    max_iterations: ~int
+        maximum number of refinements [default = 30]
+    """
+
+    # positions of the check points within an interval
+    check_fractions = np.array([0.25, 0.5, 0.75])
+
+    def __init__(self, unit_light_curve_function, t_min, t_max, rtol=1e-4,
+                 n_initial=16, max_iterations=30):
+        if not 0 < t_min < t_max:
+            raise ValueError('Require 0 < t_min < t_max (got {0}, {1})'.format(
+                t_min, t_max))
+        self.unit_light_curve_function = unit_light_curve_function
+        self.t_min = t_min
+        self.t_max = t_max
+        self.rtol = rtol
+        self.n_evaluations = 0
+        self._build(n_initial, max_iterations)
+
+    def _exact(self, log_time):
+        self.n_evaluations += log_time.size
+        values = np.asarray(self.unit_light_curve_function(
+            np.exp(log_time.ravel())), dtype=np.float64)
+        return values.reshape(log_time.shape + values.shape[-1:])
+
+    @staticmethod
+    def _to_log(values):
+        return np.log(np.maximum(values, np.finfo(np.float64).tiny))
+
+    def _get_relative_error(self, approx_values, values):
+        relative_error = np.zeros_like(values)
+        mask = (values > 0) & self.nonzero_columns
+        relative_error[mask] = (np.abs(approx_values[mask] - values[mask]) /
+                                values[mask])
+        return relative_error
+
+    def _build(self, n_initial, max_iterations):
+        log_time = np.linspace(np.log(self.t_min), np.log(self.t_max),
+                               n_initial)
+        values = self._exact(log_time)
+        self.nonzero_columns = (values > 0).any(axis=0)
+
+        # check points (n_intervals, 3) and their exact values
+        check_log_time = (log_time[:-1, np.newaxis] +
+                          np.diff(log_time)[:, np.newaxis] *
+                          self.check_fractions)
+        check_values = self._exact(check_log_time)
+
+        for i in range(max_iterations):
+            spline = CubicSpline(log_time, self._to_log(values))
+            relative_error = self._get_relative_error(
+                np.exp(spline(check_log_time)), check_values)
+            interval_error = relative_error.max(axis=(1, 2))
+            self.max_relative_error = interval_error.max()
+
+            refine = interval_error > self.rtol
+            logger.debug('Emulator iteration {0}: {1} grid points, max '
+                         'relative error {2:.2e}'.format(
+                i, len(log_time), self.max_relative_error))
+            if not refine.any():
+                break
+
+            # the midpoints become grid points and the quarter points the
+            # midpoints of the two halves
+            start, end = log_time[:-1][refine], log_time[1:][refine]
+            quarter_log_time, mid_log_time, three_quarter_log_time = (
+                check_log_time[refine].T)
+            new_log_time = np.stack(
+                (0.5 * (start + quarter_log_time),
+                 0.5 * (mid_log_time + quarter_log_time),
+                 0.5 * (mid_log_time + three_quarter_log_time),
+                 0.5 * (three_quarter_log_time + end)), axis=1)
+            new_values = self._exact(new_log_time)
+            old_values = check_values[refine]
+
+            split_log_time = np.concatenate((
+                np.stack((new_log_time[:, 0], quarter_log_time,
+                          new_log_time[:, 1]), axis=1),
+                np.stack((new_log_time[:, 2], three_quarter_log_time,
+                          new_log_time[:, 3]), axis=1)))
+            split_values = np.concatenate((
+                np.stack((new_values[:, 0], old_values[:, 0],
+                          new_values[:, 1]), axis=1),
+                np.stack((new_values[:, 2], old_values[:, 2],
+                          new_values[:, 3]), axis=1)))
+
+            interval_start = np.concatenate((log_time[:-1][~refine], start,
+                                             mid_log_time))
+            sort_idx = np.argsort(interval_start)
+            check_log_time = np.concatenate((check_log_time[~refine],
+                                             split_log_time))[sort_idx]
+            check_values = np.concatenate((check_values[~refine],
+                                           split_values))[sort_idx]
+
+            log_time = np.concatenate((log_time, mid_log_time))
+            values = np.concatenate((values, old_values[:, 1]))
+            sort_idx = np.argsort(log_time)
+            log_time, values = log_time[sort_idx], values[sort_idx]
+        else:
+            raise ValueError('Emulator did not reach rtol={0} in {1} '
+                             'iterations (max relative error {2:.2e})'.format(
+                self.rtol, max_iterations, self.max_relative_error))
+
+        self.log_time = log_time
+        self.spline = spline
+
+    def covers(self, time):
+        time = np.asarray(time)
+        return (time.min() >= self.t_min) and (time.max() <= self.t_max)
+
+    def __call__(self, time):
+        """
+        Evaluate the emulated unit light curves
+
+        Parameters
+        ----------
+
+        time: numpy.ndarray
+            epochs in days within [t_min, t_max]
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, n_params)
+        """
+        time = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        if not self.covers(time):
+            raise ValueError('Epochs outside of emulator range [{0}, {1}]'.format(
+                self.t_min, self.t_max))
+        return np.exp(self.spline(np.log(time))) * self.nonzero_columns
+
+    def __repr__(self):
+        return ('<LightCurveEmulator t=[{0}, {1}] grid points {2} max relative '
+                'error {3:.2e}>'.format(self.t_min, self.t_max,
+                                        len(self.log_time),
+                                        self.max_relative_error))
@@ -0,0 +1,135 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def integrate_exponentials(rates, amplitudes, t_start, t_end):
+    """
+    Integral of sum_k amplitudes_k exp(-rates_k t) from t_start to t_end
+
+    Parameters
+    ----------
+
+    rates: ~numpy.ndarray
+        decay rates (>= 0) of shape (n_terms, )
+
+    amplitudes: ~numpy.ndarray
+        amplitudes of shape (n_terms, )
+
+    t_start: ~float
+
+    t_end: ~float
+
+    Returns
+    -------
+        : ~float
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    duration = t_end - t_start
+    # (1 - exp(-r dt)) / r without cancellation and with the limit dt at r=0
+    safe_rates = np.where(rates > 0, rates, 1.0)
+    interval_factors = np.where(rates > 0,
+                                -np.expm1(-rates * duration) / safe_rates,
+                                duration)
+    return np.sum(amplitudes * np.exp(-rates * t_start) * interval_factors)
+
+
+def integrate_adaptive(function, t_min, t_max, rtol=1e-6, atol=0.0,
+                       n_initial=8, max_iterations=50):
+    """
+    Adaptive Simpson integration of a vectorized function. Intervals whose
+    Simpson estimate changes by more than their share of the tolerance when
+    bisected are refined, and all new epochs of one refinement are
+    evaluated in a single call, so that the grid is refined only where the
+    curvature is high.
+
+    Parameters
+    ----------
+
+    function: ~callable
+        maps an array of epochs to an array of values of the same length
+
+    t_min: ~float
+
+    t_max: ~float
+
+    rtol: ~float
+        relative tolerance [default = 1e-6]
+
+    atol: ~float
+        absolute tolerance [default = 0]
+
+    n_initial: ~int
+        number of initial intervals (logarithmically spaced if
+        t_min > 0) [default = 8]
+
+    max_iterations: ~int
+        maximum number of refinements [default = 50]
+
+    Returns
+    -------
+
+    integral: ~float
+
+    n_evaluations: ~int
+        number of function evaluations
+    """
+    if not t_min < t_max:
+        raise ValueError('Require t_min < t_max (got {0}, {1})'.format(
+            t_min, t_max))
+
+    def evaluate(epochs):
+        return np.asarray(function(epochs), dtype=np.float64).reshape(
+            len(epochs))
+
+    if t_min > 0:
+        edges = np.geomspace(t_min, t_max, n_initial + 1)
+    else:
+        edges = np.linspace(t_min, t_max, n_initial + 1)
+    start, end = edges[:-1], edges[1:]
+    middle = 0.5 * (start + end)
+    values = evaluate(np.concatenate((edges, middle)))
+    f_start, f_end = values[:n_initial], values[1:n_initial + 1]
+    f_middle = values[n_initial + 1:]
+    n_evaluations = len(values)
+
+    width = t_max - t_min
+    integral = 0.0
+    error = 0.0
+    for i in range(max_iterations):
+        left, right = 0.5 * (start + middle), 0.5 * (middle + end)
+        values = evaluate(np.concatenate((left, right)))
+        n_evaluations += len(values)
+        f_left, f_right = values[:len(start)], values[len(start):]
+
+        coarse = (end - start) / 6 * (f_start + 4 * f_middle + f_end)
+        fine = ((middle - start) / 6 * (f_start + 4 * f_left + f_middle) +
+                (end - middle) / 6 * (f_middle + 4 * f_right + f_end))
+        interval_error = np.abs(fine - coarse) / 15
+
+        estimate = integral + fine.sum()
+        tolerance = max(atol, rtol * abs(estimate))
+        accept = interval_error <= tolerance * (end - start) / width
+        # Richardson extrapolation of the accepted intervals
+        integral += np.sum(fine[accept] + (fine[accept] - coarse[accept]) / 15)
+        error += interval_error[accept].sum()
+
+        if accept.all():
+            logger.debug('Adaptive integration converged with {0} '
+                         'evaluations (error {1:.2e})'.format(n_evaluations,
+                                                             error))
+            return integral, n_evaluations
+
+        refine = ~accept
+        start, middle, end = (np.concatenate((start[refine], middle[refine])),
+                              np.concatenate((left[refine], right[refine])),
+                              np.concatenate((middle[refine], end[refine])))
+        f_start, f_middle, f_end = (
+            np.concatenate((f_start[refine], f_middle[refine])),
+            np.concatenate((f_left[refine], f_right[refine])),
+            np.concatenate((f_middle[refine], f_end[refine])))
+
+    raise ValueError('Adaptive integration did not reach rtol={0} within {1} '
+                     'iterations'.format(rtol, max_iterations))
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from astropy import units as u
+
+from tardisnuclear.models.base import make_energy_injection_model, RSquared
+from tardisnuclear.models.integration import integrate_adaptive
+from tardisnuclear.tests.helpers import (add_decay_radiation,
+                                         get_central_differences)
+
+
+def make_model(**masses):
+    add_decay_radiation()
+    return make_energy_injection_model(**masses)
+
+
+def test_unit_light_curves_are_linear_in_masses():
+    model = make_model(Ni56=0.6)
+    time = np.linspace(5, 300, 20)
+    injected_energy = model.calculate_injected_energy_per_s(time).values.sum(
+        axis=1)
+    np.testing.assert_allclose(model.get_unit_light_curves(time)[:, 0] * 0.6,
+                               injected_energy, rtol=1e-10)
+
+
+def test_evaluate_does_not_change_ejecta():
+    model = make_model(Ni56=0.6)
+    time = np.linspace(5, 300, 20)
+    mass_g = model.ejecta.mass_g
+    _, luminosity = model.evaluate(time, 0.3)
+    np.testing.assert_allclose(
+        luminosity, 0.3 * model.get_unit_light_curves(time)[:, 0])
+    assert model.ejecta.mass_g == mass_g
+
+
+def test_ejecta_follows_parameters():
+    model = make_model(Ni56=0.6, Co56=0.01)
+    time = np.linspace(5, 300, 20)
+    model.ni56 = 0.3
+    model.co56 = 0.05
+    _, luminosity = model(time)
+    np.testing.assert_allclose(
+        model.calculate_injected_energy_per_s(time).values.sum(axis=1),
+        luminosity, rtol=1e-10)
+    np.testing.assert_allclose(
+        model.calculate_channel_energy_per_s(time).values.sum(axis=1),
+        luminosity, rtol=1e-10)
+    assert model.ejecta.mass_g == pytest.approx(0.35 * u.Msun.to(u.g))
+
+
+def test_unit_light_curve_cache_is_bounded():
+    model = make_model(Ni56=0.6)
+    model.max_cached_unit_light_curves = 3
+    for i in range(10):
+        model.get_unit_light_curves(np.array([10.0 + i]))
+    assert len(model._unit_light_curves) == 3
+
+
+def test_fit_masses():
+    model = make_model(Ni56=0.6, Co56=0.01)
+    time = np.linspace(10, 500, 40)
+    true_masses = np.array([0.45, 0.02])
+    luminosity = model.get_unit_light_curves(time).dot(true_masses)
+    masses, residual_norm = model.fit_masses(time, luminosity,
+                                             0.01 * luminosity)
+    np.testing.assert_allclose(masses, true_masses, rtol=1e-8)
+    assert residual_norm < 1e-6
+
+
+@pytest.mark.parametrize('cutoff_em_energy', [20 * u.keV, 1 * u.MeV,
+                                              np.inf * u.keV])
+def test_channels_add_up_to_injected_energy(cutoff_em_energy):
+    add_decay_radiation()
+    model = make_energy_injection_model(cutoff_em_energy=cutoff_em_energy,
+                                        Ni56=0.6)
+    time = np.array([1.0, 20.0, 100.0, 400.0])
+    channel_energy = model.calculate_channel_energy_per_s(time)
+    injected_energy = model.calculate_injected_energy_per_s(time)
+    np.testing.assert_allclose(channel_energy.values.sum(axis=1),
+                               injected_energy.values.sum(axis=1),
+                               rtol=1e-12)
+    np.testing.assert_allclose(
+        (model.calculate_em_energy_per_s(time) +
+         model.calculate_lepton_energy_per_s(time)).values,
+        injected_energy.values, rtol=1e-12)
+
+
+def test_channel_cutoff():
+    add_decay_radiation()
+    channel_energy_per_decay = make_energy_injection_model(
+        cutoff_em_energy=1 * u.MeV, Ni56=0.6).channel_energy_per_decay
+    kev_to_erg = u.keV.to(u.erg)
+    # Co56 has no tabulated annihilation lines - two 511 keV photons per
+    # positron are below the cutoff
+    np.testing.assert_allclose(
+        channel_energy_per_decay.loc['annihilation', 'Co56'],
+        2 * 510.999 * 0.196 * kev_to_erg, rtol=1e-5)
+    np.testing.assert_allclose(
+        channel_energy_per_decay.loc['gamma_rays', 'Co56'],
+        846.77 * 0.9994 * kev_to_erg)
+
+    channel_energy_per_decay = make_energy_injection_model(
+        cutoff_em_energy=20 * u.keV, Ni56=0.6).channel_energy_per_decay
+    assert (channel_energy_per_decay.loc[['annihilation', 'gamma_rays']] ==
+            0).all().all()
+    assert (channel_energy_per_decay.loc['x_rays', ['Ni56', 'Co56']] >
+            0).all()
+
+
+@pytest.mark.parametrize('t_min, t_max', [(0.0, 300.0), (5.0, 1000.0)])
+def test_integrate_injected_energy(t_min, t_max):
+    model = make_model(Ni56=0.6, Co56=0.01)
+    analytic = model.integrate_injected_energy(t_min, t_max)
+    adaptive = model.integrate_injected_energy(t_min, t_max, rtol=1e-9,
+                                               analytic=False)
+    np.testing.assert_allclose(analytic, adaptive, rtol=1e-8)
+
+
+def test_integrate_injected_energy_fallback(monkeypatch):
+    model = make_model(Ni56=0.6)
+    expected = model.integrate_injected_energy(0.0, 300.0)
+
+    def no_closed_form():
+        raise ValueError('Degenerate decay constants in the decay chain')
+
+    monkeypatch.setattr(model, 'get_injected_energy_exponentials',
+                        no_closed_form)
+    np.testing.assert_allclose(model.integrate_injected_energy(0.0, 300.0),
+                               expected, rtol=1e-7)
+
+
+def test_integrate_injected_energy_follows_parameters():
+    model = make_model(Ni56=0.6, Co56=0.01)
+    model.ni56 = 0.2
+    model.co56 = 0.1
+    integral, _ = integrate_adaptive(lambda time: model(time)[1], 1.0, 400.0,
+                                     rtol=1e-10)
+    np.testing.assert_allclose(model.integrate_injected_energy(1.0, 400.0),
+                               integral * u.day.to(u.s), rtol=1e-8)
+
+
+def test_fit_deriv_finite_differences():
+    model = make_model(Ni56=0.6, Co56=0.01)
+    time = np.linspace(5, 300, 20)
+    params = [0.5, 0.02]
+    derivatives = get_central_differences(
+        lambda params: model.evaluate(time, *params)[1], params)
+    for derivative, fd_derivative in zip(model.fit_deriv(time, *params),
+                                         derivatives):
+        np.testing.assert_allclose(derivative, fd_derivative, rtol=1e-6)
+
+
+def test_rsquared_fit_deriv_finite_differences():
+    epoch = np.linspace(5, 300, 20)
+    luminosity = np.linspace(1e43, 1e41, 20)
+    derivative, = RSquared.fit_deriv(epoch, luminosity, 6.4)
+    fd_derivative, = get_central_differences(
+        lambda params: RSquared(6.4).evaluate(epoch, luminosity,
+                                              params[0])[1], [6.4])
+    np.testing.assert_allclose(derivative, fd_derivative, rtol=1e-6)
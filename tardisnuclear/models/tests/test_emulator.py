@@ -0,0 +1,35 @@
+import numpy as np
+
+from tardisnuclear.models.emulator import LightCurveEmulator
+
+decay_constants = np.log(2) / np.array([6.075, 77.236, 271.74])
+
+
+def unit_light_curves(time):
+    # Ni56, Co56 and Co57-like light curves with a rising Co56 column
+    exponentials = np.exp(-np.outer(time, decay_constants))
+    return np.stack((exponentials[:, 0] + 0.1 * exponentials[:, 1],
+                     exponentials[:, 1] - exponentials[:, 0],
+                     exponentials[:, 2]), axis=1)
+
+
+def test_emulator_held_out_error():
+    emulator = LightCurveEmulator(unit_light_curves, 1.0, 1000.0, rtol=1e-5)
+    time = np.geomspace(1.0, 1000.0, 5001)
+    exact = unit_light_curves(time)
+    relative_error = np.abs(emulator(time) - exact) / exact
+    assert relative_error.max() <= 1e-5
+
+
+def test_emulator_evaluates_every_epoch_once():
+    evaluated_time = []
+
+    def recording_light_curves(time):
+        evaluated_time.extend(time)
+        return unit_light_curves(time)
+
+    emulator = LightCurveEmulator(recording_light_curves, 1.0, 1000.0,
+                                  rtol=1e-6)
+    assert emulator.n_evaluations == len(evaluated_time)
+    assert len(np.unique(evaluated_time)) == len(evaluated_time)
+    assert len(evaluated_time) == 4 * len(emulator.log_time) - 3
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from tardisnuclear.models.integration import (integrate_adaptive,
+                                              integrate_exponentials)
+
+rates = np.array([0.0, 1e-3, 0.05, 2.0])
+amplitudes = np.array([0.5, 3.0, -1.0, 10.0])
+
+
+def exponentials(time):
+    return np.exp(-np.outer(time, rates)).dot(amplitudes)
+
+
+def exact_integral(t_start, t_end):
+    integral = amplitudes[0] * (t_end - t_start)
+    return integral + np.sum(amplitudes[1:] / rates[1:] * (
+        np.exp(-rates[1:] * t_start) - np.exp(-rates[1:] * t_end)))
+
+
+@pytest.mark.parametrize('t_min, t_max', [(0.0, 10.0), (0.0, 1000.0),
+                                          (5.0, 300.0), (1e-3, 1e-2)])
+def test_integrate_exponentials(t_min, t_max):
+    np.testing.assert_allclose(
+        integrate_exponentials(rates, amplitudes, t_min, t_max),
+        exact_integral(t_min, t_max), rtol=1e-12)
+
+
+@pytest.mark.parametrize('t_min, t_max', [(0.0, 10.0), (0.0, 1000.0),
+                                          (5.0, 300.0)])
+@pytest.mark.parametrize('rtol', [1e-6, 1e-9])
+def test_integrate_adaptive(t_min, t_max, rtol):
+    integral, n_evaluations = integrate_adaptive(exponentials, t_min, t_max,
+                                                 rtol=rtol)
+    np.testing.assert_allclose(
+        integral, integrate_exponentials(rates, amplitudes, t_min, t_max),
+        rtol=rtol)
+    assert n_evaluations < 10000
+
+
+def test_integrate_adaptive_invalid_range():
+    with pytest.raises(ValueError):
+        integrate_adaptive(exponentials, 10.0, 10.0)
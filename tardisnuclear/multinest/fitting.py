@@ -1,24 +1,23 @@
 import numpy as np
-from scipy import optimize
 import sys
+import logging
 
 from astropy import modeling
 from itertools import chain
-from tardisnuclear.ejecta import Ejecta
-
-
-from tardisnuclear.nuclear_data import DecayRadiation
+from tardisnuclear.models.base import make_energy_injection_model, nnls_fit
+from tardisnuclear.decay_chain import get_rounding_error
 
 from scipy import stats
 from collections import OrderedDict
 import pandas as pd
 
 from astropy import units as u
-import pymultinest
 
 msun_to_cgs = u.Msun.to(u.g)
 mpc_to_cm = u.Mpc.to(u.cm)
 
+logger = logging.getLogger(__name__)
+
 
 class BaseModel(modeling.Model):
 
@@ -38,81 +37,191 @@ class BolometricLightCurveModelIa(object):
         self.epochs = epochs
         self.lum_dens = lum_dens
         self.lum_dens_err = lum_dens_err
-        self.ejecta = Ejecta.from_masses(Ni56=ni56 * u.Msun, Ni57=ni57 * u.Msun,
-                                         Co55=co55 * u.Msun, Ti44=ti44 * u.Msun)
-        self.nuclear_data = DecayRadiation(self.ejecta.get_all_children_nuc_name())
-        self.rad_trans = SimpleLateTime(self.ejecta, self.nuclear_data)
+        self.energy_injection = make_energy_injection_model(
+            ni56=ni56, ni57=ni57, co55=co55, ti44=ti44)
+        self.ejecta = self.energy_injection.ejecta
+        self.nuclear_data = self.energy_injection.decay_radiation
+
+    def _get_unit_light_curve_density(self, fraction, distance, epochs):
+        return (self.energy_injection.get_unit_light_curves(epochs) *
+                fraction / (4 * np.pi * (distance * mpc_to_cm)**2))
 
     def calculate_light_curve(self, ni56, ni57, co55, ti44, fraction=1.0,
                               distance=6.4, epochs=None):
 
         if epochs is None:
             epochs = self.epochs
-        total_mass = ni56 + ni57 + co55 + ti44
+        return self._get_unit_light_curve_density(fraction, distance, epochs).dot(
+            [ni56, ni57, co55, ti44])
+
 
-        self.ejecta.mass_g = total_mass * msun_to_cgs
-        self.ejecta['Ni56'] = ni56 / total_mass
-        self.ejecta['Ni57'] = ni57 / total_mass
-        self.ejecta['Co55'] = co55 / total_mass
-        self.ejecta['Ti44'] = ti44 / total_mass
-        luminosity_density =  self.rad_trans.total_bolometric_light_curve(epochs)
-        return (luminosity_density * fraction /
-                (4 * np.pi * (distance * mpc_to_cm)**2))
+    def calculate_light_curves(self, samples, epochs=None, dtype=np.float64,
+                               return_error=False):
+        """
+        Light curves of many parameter samples at once, e.g. for posterior
+        predictive bands
 
+        The unit light curves are normalized in double precision so that in
+        single precision (numpy.float32) only order unity values and the
+        luminosity densities are stored and contracted.
+
+        Parameters
+        ----------
+        samples : numpy.ndarray
+            array of shape (n_samples, 6) with columns
+            (ni56, ni57, co55, ti44, fraction, distance)
+        epochs : numpy.ndarray
+            [default = None uses the observed epochs]
+        dtype : numpy.dtype
+            floating point type of the result [default = numpy.float64]
+        return_error : bool
+            also return the expected relative error [default = False]
+
+        Returns
+        -------
+            : numpy.ndarray
+            luminosity densities of shape (n_samples, n_epochs)
+        relative_error : float
+            only if `return_error`
+        """
+        if epochs is None:
+            epochs = self.epochs
+        samples = np.atleast_2d(np.asarray(samples, dtype=np.float64))
+        unit_light_curves = self.energy_injection.get_unit_light_curves(epochs)
+        scale = np.abs(unit_light_curves).max(axis=0)
+        scale[scale == 0.0] = 1.0
+        weights = (samples[:, :4] * scale * samples[:, 4:5] /
+                   (4 * np.pi * (samples[:, 5:6] * mpc_to_cm)**2))
+        light_curves = weights.astype(dtype).dot(
+            (unit_light_curves / scale).T.astype(dtype))
+        if return_error:
+            return light_curves, get_rounding_error(weights.shape[1], dtype)
+        return light_curves
 
     def calculate_individual_light_curve(self, ni56, ni57, co55, ti44, fraction=1.0,
                               distance=6.4, epochs=None):
 
         if epochs is None:
             epochs = self.epochs
-        total_mass = ni56 + ni57 + co55 + ti44
-
-        self.ejecta.mass_g = total_mass * msun_to_cgs
-        self.ejecta['Ni56'] = ni56 / total_mass
-        self.ejecta['Ni57'] = ni57 / total_mass
-        self.ejecta['Co55'] = co55 / total_mass
-        self.ejecta['Ti44'] = ti44 / total_mass
-        luminosity_density =  self.rad_trans.bolometric_light_curve(epochs)
-        return (luminosity_density * fraction /
-                (4 * np.pi * (distance * mpc_to_cm)**2))
+        luminosity_density = (
+            self._get_unit_light_curve_density(fraction, distance, epochs) *
+            np.array([ni56, ni57, co55, ti44]))
+        return pd.DataFrame(luminosity_density, index=epochs,
+                            columns=self.energy_injection.param_names)
 
 
     def fitness_function(self, ni56, ni57, co55, ti44, fraction, distance):
 
         model_light_curve = self.calculate_light_curve(ni56, ni57, co55, ti44,
                                                  fraction, distance)
-        return (model_light_curve.value - self.lum_dens)/self.lum_dens_err
+        return (model_light_curve - self.lum_dens)/self.lum_dens_err
 
 
+    def calculate_light_curve_jacobian(self, ni56, ni57, co55, ti44,
+                                       fraction=1.0, distance=6.4,
+                                       epochs=None):
+        """
+        Analytic Jacobian of the light curve with respect to
+        (ni56, ni57, co55, ti44, fraction, distance)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_epochs, 6)
+        """
+        if epochs is None:
+            epochs = self.epochs
+        unit_light_curve_density = self._get_unit_light_curve_density(
+            1.0, distance, epochs)
+        light_curve = unit_light_curve_density.dot([ni56, ni57, co55, ti44])
+        return np.column_stack((unit_light_curve_density * fraction,
+                                light_curve,
+                                -2 * light_curve * fraction / distance))
+
+    def log_likelihood_gradient(self, ni56, ni57, co55, ti44, fraction,
+                                distance):
+        """
+        Gradient of the log likelihood with respect to
+        (ni56, ni57, co55, ti44, fraction, distance) for gradient based
+        optimizers and samplers
+        """
+        fitness = self.fitness_function(ni56, ni57, co55, ti44, fraction,
+                                        distance)
+        jacobian = self.calculate_light_curve_jacobian(
+            ni56, ni57, co55, ti44, fraction, distance)
+        return -(fitness / self.lum_dens_err).dot(jacobian)
+
     def log_likelihood(self, model_param, ndim, nparam):
         #return -5
 
-        model_param = [model_param[i] for i in xrange(6)]
+        model_param = [model_param[i] for i in range(6)]
         return (-0.5 * self.fitness_function(*model_param)**2).sum()
 
-    def simple_fit(self, ni56, ni57, co55, ti44, method='Nelder-Mead'):
-        def fit_func(isotopes):
-            ni57, co55, ti44 = np.abs(isotopes)
-            mdl = self.evaluate(ni56, ni57, co55, ti44)
-            mdl *= np.mean(self.luminosity / mdl.value)
-            return ((mdl.value - self.luminosity)**2).sum()
+    def simple_fit(self, fraction=1.0, distance=6.4):
+        """
+        Fit the isotope masses for a given fraction and distance. The light
+        curve is linear in the masses so they are solved for directly with a
+        non-negative least squares solver.
+
+        Parameters
+        ----------
+        fraction : float
+            fraction of the luminosity in the observed band [default = 1.0]
+        distance : float
+            distance in Mpc [default = 6.4]
+
+        Returns
+        -------
+        masses : OrderedDict
+            fitted masses in solar masses
+        residual_norm : float
+            norm of the weighted residual
+        mdl : numpy.ndarray
+            best fit light curve
+        """
+        unit_light_curve_density = self._get_unit_light_curve_density(
+            fraction, distance, self.epochs)
+        masses, residual_norm = nnls_fit(unit_light_curve_density,
+                                         np.asarray(self.lum_dens),
+                                         np.asarray(self.lum_dens_err))
+        mdl = unit_light_curve_density.dot(masses)
+        masses = OrderedDict(zip(self.energy_injection.param_names, masses))
 
-        fit = optimize.minimize(fit_func, (ni57, co55, ti44),
-                                 method=method)
-        mdl = self.evaluate(ni56, *fit.x)
-        norm_factor = np.mean(self.luminosity / mdl.value)
-        mdl *= norm_factor
+        return masses, residual_norm, mdl
 
-        return fit, norm_factor, mdl
 
+    def multinest_fit(self, priors, run_dir='sn11fe', resume=True, **kwargs):
+        """
+        Sample the posterior with MultiNest
 
-    def multinest_fit(self, priors, **kwargs):
+        Parameters
+        ----------
+        priors : PriorCollection
+        run_dir : str
+            output directory of the run [default = 'sn11fe']
+        resume : bool
+            resume from the last checkpoint in `run_dir` and return the
+            result of a finished run without sampling again
+            [default = True]
+        **kwargs :
+            passed to `MultiNestRun`
+
+        Returns
+        -------
+            : MultiNestResult
+        """
+        from tardisnuclear.multinest.run import MultiNestRun
 
+        mn_run = MultiNestRun(self.log_likelihood, priors.prior_transform,
+                              list(self.energy_injection.param_names) +
+                              ['fraction', 'distance'], run_dir, **kwargs)
 
-        mn_fit = pymultinest.run(self.log_likelihood, priors.prior_transform, 6,
-                                 outputfiles_basename='sn11fe/fit', **kwargs)
+        if resume and mn_run.is_finished:
+            logger.info('MultiNest run in {0} is finished - reading the '
+                        'posterior'.format(run_dir))
+            return mn_run.result
 
-        return mn_fit
+        return mn_run.run(resume=resume)
 
 
 
@@ -166,7 +275,7 @@ class MultiNestResult():
 
         """
         posterior_data = pd.read_csv('{0}/fit.txt'.format(basename),
-                           delim_whitespace=True,
+                           sep=r'\s+',
                            names=['posterior', 'x'] + parameter_names)
         posterior_data.index = np.arange(len(posterior_data))
         return posterior_data
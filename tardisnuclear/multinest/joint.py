@@ -0,0 +1,220 @@
+from multiprocessing import Pool
+
+import numpy as np
+
+from astropy import units as u
+
+from tardisnuclear.models.base import make_energy_injection_model, nnls_fit
+from tardisnuclear.shared_data import SharedArrays
+
+mpc_to_cm = u.Mpc.to(u.cm)
+
+# unit light curves on the joint epoch grid - set once per worker process
+_worker_unit_light_curves = None
+_worker_shared_arrays = None
+
+
+def _init_shared_worker(handle):
+    global _worker_shared_arrays, _worker_unit_light_curves
+    _worker_shared_arrays = SharedArrays.attach(handle)
+    _worker_unit_light_curves = _worker_shared_arrays['unit_light_curves']
+
+
+def _fit_object(unit_light_curves, fit_args):
+    epoch_idx, lum_dens, lum_dens_err, fraction, distance = fit_args
+    unit_light_curve_density = (unit_light_curves[epoch_idx] * fraction /
+                                (4 * np.pi * (distance * mpc_to_cm)**2))
+    return nnls_fit(unit_light_curve_density, lum_dens, lum_dens_err)
+
+
+def _fit_shared_object(fit_args):
+    return _fit_object(_worker_unit_light_curves, fit_args)
+
+
+class JointLightCurveFit(object):
+    """
+    Fit the bolometric light curves of many supernovae with the same set of
+    isotopes. The nuclear data and the decay are set up once and the unit
+    light curves are calculated once on the union of all epochs.
+
+    `fit` keeps its worker pool and the shared memory block of the unit
+    light curves alive between calls; release them with `close` or use the
+    object as a context manager.
+
+    Parameters
+    ----------
+
+    epochs: ~list of numpy.ndarray
+        epochs in days for each object
+
+    lum_dens: ~list of numpy.ndarray
+        luminosity density for each object
+
+    lum_dens_err: ~list of numpy.ndarray
+        uncertainty of the luminosity density for each object
+
+    distances: ~numpy.ndarray
+        distances in Mpc for each object
+
+    fractions: ~numpy.ndarray
+        fraction of the luminosity observed for each object [default = 1.0]
+
+    **isotope_masses: key, value pairs
+        isotopes and initial masses (solar masses), e.g. ni56=0.6
+    """
+
+    def __init__(self, epochs, lum_dens, lum_dens_err, distances,
+                 fractions=None, **isotope_masses):
+        self.lum_dens = [np.asarray(item, dtype=np.float64)
+                         for item in lum_dens]
+        self.lum_dens_err = [np.asarray(item, dtype=np.float64)
+                             for item in lum_dens_err]
+        self.distances = np.asarray(distances, dtype=np.float64)
+        if fractions is None:
+            fractions = np.ones_like(self.distances)
+        self.fractions = np.asarray(fractions, dtype=np.float64)
+
+        self.energy_injection = make_energy_injection_model(**isotope_masses)
+
+        self.epochs, inverse_idx = np.unique(np.concatenate(epochs),
+                                             return_inverse=True)
+        split_idx = np.cumsum([len(item) for item in epochs])[:-1]
+        self.epoch_idx = np.split(inverse_idx, split_idx)
+        self.unit_light_curves = self.energy_injection.get_unit_light_curves(
+            self.epochs)
+
+        self._pool = None
+        self._pool_processes = None
+        self._shared = None
+
+    @property
+    def param_names(self):
+        return self.energy_injection.param_names
+
+    @property
+    def n_objects(self):
+        return len(self.epoch_idx)
+
+    def _get_scale(self, fractions, distances):
+        if fractions is None:
+            fractions = self.fractions
+        if distances is None:
+            distances = self.distances
+        return (np.asarray(fractions) /
+                (4 * np.pi * (np.asarray(distances) * mpc_to_cm)**2))
+
+    def calculate_light_curves(self, masses, fractions=None, distances=None):
+        """
+        Calculate the light curves of all objects in one pass
+
+        Parameters
+        ----------
+
+        masses: numpy.ndarray
+            isotope masses of shape (n_objects, n_params) in solar masses
+
+        fractions: numpy.ndarray
+            [default = fractions given at initialization]
+
+        distances: numpy.ndarray
+            distances in Mpc [default = distances given at initialization]
+
+        Returns
+        -------
+            : list of numpy.ndarray
+            luminosity density on each object's epochs
+        """
+        light_curves = (np.asarray(masses).dot(self.unit_light_curves.T) *
+                        self._get_scale(fractions, distances)[:, np.newaxis])
+        return [light_curves[i, epoch_idx]
+                for i, epoch_idx in enumerate(self.epoch_idx)]
+
+    def log_likelihood(self, masses, fractions=None, distances=None):
+        """
+        Log likelihood of each object
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_objects, )
+        """
+        light_curves = self.calculate_light_curves(masses, fractions,
+                                                   distances)
+        return np.array([
+            -0.5 * (((light_curve - lum_dens) / lum_dens_err)**2).sum()
+            for light_curve, lum_dens, lum_dens_err in zip(
+                light_curves, self.lum_dens, self.lum_dens_err)])
+
+    def _get_pool(self, processes):
+        if self._pool is None or self._pool_processes != processes:
+            self.close()
+            self._shared = SharedArrays.publish(
+                {'unit_light_curves': self.unit_light_curves})
+            self._pool = Pool(processes, initializer=_init_shared_worker,
+                              initargs=(self._shared.handle, ))
+            self._pool_processes = processes
+        return self._pool
+
+    def fit(self, processes=None, pool=None):
+        """
+        Fit the isotope masses of all objects with a non-negative least
+        squares solver. The fits are distributed over a process pool whose
+        workers attach to the unit light curves in shared memory. The pool
+        is created on the first call and reused by later calls with the same
+        number of processes.
+
+        Parameters
+        ----------
+
+        processes: ~int
+            number of worker processes; `None` uses all cores and 1 fits
+            in this process [default = None]
+
+        pool: ~multiprocessing.pool.Pool
+            pool of the caller to map the fits over instead; the unit light
+            curves are sent along with every object [default = None]
+
+        Returns
+        -------
+        masses : numpy.ndarray
+            fitted masses of shape (n_objects, n_params)
+        residual_norms : numpy.ndarray
+            norm of the weighted residual for each object
+        """
+        fit_args = list(zip(self.epoch_idx, self.lum_dens, self.lum_dens_err,
+                            self.fractions, self.distances))
+        if pool is not None:
+            # only the rows on each object's epochs are sent to the workers
+            results = pool.starmap(
+                _fit_object, [(self.unit_light_curves[item[0]],
+                               (slice(None), ) + item[1:])
+                              for item in fit_args])
+        elif processes == 1:
+            results = [_fit_object(self.unit_light_curves, item)
+                       for item in fit_args]
+        else:
+            results = self._get_pool(processes).map(_fit_shared_object,
+                                                    fit_args)
+
+        masses = np.array([item[0] for item in results])
+        residual_norms = np.array([item[1] for item in results])
+        return masses, residual_norms
+
+    def close(self):
+        """
+        Stop the worker pool and remove the shared unit light curves
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_processes = None
+        if self._shared is not None:
+            self._shared.unlink()
+            self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,4 +1,6 @@
+import numpy as np
 from scipy import stats
+from scipy.special import ndtr, ndtri
 
 
 class UniformPrior(object):
@@ -46,7 +48,7 @@ class GaussianPrior(object):
         self.sigma = sigma
 
     def __call__(self, cube):
-        return stats.norm.ppf(cube,scale=self.sigma,loc=self.m)
+        return self.m + self.sigma * ndtri(cube)
 
     def __repr__(self):
         return "gaussian prior - mean {0} std {1}".format(self.m, self.sigma)
@@ -54,7 +56,8 @@ class GaussianPrior(object):
 
 class PoissonPrior(object):
     """
-    A Poisson prior
+    A Poisson prior. The inverse CDF is looked up in a cumulative table that
+    is computed once.
 
     Parameters
     ----------
@@ -62,16 +65,88 @@ class PoissonPrior(object):
     m: ~float
         mean of the distribution
 
+    tail: ~float
+        the table extends until the CDF reaches 1 - tail [default = 1e-12]
 
     """
-    def __init__(self, m):
+    def __init__(self, m, tail=1e-12):
         self.m = m
+        k_max = int(stats.poisson.isf(tail, m)) + 1
+        self.cdf = stats.poisson.cdf(np.arange(k_max + 1), m)
 
     def __call__(self, cube):
-        return stats.poisson.ppf(cube,loc=self.m)
+        return np.searchsorted(self.cdf, cube, side='left').astype(np.float64)
 
     def __repr__(self):
-        return "poisson prior: loc {0}".format(self.m)
+        return "poisson prior - mean {0}".format(self.m)
+
+class TruncatedGaussianPrior(object):
+    """
+    A gaussian prior truncated to [lbound, ubound]
+
+    Parameters
+    ----------
+
+    m: ~float
+        mean of the distribution
+
+    sigma: ~float
+        sigma of the distribution
+
+    lbound: ~float
+        lower bound [default = 0.0]
+
+    ubound: ~float
+        upper bound [default = inf]
+    """
+
+    def __init__(self, m, sigma, lbound=0.0, ubound=np.inf):
+        self.m = m
+        self.sigma = sigma
+        self.lbound = lbound
+        self.ubound = ubound
+        self.cdf_lbound = ndtr((lbound - m) / sigma)
+        self.cdf_ubound = ndtr((ubound - m) / sigma)
+
+    def __call__(self, cube):
+        return self.m + self.sigma * ndtri(
+            self.cdf_lbound + cube * (self.cdf_ubound - self.cdf_lbound))
+
+    def __repr__(self):
+        return ("truncated gaussian prior - mean {0} std {1} lbound {2} "
+                "ubound {3}".format(self.m, self.sigma, self.lbound,
+                                    self.ubound))
+
+
+class LogUniformPrior(object):
+    """
+    A prior uniform in log - e.g. for isotope masses spanning several
+    orders of magnitude
+
+    Parameters
+    ----------
+
+    lbound: ~float
+        lower bound (> 0)
+
+    ubound: ~float
+        upper bound
+    """
+
+    def __init__(self, lbound, ubound):
+        self.lbound = lbound
+        self.ubound = ubound
+        self.log_lbound = np.log(lbound)
+        self.log_ubound = np.log(ubound)
+
+    def __call__(self, cube):
+        return np.exp(cube * (self.log_ubound - self.log_lbound) +
+                      self.log_lbound)
+
+    def __repr__(self):
+        return "log uniform prior lbound {0} ubound {1}".format(self.lbound,
+                                                                self.ubound)
+
 
 class FixedPrior(object):
     """
@@ -113,9 +188,30 @@ class PriorCollection(object):
         # will be given an array of values from 0 to 1 and transforms it
         # according to the prior distribution
 
-        for i in xrange(nparam):
+        for i in range(nparam):
             cube[i] = self.priors[i](cube[i])
 
+    def transform(self, cube):
+        """
+        Transform many points of the unit hypercube at once
+
+        Parameters
+        ----------
+
+        cube: ~numpy.ndarray
+            array of shape (n_points, n_params) with values from 0 to 1
+
+        Returns
+        -------
+            : ~numpy.ndarray
+            array of shape (n_points, n_params)
+        """
+        cube = np.asarray(cube, dtype=np.float64)
+        parameters = np.empty_like(cube)
+        for i, prior in enumerate(self.priors):
+            parameters[:, i] = prior(cube[:, i])
+        return parameters
+
     def _generate_prior_str(self):
         return [repr(item) for item in self.priors]
 
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import logging
+
+from tardisnuclear.multinest.fitting import MultiNestResult
+
+logger = logging.getLogger(__name__)
+
+
+class MultiNestRun(object):
+    """
+    A resumable MultiNest run in its own output directory.
+
+    MultiNest writes its resume files every `checkpoint_interval` iterations;
+    at each of these checkpoints the throughput of the likelihood is logged
+    and written to `metrics.json`. Restarting a run with the same `run_dir`
+    resumes from the last checkpoint. When the run is finished the
+    posterior is converted to HDF5 for `MultiNestResult.from_hdf5`; a
+    finished run (see `is_finished`) is not run again when resuming.
+
+    Parameters
+    ----------
+
+    log_likelihood: ~callable
+        MultiNest likelihood with signature (cube, ndim, nparam)
+
+    prior_transform: ~callable
+        MultiNest prior with signature (cube, ndim, nparam)
+
+    parameter_names: ~list of str
+
+    run_dir: ~str
+        output directory of the run
+
+    checkpoint_interval: ~int
+        number of iterations between checkpoints [default = 100]
+
+    **multinest_kwargs:
+        passed to `pymultinest.run`
+    """
+
+    basename = 'fit'
+    posterior_fname = 'posterior.h5'
+    posterior_key = 'posterior'
+    metrics_fname = 'metrics.json'
+
+    def __init__(self, log_likelihood, prior_transform, parameter_names,
+                 run_dir, checkpoint_interval=100, **multinest_kwargs):
+        self.log_likelihood = log_likelihood
+        self.prior_transform = prior_transform
+        self.parameter_names = list(parameter_names)
+        self.run_dir = run_dir
+        self.checkpoint_interval = checkpoint_interval
+        self.multinest_kwargs = multinest_kwargs
+
+        if not os.path.exists(run_dir):
+            os.makedirs(run_dir)
+        self.metrics = self._read_metrics()
+        self._run_calls = 0
+        self._run_likelihood_time = 0.0
+
+    @property
+    def outputfiles_basename(self):
+        return os.path.join(self.run_dir, self.basename)
+
+    @property
+    def can_resume(self):
+        return os.path.exists(self.outputfiles_basename + 'resume.dat')
+
+    @property
+    def is_finished(self):
+        """
+        Whether the posterior of a finished run has been written
+        """
+        return os.path.exists(os.path.join(self.run_dir,
+                                           self.posterior_fname))
+
+    @staticmethod
+    def _empty_metrics():
+        return {'likelihood_calls': 0, 'likelihood_time': 0.0,
+                'wall_time': 0.0, 'checkpoints': 0, 'finished': False}
+
+    def _read_metrics(self):
+        fname = os.path.join(self.run_dir, self.metrics_fname)
+        if os.path.exists(fname):
+            with open(fname) as fh:
+                return json.load(fh)
+        return self._empty_metrics()
+
+    def _write_metrics(self):
+        fname = os.path.join(self.run_dir, self.metrics_fname)
+        with open(fname + '.tmp', 'w') as fh:
+            json.dump(self.metrics, fh, indent=2)
+        os.replace(fname + '.tmp', fname)
+
+    def _update_metrics(self):
+        wall_time = time.time() - self._start_time
+        likelihood_calls = self._previous_metrics['likelihood_calls'] + (
+            self._run_calls)
+        likelihood_time = self._previous_metrics['likelihood_time'] + (
+            self._run_likelihood_time)
+        self.metrics.update(
+            likelihood_calls=likelihood_calls,
+            likelihood_time=likelihood_time,
+            wall_time=self._previous_metrics['wall_time'] + wall_time,
+            calls_per_s=self._run_calls / wall_time if wall_time > 0 else 0.0,
+            time_per_call=(self._run_likelihood_time / self._run_calls
+                           if self._run_calls > 0 else 0.0))
+
+    def _timed_log_likelihood(self, cube, ndim, nparam):
+        start = time.perf_counter()
+        log_likelihood = self.log_likelihood(cube, ndim, nparam)
+        self._run_likelihood_time += time.perf_counter() - start
+        self._run_calls += 1
+        return log_likelihood
+
+    def _checkpoint(self, n_samples, n_live, n_par, phys_live, posterior,
+                    param_constr, max_log_like, log_z, ins_log_z, log_z_err,
+                    context):
+        self.metrics['checkpoints'] += 1
+        self.metrics.update(n_samples=int(n_samples),
+                            max_log_likelihood=float(max_log_like),
+                            log_z=float(log_z), log_z_err=float(log_z_err))
+        self._update_metrics()
+        self._write_metrics()
+        logger.info('Checkpoint {checkpoints}: {likelihood_calls} likelihood '
+                    'calls, {calls_per_s:.1f} calls/s, {time_per_call:.2e} s '
+                    'per call, logZ {log_z:.3f} +- {log_z_err:.3f}'.format(
+            **self.metrics))
+
+    def run(self, resume=True):
+        """
+        Run (or resume) the sampler and convert the posterior to HDF5
+
+        Parameters
+        ----------
+
+        resume: ~bool
+            resume from the last checkpoint if there is one [default = True]
+
+        Returns
+        -------
+            : ~MultiNestResult
+        """
+        import pymultinest
+
+        resume = resume and self.can_resume
+        if resume:
+            logger.info('Resuming MultiNest run in {0}'.format(self.run_dir))
+        else:
+            self.metrics = self._empty_metrics()
+
+        self._previous_metrics = dict(self.metrics)
+        self._run_calls = 0
+        self._run_likelihood_time = 0.0
+        self._start_time = time.time()
+
+        pymultinest.run(self._timed_log_likelihood, self.prior_transform,
+                        len(self.parameter_names),
+                        outputfiles_basename=self.outputfiles_basename,
+                        resume=resume,
+                        n_iter_before_update=self.checkpoint_interval,
+                        dump_callback=self._checkpoint,
+                        **self.multinest_kwargs)
+
+        self._update_metrics()
+        self.metrics['finished'] = True
+        self._write_metrics()
+        logger.info('MultiNest run finished: {likelihood_calls} likelihood '
+                    'calls in {wall_time:.1f} s ({time_per_call:.2e} s per '
+                    'call)'.format(**self.metrics))
+
+        return self.convert_posterior()
+
+    def convert_posterior(self):
+        """
+        Convert the MultiNest text output to the HDF5 posterior format
+
+        Returns
+        -------
+            : ~MultiNestResult
+        """
+        result = MultiNestResult.from_multinest_basename(self.run_dir,
+                                                         self.parameter_names)
+        result.posterior_data.to_hdf(
+            os.path.join(self.run_dir, self.posterior_fname),
+            key=self.posterior_key, mode='w')
+        return result
+
+    @property
+    def result(self):
+        return MultiNestResult.from_hdf5(
+            os.path.join(self.run_dir, self.posterior_fname),
+            self.posterior_key)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from tardisnuclear.multinest.fitting import BolometricLightCurveModelIa
+from tardisnuclear.tests.helpers import (add_decay_radiation,
+                                         get_central_differences)
+
+params = [0.6, 0.02, 0.005, 1e-5, 0.9, 6.4]
+
+
+def make_model():
+    add_decay_radiation()
+    epochs = np.linspace(20, 900, 30)
+    model = BolometricLightCurveModelIa(epochs, None, None, *params[:4])
+    light_curve = model.calculate_light_curve(*params)
+    model.lum_dens = light_curve * (
+        1 + 0.05 * np.random.RandomState(0).normal(size=len(epochs)))
+    model.lum_dens_err = 0.05 * light_curve
+    return model
+
+
+def test_light_curve_jacobian_finite_differences():
+    model = make_model()
+    jacobian = model.calculate_light_curve_jacobian(*params)
+    assert jacobian.shape == (len(model.epochs), 6)
+    derivatives = get_central_differences(
+        lambda params: model.calculate_light_curve(*params), params,
+        relative_step=1e-4)
+    np.testing.assert_allclose(jacobian, np.column_stack(derivatives),
+                               rtol=1e-6)
+
+
+def test_log_likelihood_gradient_finite_differences():
+    model = make_model()
+    gradient = model.log_likelihood_gradient(*params)
+    derivatives = get_central_differences(
+        lambda params: model.log_likelihood(params, 6, 6), params,
+        relative_step=1e-4)
+    np.testing.assert_allclose(gradient, derivatives, rtol=1e-5)
+
+
+def test_single_precision_light_curves():
+    model = make_model()
+    samples = np.random.RandomState(1).uniform(
+        [0.3, 0.0, 0.0, 0.0, 0.5, 5.0], [0.9, 0.05, 0.01, 1e-4, 1.0, 50.0],
+        size=(50, 6))
+    light_curves = model.calculate_light_curves(samples)
+    single_light_curves, relative_error = model.calculate_light_curves(
+        samples, dtype=np.float32, return_error=True)
+    assert single_light_curves.dtype == np.float32
+    assert single_light_curves.shape == (50, len(model.epochs))
+    np.testing.assert_allclose(
+        light_curves[0], model.calculate_light_curve(*samples[0]), rtol=1e-12)
+    assert (np.abs(single_light_curves - light_curves) <=
+            relative_error * light_curves).all()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from tardisnuclear.multinest.fitting import BolometricLightCurveModelIa
+from tardisnuclear.multinest.joint import JointLightCurveFit
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+isotope_masses = dict(ni56=0.6, ni57=0.02, co55=0.005, ti44=1e-5)
+true_masses = np.array([[0.55, 0.015, 0.004, 1e-5],
+                        [0.7, 0.03, 0.002, 2e-5],
+                        [0.45, 0.01, 0.006, 0.0]])
+distances = np.array([6.4, 20.0, 45.0])
+fractions = np.array([1.0, 0.8, 0.9])
+
+
+def make_observations():
+    random_state = np.random.RandomState(0)
+    epochs, lum_dens, lum_dens_err = [], [], []
+    for i, masses in enumerate(true_masses):
+        object_epochs = np.sort(random_state.uniform(20, 900, size=25 + i))
+        model = BolometricLightCurveModelIa(object_epochs, None, None,
+                                            **isotope_masses)
+        light_curve = model.calculate_light_curve(
+            *masses, fraction=fractions[i], distance=distances[i])
+        err = 0.05 * light_curve
+        epochs.append(object_epochs)
+        lum_dens.append(light_curve + err * random_state.normal(
+            size=len(light_curve)))
+        lum_dens_err.append(err)
+    return epochs, lum_dens, lum_dens_err
+
+
+@pytest.fixture
+def joint_fit():
+    add_decay_radiation()
+    epochs, lum_dens, lum_dens_err = make_observations()
+    with JointLightCurveFit(epochs, lum_dens, lum_dens_err, distances,
+                            fractions, **isotope_masses) as joint_fit:
+        yield joint_fit, epochs, lum_dens, lum_dens_err
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_fit_matches_simple_fit(joint_fit, processes):
+    joint_fit, epochs, lum_dens, lum_dens_err = joint_fit
+    masses, residual_norms = joint_fit.fit(processes=processes)
+    assert masses.shape == (3, 4)
+
+    for i in range(joint_fit.n_objects):
+        model = BolometricLightCurveModelIa(epochs[i], lum_dens[i],
+                                            lum_dens_err[i], **isotope_masses)
+        object_masses, residual_norm, _ = model.simple_fit(fractions[i],
+                                                           distances[i])
+        np.testing.assert_allclose(masses[i], list(object_masses.values()),
+                                   rtol=1e-8, atol=1e-14)
+        assert residual_norms[i] == pytest.approx(residual_norm, rel=1e-8)
+
+
+def test_fit_reuses_pool(joint_fit):
+    joint_fit = joint_fit[0]
+    masses, _ = joint_fit.fit(processes=2)
+    pool, shared = joint_fit._pool, joint_fit._shared
+    np.testing.assert_array_equal(joint_fit.fit(processes=2)[0], masses)
+    assert joint_fit._pool is pool
+    assert joint_fit._shared is shared
+
+    joint_fit.close()
+    assert joint_fit._pool is None
+    assert joint_fit._shared is None
+
+
+def test_fit_caller_pool(joint_fit):
+    from multiprocessing import Pool
+    joint_fit = joint_fit[0]
+    with Pool(2) as pool:
+        masses, residual_norms = joint_fit.fit(pool=pool)
+    assert joint_fit._pool is None
+    np.testing.assert_array_equal(masses, joint_fit.fit(processes=1)[0])
@@ -0,0 +1,41 @@
+import numpy as np
+from scipy import stats
+
+from tardisnuclear.multinest.priors import (
+    GaussianPrior, PoissonPrior, TruncatedGaussianPrior, LogUniformPrior,
+    UniformPrior, FixedPrior, PriorCollection)
+
+cube = np.linspace(0.001, 0.999, 101)
+
+
+def test_gaussian_prior():
+    np.testing.assert_allclose(GaussianPrior(0.6, 0.1)(cube),
+                               stats.norm.ppf(cube, loc=0.6, scale=0.1))
+
+
+def test_poisson_prior():
+    np.testing.assert_array_equal(PoissonPrior(4.5)(cube),
+                                  stats.poisson.ppf(cube, 4.5))
+
+
+def test_truncated_gaussian_prior():
+    prior = TruncatedGaussianPrior(0.1, 0.2, lbound=0.0, ubound=0.5)
+    np.testing.assert_allclose(
+        prior(cube), stats.truncnorm.ppf(cube, -0.5, 2.0, loc=0.1, scale=0.2))
+
+
+def test_log_uniform_prior():
+    prior = LogUniformPrior(1e-6, 1e-2)
+    np.testing.assert_allclose(prior(np.array([0.0, 0.5, 1.0])),
+                               [1e-6, 1e-4, 1e-2])
+
+
+def test_prior_collection_transform():
+    priors = PriorCollection([UniformPrior(0, 2), FixedPrior(6.4),
+                              GaussianPrior(1.0, 0.1)])
+    points = np.random.RandomState(0).uniform(size=(10, 3))
+    parameters = priors.transform(points)
+    for point, parameter in zip(points, parameters):
+        point = list(point)
+        priors.prior_transform(point, 3, 3)
+        np.testing.assert_allclose(parameter, point)
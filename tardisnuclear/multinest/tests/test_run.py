@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import types
+
+import numpy as np
+import pytest
+
+from tardisnuclear.multinest.fitting import BolometricLightCurveModelIa
+from tardisnuclear.multinest.priors import PriorCollection, UniformPrior
+from tardisnuclear.multinest.run import MultiNestRun
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+parameter_names = ['a', 'b']
+
+
+def log_likelihood(cube, ndim, nparam):
+    return -0.5 * sum(cube[i]**2 for i in range(ndim))
+
+
+def prior_transform(cube, ndim, nparam):
+    pass
+
+
+@pytest.fixture
+def multinest_calls(monkeypatch):
+    """
+    Replace `pymultinest.run` by a sampler that evaluates the likelihood
+    on a few points, checkpoints once and writes the MultiNest output files
+    """
+    calls = []
+
+    def run(log_likelihood, prior_transform, n_dims, outputfiles_basename,
+            resume, n_iter_before_update, dump_callback, **kwargs):
+        calls.append(dict(kwargs, resume=resume,
+                          n_iter_before_update=n_iter_before_update))
+        points = np.random.RandomState(0).uniform(size=(5, n_dims))
+        log_likelihoods = [log_likelihood(list(point), n_dims, n_dims)
+                           for point in points]
+        dump_callback(len(points), 5, n_dims, None, None, None,
+                      max(log_likelihoods), -1.5, -1.5, 0.1, None)
+        with open(outputfiles_basename + 'resume.dat', 'w') as fh:
+            fh.write('T\n')
+        np.savetxt(outputfiles_basename + '.txt',
+                   np.column_stack((np.full(len(points), 0.2),
+                                    -2 * np.array(log_likelihoods), points)))
+
+    monkeypatch.setitem(sys.modules, 'pymultinest',
+                        types.SimpleNamespace(run=run))
+    return calls
+
+
+def test_run_layout(tmpdir, multinest_calls):
+    run_dir = str(tmpdir.join('run'))
+    mn_run = MultiNestRun(log_likelihood, prior_transform, parameter_names,
+                          run_dir, checkpoint_interval=50, n_live_points=5)
+    assert not mn_run.can_resume
+    assert not mn_run.is_finished
+    result = mn_run.run()
+
+    assert multinest_calls == [dict(n_live_points=5, resume=False,
+                                    n_iter_before_update=50)]
+    assert sorted(os.listdir(run_dir)) == ['fit.txt', 'fitresume.dat',
+                                           'metrics.json', 'posterior.h5']
+    assert mn_run.can_resume
+    assert mn_run.is_finished
+    assert result.parameter_names == parameter_names
+    assert len(result.posterior_data) == 5
+
+    with open(os.path.join(run_dir, 'metrics.json')) as fh:
+        metrics = json.load(fh)
+    assert metrics['likelihood_calls'] == 5
+    assert metrics['checkpoints'] == 1
+    assert metrics['finished']
+    assert metrics['n_samples'] == 5
+    assert metrics['log_z'] == -1.5
+    assert metrics['likelihood_time'] >= 0.0
+    np.testing.assert_allclose(
+        mn_run.result.posterior_data.values, result.posterior_data.values)
+
+    # resuming adds to the metrics of the earlier run
+    MultiNestRun(log_likelihood, prior_transform, parameter_names,
+                 run_dir).run()
+    assert multinest_calls[-1]['resume']
+    with open(os.path.join(run_dir, 'metrics.json')) as fh:
+        assert json.load(fh)['likelihood_calls'] == 10
+
+
+def test_multinest_fit_skips_finished_run(tmpdir, multinest_calls):
+    add_decay_radiation()
+    epochs = np.linspace(20, 300, 10)
+    model = BolometricLightCurveModelIa(epochs, np.ones(10), np.ones(10),
+                                        0.6, 0.02, 0.005, 1e-5)
+    priors = PriorCollection([UniformPrior(0, 1)] * 6)
+    run_dir = str(tmpdir.join('run'))
+
+    result = model.multinest_fit(priors, run_dir=run_dir)
+    assert len(multinest_calls) == 1
+    assert result.parameter_names == ['ni56', 'ni57', 'co55', 'ti44',
+                                      'fraction', 'distance']
+
+    resumed_result = model.multinest_fit(priors, run_dir=run_dir)
+    assert len(multinest_calls) == 1
+    np.testing.assert_allclose(resumed_result.posterior_data.values,
+                               result.posterior_data.values)
+
+    model.multinest_fit(priors, run_dir=run_dir, resume=False)
+    assert len(multinest_calls) == 2
+    assert not multinest_calls[-1]['resume']
@@ -0,0 +1,248 @@
+import numpy as np
+
+from pyne import data
+
+from astropy import units as u
+
+from tardisnuclear.nuclides import get_nuc_id, get_nuc_name
+
+u_to_g = u.u.to(u.g)
+
+# nuclide id -> list of (child id, branch ratio)
+_decay_children_cache = {}
+# nuclide id -> (decay constant, half-life, half-life uncertainty, atomic
+# mass in g)
+_nuclide_constants_cache = {}
+_nuclear_constants_cache = {}
+# snapshot id of the installed nuclear data snapshot (None: pyne data)
+_installed_snapshot_id = None
+
+
+def set_installed_snapshot_id(snapshot_id):
+    """
+    Record the id of the installed nuclear data snapshot for
+    `get_nuclear_data_version`
+    """
+    global _installed_snapshot_id
+    _installed_snapshot_id = snapshot_id
+
+
+def get_nuclear_data_version():
+    """
+    Identifier of the nuclear data in use: the id of the installed snapshot
+    or the pyne version
+
+    Returns
+    -------
+        : str
+    """
+    if _installed_snapshot_id is not None:
+        return 'snapshot-{0}'.format(_installed_snapshot_id)
+    import pyne
+    return 'pyne-{0}'.format(getattr(pyne, '__version__', 'unknown'))
+
+
+def get_decay_children(nuc_id):
+    """
+    Decay children of a nuclide with their branch ratios
+
+    Parameters
+    ----------
+    nuc_id : int
+
+    Returns
+    -------
+        : list of tuple
+        (child id, branch ratio)
+    """
+    if nuc_id not in _decay_children_cache:
+        _decay_children_cache[nuc_id] = [
+            (child_id, data.branch_ratio(nuc_id, child_id))
+            for child_id in sorted(data.decay_children(nuc_id))]
+    return _decay_children_cache[nuc_id]
+
+
+def get_half_life_uncertainty(nuc_id):
+    """
+    Uncertainty of the half-life (s) of a nuclide from the ENSDF decay data
+    of pyne (0 if not available)
+    """
+    try:
+        half_lives = data.decay_half_life_byparent(nuc_id)
+    except (AttributeError, RuntimeError, ValueError):
+        return 0.0
+    for half_life, uncertainty in half_lives:
+        if np.isfinite(uncertainty) and uncertainty > 0:
+            return float(uncertainty)
+    return 0.0
+
+
+def get_nuclide_constants(nuc_id):
+    """
+    Decay constant (1/s), half-life (s), half-life uncertainty (s) and
+    atomic mass (g) of a nuclide
+
+    Parameters
+    ----------
+    nuc_id : int
+
+    Returns
+    -------
+        : tuple of float
+    """
+    if nuc_id not in _nuclide_constants_cache:
+        half_life = data.half_life(nuc_id)
+        _nuclide_constants_cache[nuc_id] = (
+            data.decay_const(nuc_id), half_life,
+            get_half_life_uncertainty(nuc_id) if np.isfinite(half_life)
+            else 0.0,
+            data.atomic_mass(nuc_id) * u_to_g)
+    return _nuclide_constants_cache[nuc_id]
+
+
+def get_nuclear_constants(nuc_ids):
+    """
+    Get the (shared) nuclear constants table of a list of nuclides
+
+    Parameters
+    ----------
+    nuc_ids : list of int
+        nuclide ids
+
+    Returns
+    -------
+        : NuclearConstants
+    """
+    nuc_ids = tuple(sorted(nuc_ids))
+    if nuc_ids not in _nuclear_constants_cache:
+        _nuclear_constants_cache[nuc_ids] = NuclearConstants(nuc_ids)
+    return _nuclear_constants_cache[nuc_ids]
+
+
+class NuclearConstants(object):
+    """
+    Decay constants, half-lives and atomic masses of a set of nuclides as
+    aligned arrays in nuclide id order. They are read from pyne once when
+    the table is built unless they were installed before (e.g. from a
+    nuclear data snapshot, see `install`).
+
+    Parameters
+    ----------
+    nuc_ids : list of int
+        nuclide ids
+    """
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Build the table from the arrays of `get_arrays` (e.g. memory-mapped
+        or shared) without reading pyne
+
+        Parameters
+        ----------
+        arrays : dict of numpy.ndarray
+
+        Returns
+        -------
+            : NuclearConstants
+        """
+        nuc_ids = [int(nuc_id) for nuc_id in arrays['nuc_ids']]
+        nuc_idx = {nuc_id: i for i, nuc_id in enumerate(nuc_ids)}
+        decay_children = [[] for nuc_id in nuc_ids]
+        for parent_id, child_id, branch_ratio in zip(
+                arrays['branch_parents'], arrays['branch_children'],
+                arrays['branch_ratios']):
+            decay_children[nuc_idx[int(parent_id)]].append(
+                (int(child_id), float(branch_ratio)))
+
+        nuclear_constants = cls.__new__(cls)
+        nuclear_constants._set_arrays(
+            nuc_ids, arrays['decay_constants'], arrays['half_lives'],
+            arrays['half_life_uncertainties'], arrays['atomic_masses'],
+            decay_children)
+        return nuclear_constants
+
+    def __init__(self, nuc_ids):
+        nuc_ids = sorted(nuc_ids)
+        decay_constants, half_lives, half_life_uncertainties, atomic_masses = (
+            np.array([get_nuclide_constants(nuc_id)
+                      for nuc_id in nuc_ids]).reshape(-1, 4).T)
+        self._set_arrays(nuc_ids, decay_constants, half_lives,
+                         half_life_uncertainties, atomic_masses,
+                         [get_decay_children(nuc_id) for nuc_id in nuc_ids])
+
+    def _set_arrays(self, nuc_ids, decay_constants, half_lives,
+                    half_life_uncertainties, atomic_masses, decay_children):
+        self.nuc_ids = list(nuc_ids)
+        self.isotopes = [get_nuc_name(nuc_id) for nuc_id in self.nuc_ids]
+        self.nuc_idx = {nuc_id: i for i, nuc_id in enumerate(self.nuc_ids)}
+        # decay constants in 1/s
+        self.decay_constants = np.asarray(decay_constants)
+        # half-lives in s
+        self.half_lives = np.asarray(half_lives)
+        self.half_life_uncertainties = np.asarray(half_life_uncertainties)
+        # atomic masses in g
+        self.atomic_masses = np.asarray(atomic_masses)
+        self.decay_children = decay_children
+        for array in (self.decay_constants, self.half_lives,
+                      self.half_life_uncertainties, self.atomic_masses):
+            array.setflags(write=False)
+
+    def get_arrays(self):
+        """
+        The table as flat arrays, with the decay children as aligned
+        (parent, child, branch ratio) arrays (see `from_arrays`)
+
+        Returns
+        -------
+            : dict of numpy.ndarray
+        """
+        branches = [(nuc_id, child_id, branch_ratio)
+                    for nuc_id, children in zip(self.nuc_ids,
+                                                self.decay_children)
+                    for child_id, branch_ratio in children]
+        return {'nuc_ids': np.array(self.nuc_ids, dtype=np.int64),
+                'decay_constants': self.decay_constants,
+                'half_lives': self.half_lives,
+                'half_life_uncertainties': self.half_life_uncertainties,
+                'atomic_masses': self.atomic_masses,
+                'branch_parents': np.array([branch[0] for branch in branches],
+                                           dtype=np.int64),
+                'branch_children': np.array([branch[1] for branch in branches],
+                                            dtype=np.int64),
+                'branch_ratios': np.array([branch[2] for branch in branches],
+                                          dtype=np.float64)}
+
+    def install(self):
+        """
+        Put the constants and decay children of all nuclides into the caches
+        of `get_nuclide_constants`, `get_decay_children` and
+        `get_nuclear_constants`, so that tables and decay chains of these
+        nuclides are built from this table instead of pyne
+        """
+        for i, nuc_id in enumerate(self.nuc_ids):
+            _nuclide_constants_cache[nuc_id] = (
+                float(self.decay_constants[i]), float(self.half_lives[i]),
+                float(self.half_life_uncertainties[i]),
+                float(self.atomic_masses[i]))
+            _decay_children_cache[nuc_id] = list(self.decay_children[i])
+        # tables built before may hold other constants for these nuclides
+        _nuclear_constants_cache.clear()
+        _nuclear_constants_cache[tuple(self.nuc_ids)] = self
+
+    def __len__(self):
+        return len(self.nuc_ids)
+
+    def get_index(self, nuclides):
+        """
+        Positions of nuclides (names, aliases or ids) in the table
+
+        Returns
+        -------
+            : numpy.ndarray
+        """
+        return np.array([self.nuc_idx[get_nuc_id(nuclide)]
+                         for nuclide in nuclides], dtype=np.int64)
+
+    def __repr__(self):
+        return '<NuclearConstants {0}>'.format(' '.join(self.isotopes))
@@ -1,5 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from astropy import units as u, constants as const
+
 from tardisnuclear.io import get_decay_radiation
-from pyne import nucname
+from tardisnuclear.nuclides import get_nuc_name
+
+electron_rest_energy = (const.m_e * const.c**2).cgs.value
+
+energy_channels = ('beta_minus', 'beta_plus', 'annihilation', 'electrons',
+                   'x_rays', 'gamma_rays')
+lepton_channels = ('beta_minus', 'beta_plus', 'electrons')
+em_channels = ('annihilation', 'x_rays', 'gamma_rays')
+
+# decay radiation data per isotope shared by all DecayRadiation instances
+_decay_radiation_cache = {}
 
 class DecayRadiation(object):
 
@@ -9,48 +24,165 @@ class DecayRadiation(object):
 
     def __getitem__(self, item):
         try:
-            isotope = item.title()
-        except AttributeError:
-            try:
-                nucname.name(item)
-            except RuntimeError:
-                raise ValueError('item is neither a integer or string that '
-                                 'identifies an isotope')
-            else:
-                isotope = nucname.name(item)
+            isotope = get_nuc_name(item)
+        except ValueError:
+            raise ValueError('item is neither a integer or string that '
+                             'identifies an isotope')
 
         return self.data[isotope]
 
+    def get_channel_energy_per_decay(self, isotopes, cutoff_em_energy=np.inf):
+        """
+        Energy per decay in each of the `energy_channels` for each of the
+        isotopes. The positron kinetic energy (beta_plus) is separated from
+        the 511 keV annihilation photons (annihilation), which are not
+        counted in gamma_rays; if the annihilation lines are not tabulated
+        two photons of m_e c^2 are added per positron. Photons (annihilation,
+        x_rays and gamma_rays) only count below `cutoff_em_energy`.
+
+        Parameters
+        ----------
+        isotopes : list of str
+        cutoff_em_energy : float or astropy.Quantity
+            (eV if float) [default = +inf]
+
+        Returns
+        -------
+            : pandas.DataFrame
+            of shape (n_channels, n_isotopes) in erg
+        """
+        cutoff_energy = u.Quantity(cutoff_em_energy, u.eV).to(u.erg).value
+        channel_idx = {channel: i for i, channel in enumerate(energy_channels)}
+        data = np.zeros((len(energy_channels), len(isotopes)))
+        for j, isotope in enumerate(isotopes):
+            decay_rad = self[isotope]
+            for channel in lepton_channels:
+                table = decay_rad.get(channel, None)
+                if table is not None:
+                    data[channel_idx[channel], j] = (
+                        table.energy * table.intensity).sum()
+
+            x_rays = decay_rad.get('x_rays', None)
+            if x_rays is not None:
+                below_cutoff = x_rays.energy.values < cutoff_energy
+                data[channel_idx['x_rays'], j] = (
+                    x_rays.energy.values * x_rays.intensity.values)[
+                    below_cutoff].sum()
+
+            gamma_rays = decay_rad.get('gamma_rays', None)
+            annihilation_mask = np.zeros(0, dtype=bool)
+            if gamma_rays is not None:
+                energy_per_decay = (gamma_rays.energy.values *
+                                    gamma_rays.intensity.values)
+                energy_per_decay[gamma_rays.energy.values >=
+                                 cutoff_energy] = 0.0
+                annihilation_mask = gamma_rays.type.str.startswith(
+                    'Annihil').values
+                data[channel_idx['gamma_rays'], j] = (
+                    energy_per_decay[~annihilation_mask].sum())
+                data[channel_idx['annihilation'], j] = (
+                    energy_per_decay[annihilation_mask].sum())
+
+            beta_plus = decay_rad.get('beta_plus', None)
+            if (beta_plus is not None and not annihilation_mask.any() and
+                    electron_rest_energy < cutoff_energy):
+                # two photons of m_e c^2 for every positron
+                data[channel_idx['annihilation'], j] = (
+                    2 * electron_rest_energy * beta_plus.intensity.sum())
+
+        return pd.DataFrame(data=data, index=list(energy_channels),
+                            columns=list(isotopes))
+
+    def get_line_list(self, isotopes, channels=('x_rays', 'gamma_rays')):
+        """
+        Collect the lines of the isotopes into one table
+
+        Parameters
+        ----------
+        isotopes : list of str
+            isotopes; `isotope_idx` indexes into this list
+        channels : tuple of str
+            [default = ('x_rays', 'gamma_rays')]
+
+        Returns
+        -------
+            : pandas.DataFrame
+            with columns isotope_idx, energy (erg), intensity and
+            energy_per_decay (erg)
+        """
+        line_tables = []
+        for isotope_idx, isotope in enumerate(isotopes):
+            for channel in channels:
+                table = self[isotope].get(channel, None)
+                if table is None or len(table) == 0:
+                    continue
+                line_tables.append(pd.DataFrame(
+                    {'isotope_idx': isotope_idx,
+                     'energy': table.energy.values.astype(np.float64),
+                     'intensity': table.intensity.values.astype(np.float64)}))
+
+        if len(line_tables) == 0:
+            lines = pd.DataFrame({'isotope_idx': np.zeros(0, dtype=np.int64),
+                                  'energy': np.zeros(0),
+                                  'intensity': np.zeros(0)})
+        else:
+            lines = pd.concat(line_tables, ignore_index=True)
+        lines['energy_per_decay'] = lines.energy * lines.intensity
+        return lines
+
 
     @staticmethod
-    def _get_decay_radiation_data(isotope_list):
+    def _add_energy_per_decay(isotope_nuclear_data):
+        for data_name, data_table in list(isotope_nuclear_data.items()):
+            if (('energy' in data_table.columns)
+                and ('intensity' in data_table.columns)):
+                data_table['energy_per_decay'] = (data_table.energy *
+                                                  data_table.intensity)
+                isotope_nuclear_data[
+                    ('total_{0}_energy_per_decay'.format(data_name))] = \
+                    data_table.energy_per_decay.sum()
+
+                leptons_energy = (
+                    isotope_nuclear_data.get(
+                        'total_beta_plus_energy_per_decay', 0.0) +
+                    isotope_nuclear_data.get(
+                        'total_beta_minus_energy_per_decay', 0.0) +
+                    isotope_nuclear_data.get(
+                        'total_electrons_energy_per_decay', 0.0))
+                isotope_nuclear_data['total_lepton_energy_per_decay'] = (
+                    leptons_energy
+                )
+        return isotope_nuclear_data
+
+    @classmethod
+    def add_to_cache(cls, decay_radiation):
+        """
+        Add decay radiation tables (e.g. from a nuclear data snapshot) to
+        the cache shared by all instances
+
+        Parameters
+        ----------
+        decay_radiation : dict
+            isotope name to dict of tables as returned by
+            `tardisnuclear.io.get_decay_radiation`
+        """
+        for nuclear_name, isotope_nuclear_data in decay_radiation.items():
+            _decay_radiation_cache[nuclear_name] = cls._add_energy_per_decay(
+                dict(isotope_nuclear_data))
+
+    @classmethod
+    def _get_decay_radiation_data(cls, isotope_list):
         decay_radiation = {}
         print("Reading", end='')
         for nuclear_name in isotope_list:
+            if nuclear_name in _decay_radiation_cache:
+                decay_radiation[nuclear_name] = _decay_radiation_cache[
+                    nuclear_name]
+                continue
             print(nuclear_name)
-            isotope_nuclear_data = get_decay_radiation(nuclear_name)
-            for data_name, data_table in list(isotope_nuclear_data.items()):
-                if (('energy' in data_table.columns)
-                    and ('intensity' in data_table.columns)):
-                    data_table['energy_per_decay'] = (data_table.energy *
-                                                      data_table.intensity)
-                    isotope_nuclear_data[
-                        ('total_{0}_energy_per_decay'.format(data_name))] = \
-                        data_table.energy_per_decay.sum()
-
-                    leptons_energy = (
-                        isotope_nuclear_data.get(
-                            'total_beta_plus_energy_per_decay', 0.0) +
-                        isotope_nuclear_data.get(
-                            'total_beta_minus_energy_per_decay', 0.0) +
-                        isotope_nuclear_data.get(
-                            'total_electrons_energy_per_decay', 0.0))
-                    isotope_nuclear_data['total_lepton_energy_per_decay'] = (
-                        leptons_energy
-                    )
-
-
+            isotope_nuclear_data = cls._add_energy_per_decay(
+                get_decay_radiation(nuclear_name))
             decay_radiation[nuclear_name] = isotope_nuclear_data
+            _decay_radiation_cache[nuclear_name] = isotope_nuclear_data
 
         return decay_radiation
-
@@ -0,0 +1,141 @@
+"""
+Interned nuclide identities.
+
+Every nuclide name or id that is resolved once through `pyne.nucname` is
+kept in bidirectional id <-> name dictionaries together with the alias it
+was given as (e.g. 'ni56', 'NI56', 'Ni-56' or 280560000), so that any later
+resolution is a single dictionary lookup.
+"""
+
+from pyne import nucname
+
+# alias (as given) -> nuclide id
+_alias_to_id = {}
+# nuclide id -> canonical name (e.g. Ni56)
+_id_to_name = {}
+# canonical name -> nuclide id
+_name_to_id = {}
+# nuclide id -> atomic number
+_id_to_znum = {}
+
+
+def _normalize_alias(nuclide):
+    return nuclide.strip().replace('-', '').replace('_', '').lower()
+
+
+def _resolve(nuclide):
+    if isinstance(nuclide, str):
+        normalized_alias = _normalize_alias(nuclide)
+        if normalized_alias in _alias_to_id:
+            return _alias_to_id[normalized_alias]
+        resolved = normalized_alias
+    else:
+        resolved = int(nuclide)
+    try:
+        nuc_id = nucname.id(resolved)
+        name = nucname.name(nuc_id)
+        mass_number = nucname.anum(nuc_id)
+    except (RuntimeError, ValueError, TypeError):
+        raise ValueError('{0} is not a valid nuclide'.format(nuclide))
+    # pyne resolves bare elements (e.g. Fe) to ids with mass number 0
+    if mass_number == 0:
+        raise ValueError('{0} is an element, not a nuclide'.format(nuclide))
+    _id_to_name[nuc_id] = name
+    _id_to_znum[nuc_id] = nucname.znum(nuc_id)
+    _name_to_id[name] = nuc_id
+    _alias_to_id[name] = nuc_id
+    _alias_to_id[_normalize_alias(name)] = nuc_id
+    if isinstance(nuclide, str):
+        _alias_to_id[normalized_alias] = nuc_id
+    return nuc_id
+
+
+def get_nuc_id(nuclide):
+    """
+    Nuclide id of a nuclide name, alias or id
+
+    Parameters
+    ----------
+    nuclide : str or int
+        e.g. 'Ni56', 'ni56', 'Ni-56' or 280560000
+
+    Returns
+    -------
+        : int
+    """
+    try:
+        return _alias_to_id[nuclide]
+    except (KeyError, TypeError):
+        pass
+    if nuclide in _id_to_name:
+        return nuclide
+    nuc_id = _resolve(nuclide)
+    _alias_to_id[nuclide] = nuc_id
+    return nuc_id
+
+
+def get_nuc_name(nuclide):
+    """
+    Canonical name (e.g. Ni56) of a nuclide name, alias or id
+
+    Parameters
+    ----------
+    nuclide : str or int
+
+    Returns
+    -------
+        : str
+    """
+    try:
+        return _id_to_name[_alias_to_id[nuclide]]
+    except (KeyError, TypeError):
+        pass
+    try:
+        return _id_to_name[nuclide]
+    except (KeyError, TypeError):
+        return _id_to_name[get_nuc_id(nuclide)]
+
+
+def get_znum(nuclide):
+    """
+    Atomic number of a nuclide name, alias or id
+
+    Parameters
+    ----------
+    nuclide : str or int
+
+    Returns
+    -------
+        : int
+    """
+    return _id_to_znum[get_nuc_id(nuclide)]
+
+
+def get_element(nuclide):
+    """
+    Element symbol (e.g. Ni) of a nuclide name, alias or id
+
+    Parameters
+    ----------
+    nuclide : str or int
+
+    Returns
+    -------
+        : str
+    """
+    return nucname.zz_name[get_znum(nuclide)]
+
+
+def is_nuclide(nuclide):
+    """
+    Whether a name, alias or id identifies a nuclide
+
+    Returns
+    -------
+        : bool
+    """
+    try:
+        get_nuc_id(nuclide)
+    except ValueError:
+        return False
+    return True
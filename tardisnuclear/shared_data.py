@@ -0,0 +1,294 @@
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# alignment of the arrays in the shared memory block in bytes
+ALIGNMENT = 64
+
+
+class SharedArrays(object):
+    """
+    Named numpy arrays in one `multiprocessing.shared_memory` block.
+
+    The publishing process creates the block with `publish` and hands the
+    (picklable) `handle` to its workers, which `attach` zero-copy read-only
+    views. The publisher must `unlink` the block when all workers are done.
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory
+
+    layout : list of tuple
+        (name, dtype string, shape, offset) for every array
+
+    owner : bool
+        whether this instance created the block
+    """
+
+    @classmethod
+    def publish(cls, arrays):
+        """
+        Copy arrays into a new shared memory block
+
+        Parameters
+        ----------
+        arrays : dict
+            name to numpy.ndarray
+
+        Returns
+        -------
+            : SharedArrays
+        """
+        layout = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shared_arrays = cls(shm, layout, owner=True)
+        for name, _, _, _ in layout:
+            shared_arrays._arrays[name].setflags(write=True)
+            shared_arrays._arrays[name][...] = arrays[name]
+            shared_arrays._arrays[name].setflags(write=False)
+        return shared_arrays
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attach to a published shared memory block
+
+        Parameters
+        ----------
+        handle : dict
+            `handle` of the publishing SharedArrays
+
+        Returns
+        -------
+            : SharedArrays
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=handle['name'], track=False)
+        except TypeError:
+            # python < 3.13 - the resource tracker is shared with the
+            # publishing parent process
+            shm = shared_memory.SharedMemory(name=handle['name'])
+        return cls(shm, handle['layout'], owner=False)
+
+    def __init__(self, shm, layout, owner=False):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self._arrays = OrderedDict()
+        for name, dtype, shape, offset in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                               offset=offset)
+            array.setflags(write=False)
+            self._arrays[name] = array
+
+    @property
+    def handle(self):
+        return {'name': self.shm.name, 'layout': self.layout}
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def keys(self):
+        return self._arrays.keys()
+
+    def __getitem__(self, item):
+        return self._arrays[item]
+
+    def __contains__(self, item):
+        return item in self._arrays
+
+    def close(self):
+        self._arrays.clear()
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Close and remove the shared memory block (publisher only)
+        """
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __repr__(self):
+        return '<SharedArrays {0} ({1} bytes): {2}>'.format(
+            self.shm.name, self.nbytes, ', '.join(self.keys()))
+
+
+def get_nuclear_data_arrays(nuclides, cutoff_em_energy=np.inf):
+    """
+    Collect the nuclear data of the decay chain of the nuclides as arrays in
+    chain order - the nuclear constants and decay branches (see
+    `NuclearConstants.get_arrays`), the eigenvectors of the chain, the
+    energy per decay in every channel and the X-ray/gamma-ray line list.
+    The decay radiation is read through
+    `tardisnuclear.nuclear_data.DecayRadiation` (and its cache).
+
+    Parameters
+    ----------
+    nuclides : list of str or int
+        nuclide names or ids
+    cutoff_em_energy : float or astropy.Quantity
+        photon energy cutoff (eV if float) [default = +inf]
+
+    Returns
+    -------
+        : OrderedDict
+        name to numpy.ndarray
+    """
+    from tardisnuclear.decay_chain import get_decay_chain
+    from tardisnuclear.nuclear_data import DecayRadiation
+
+    decay_chain = get_decay_chain(nuclides)
+    decay_radiation = DecayRadiation(decay_chain.isotopes)
+    channel_energy_per_decay = decay_radiation.get_channel_energy_per_decay(
+        decay_chain.isotopes, cutoff_em_energy=cutoff_em_energy)
+    lines = decay_radiation.get_line_list(decay_chain.isotopes)
+    arrays = OrderedDict(decay_chain.nuclear_constants.get_arrays())
+    arrays.update([
+        ('eigenvectors', decay_chain.eigenvectors),
+        ('inverse_eigenvectors', decay_chain.inverse_eigenvectors),
+        ('channel_energy_per_decay', channel_energy_per_decay.values),
+        ('line_isotope_idx', lines.isotope_idx.values.astype(np.int64)),
+        ('line_energy', lines.energy.values.astype(np.float64)),
+        ('line_intensity', lines.intensity.values.astype(np.float64))])
+    return arrays
+
+
+def publish_nuclear_data(nuclides, cutoff_em_energy=np.inf, **arrays):
+    """
+    Publish the nuclear data of the decay chain of the nuclides (see
+    `get_nuclear_data_arrays`) and any further arrays into shared memory
+
+    Returns
+    -------
+        : SharedArrays
+    """
+    nuclear_data_arrays = get_nuclear_data_arrays(
+        nuclides, cutoff_em_energy=cutoff_em_energy)
+    nuclear_data_arrays.update(arrays)
+    return SharedArrays.publish(nuclear_data_arrays)
+
+
+class SharedNuclearData(object):
+    """
+    Nuclear data of a decay chain rebuilt from the arrays of
+    `get_nuclear_data_arrays` without reading pyne or the decay radiation
+    database. All arrays stay views of `arrays`, e.g. a `SharedArrays`
+    block attached by a worker process.
+
+    Parameters
+    ----------
+    arrays : dict or SharedArrays
+        name to numpy.ndarray
+    """
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attach to nuclear data published with `publish_nuclear_data`
+
+        Parameters
+        ----------
+        handle : dict
+            `handle` of the publishing SharedArrays
+
+        Returns
+        -------
+            : SharedNuclearData
+        """
+        return cls(SharedArrays.attach(handle))
+
+    def __init__(self, arrays):
+        import pandas as pd
+
+        from tardisnuclear.decay_chain import DecayChain
+        from tardisnuclear.nuclear_data import energy_channels
+
+        self.arrays = arrays
+        self.decay_chain = DecayChain.from_arrays(arrays)
+        self.nuclear_constants = self.decay_chain.nuclear_constants
+        self.isotopes = self.decay_chain.isotopes
+        self.channel_energy_per_decay = pd.DataFrame(
+            arrays['channel_energy_per_decay'], index=list(energy_channels),
+            columns=self.isotopes, copy=False)
+        # energy per decay (erg) of each isotope in chain order
+        self.energy_per_decay = arrays['channel_energy_per_decay'].sum(axis=0)
+        self.lines = pd.DataFrame(
+            {'isotope_idx': arrays['line_isotope_idx'],
+             'energy': arrays['line_energy'],
+             'intensity': arrays['line_intensity']}, copy=False)
+
+    def __len__(self):
+        return len(self.isotopes)
+
+    def install(self):
+        """
+        Install the nuclear constants and the decay chain for
+        `get_nuclear_constants` and `get_decay_chain` (see
+        `DecayChain.install`)
+        """
+        self.decay_chain.install()
+
+    def get_numbers(self, masses):
+        """
+        Number of nuclei in chain order
+
+        Parameters
+        ----------
+        masses : dict or pandas.Series
+            isotope names or ids to masses in solar masses
+
+        Returns
+        -------
+            : numpy.ndarray
+        """
+        import pandas as pd
+        from astropy import units as u
+
+        masses = pd.Series(masses, dtype=np.float64)
+        mass_g = np.zeros(len(self))
+        np.add.at(mass_g, self.nuclear_constants.get_index(masses.index),
+                  masses.values * u.Msun.to(u.g))
+        return mass_g / self.decay_chain.atomic_masses
+
+    def calculate_injected_energy_per_s(self, numbers, epochs):
+        """
+        Injected energy per second (erg/s) of every isotope with the closed
+        form decay of the chain
+
+        Parameters
+        ----------
+        numbers : numpy.ndarray
+            number of nuclei of shape (..., n_isotopes) in chain order (see
+            `get_numbers`)
+        epochs : numpy or quantity array
+            (days if not a quantity)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (..., n_epochs, n_isotopes)
+        """
+        return (self.decay_chain.decay_numbers(numbers, epochs) *
+                self.decay_chain.decay_constants * self.energy_per_decay)
+
+    def __repr__(self):
+        return '<SharedNuclearData {0}>'.format(' '.join(self.isotopes))
@@ -0,0 +1,119 @@
+import numpy as np
+
+from astropy import units as u
+
+from tardisnuclear.decay_chain import get_decay_chain
+from tardisnuclear.ejecta import EjectaSet
+
+
+class DecaySpectrum(object):
+    """
+    Time-dependent emitted X-ray and gamma-ray line spectrum of a decay
+    chain, binned on an energy grid.
+
+    The lines are assigned to their energy bins once and reduced into an
+    (n_isotopes, n_bins) emission matrix, so that the spectrum at any number
+    of epochs is the product of the decay rates from the closed-form decay
+    with this matrix.
+
+    Parameters
+    ----------
+    decay_radiation : ~tardisnuclear.nuclear_data.DecayRadiation
+
+    isotopes : list of str
+        initial isotopes - the spectrum covers their full decay chain
+
+    energy_bins : numpy or quantity array
+        bin edges (keV if not a quantity)
+    """
+
+    def __init__(self, decay_radiation, isotopes, energy_bins):
+        self.decay_chain = get_decay_chain(isotopes)
+        self.energy_bins = u.Quantity(energy_bins, u.keV)
+        bin_edges = self.energy_bins.to(u.erg).value
+
+        lines = decay_radiation.get_line_list(self.decay_chain.isotopes)
+        bin_idx = np.searchsorted(bin_edges, lines.energy.values,
+                                  side='right') - 1
+        in_grid = (bin_idx >= 0) & (bin_idx < len(bin_edges) - 1)
+        self.lines = lines[in_grid].reset_index(drop=True)
+        self.line_bin_idx = bin_idx[in_grid]
+
+        shape = (len(self.decay_chain), len(bin_edges) - 1)
+        line_idx = (self.lines.isotope_idx.values, self.line_bin_idx)
+        self.photon_matrix = np.zeros(shape)
+        np.add.at(self.photon_matrix, line_idx, self.lines.intensity.values)
+        self.energy_matrix = np.zeros(shape)
+        np.add.at(self.energy_matrix, line_idx,
+                  self.lines.energy_per_decay.values)
+
+    @property
+    def isotopes(self):
+        return self.decay_chain.isotopes
+
+    def get_decay_rates(self, numbers, epochs):
+        """
+        Decays per second of every isotope
+
+        Parameters
+        ----------
+        numbers : numpy.ndarray
+            initial number of nuclei of shape (..., n_isotopes) in chain order
+        epochs : numpy or quantity array
+            (days if not a quantity)
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (..., n_epochs, n_isotopes)
+        """
+        return (self.decay_chain.decay_numbers(numbers, epochs) *
+                self.decay_chain.decay_constants)
+
+    def calculate_spectrum(self, numbers, epochs, photons=False):
+        """
+        Binned emitted spectrum
+
+        Parameters
+        ----------
+        numbers : numpy.ndarray
+            initial number of nuclei of shape (..., n_isotopes) in chain order
+        epochs : numpy or quantity array
+            (days if not a quantity)
+        photons : bool
+            photons per second instead of erg per second per bin
+            [default = False]
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (..., n_epochs, n_bins)
+        """
+        emission_matrix = self.photon_matrix if photons else self.energy_matrix
+        return self.get_decay_rates(numbers, epochs).dot(emission_matrix)
+
+    def get_ejecta_numbers(self, ejecta):
+        """
+        Initial number of nuclei of an `Ejecta` or `EjectaSet` in the chain
+        order of this spectrum
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_isotopes, ) or (n_ejecta, n_isotopes)
+        """
+        if isinstance(ejecta, EjectaSet):
+            chain_idx = [ejecta.isotopes.index(isotope)
+                         for isotope in self.isotopes]
+            return ejecta.get_numbers()[:, chain_idx]
+        fractions = np.array([ejecta[nuc_id]
+                              for nuc_id in self.decay_chain.nuc_ids])
+        return fractions * ejecta.mass_g / self.decay_chain.atomic_masses
+
+    def calculate_ejecta_spectrum(self, ejecta, epochs, photons=False):
+        """
+        Binned emitted spectrum of an `Ejecta` or `EjectaSet`
+        (see `calculate_spectrum`)
+        """
+        return self.calculate_spectrum(self.get_ejecta_numbers(ejecta), epochs,
+                                       photons=photons)
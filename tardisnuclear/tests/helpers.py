@@ -0,0 +1,119 @@
+"""
+Synthetic decay radiation for the Ni56 -> Co56 -> Fe56 chain and the other
+chains of the type Ia model so that the models can be tested without the
+NNDC database, and finite difference derivatives for the analytic gradients
+"""
+
+import numpy as np
+import pandas as pd
+
+from astropy import units as u
+
+kev_to_erg = u.keV.to(u.erg)
+
+
+def _make_table(energies_kev, intensities, types=None):
+    table = pd.DataFrame({
+        'energy': np.asarray(energies_kev, dtype=np.float64) * kev_to_erg,
+        'intensity': np.asarray(intensities, dtype=np.float64)})
+    table['energy_uncert'] = 1e-4 * table.energy
+    table['intensity_uncert'] = 1e-2 * table.intensity
+    if types is not None:
+        table.insert(0, 'type', types)
+    return table
+
+
+def get_central_differences(function, params, relative_step=1e-6):
+    """
+    Central finite difference derivatives of a function of a parameter
+    vector
+
+    Returns
+    -------
+        : list of numpy.ndarray
+        one derivative per parameter
+    """
+    params = np.asarray(params, dtype=np.float64)
+    derivatives = []
+    for i in range(len(params)):
+        step = relative_step * params[i]
+        params_up, params_down = params.copy(), params.copy()
+        params_up[i] += step
+        params_down[i] -= step
+        derivatives.append((function(params_up) - function(params_down)) /
+                           (2 * step))
+    return derivatives
+
+
+def make_decay_radiation():
+    """
+    Decay radiation tables of Ni56, Co56 and Fe56 in the format of
+    `tardisnuclear.io.get_decay_radiation`. Co56 is a positron emitter
+    without tabulated annihilation lines.
+
+    Returns
+    -------
+        : dict
+    """
+    return {
+        'Ni56': {
+            'gamma_rays': _make_table([158.38, 749.95, 811.85],
+                                      [0.988, 0.495, 0.86], ['', '', '']),
+            'x_rays': _make_table([6.92], [0.2], ['XR ka1']),
+            'electrons': _make_table([5.8, 150.1], [0.7, 0.01],
+                                     ['Auger K', 'CE K'])},
+        'Co56': {
+            'gamma_rays': _make_table([846.77, 1238.29], [0.9994, 0.6646],
+                                      ['', '']),
+            'x_rays': _make_table([6.40], [0.25], ['XR ka1']),
+            'beta_plus': _make_table([631.], [0.196]),
+            'electrons': _make_table([5.9], [0.47], ['Auger K'])},
+        'Fe56': {}}
+
+
+def make_ia_decay_radiation():
+    """
+    Decay radiation tables of the Ni57, Co55 and Ti44 chains that the
+    type Ia model needs in addition to `make_decay_radiation`
+
+    Returns
+    -------
+        : dict
+    """
+    return {
+        'Ni57': {
+            'gamma_rays': _make_table([127.16, 1377.63], [0.167, 0.817],
+                                      ['', '']),
+            'beta_plus': _make_table([354.], [0.436])},
+        'Co57': {
+            'gamma_rays': _make_table([122.06, 136.47], [0.856, 0.107],
+                                      ['', '']),
+            'x_rays': _make_table([6.40], [0.5], ['XR ka1']),
+            'electrons': _make_table([5.6, 13.6], [1.05, 0.07],
+                                     ['Auger K', 'CE K'])},
+        'Fe57': {},
+        'Co55': {
+            'gamma_rays': _make_table([931.1], [0.75], ['']),
+            'beta_plus': _make_table([570.], [0.76])},
+        'Fe55': {
+            'x_rays': _make_table([5.90], [0.28], ['XR ka1']),
+            'electrons': _make_table([5.2], [0.6], ['Auger K'])},
+        'Mn55': {},
+        'Ti44': {
+            'gamma_rays': _make_table([67.87, 78.32], [0.93, 0.96],
+                                      ['', '']),
+            'x_rays': _make_table([4.09], [0.17], ['XR ka1'])},
+        'Sc44': {
+            'gamma_rays': _make_table([1157.0], [0.999], ['']),
+            'beta_plus': _make_table([632.], [0.943])},
+        'Ca44': {}}
+
+
+def add_decay_radiation():
+    """
+    Put the synthetic decay radiation into the cache of
+    `tardisnuclear.nuclear_data.DecayRadiation`
+    """
+    from tardisnuclear.nuclear_data import DecayRadiation
+    DecayRadiation.add_to_cache(make_decay_radiation())
+    DecayRadiation.add_to_cache(make_ia_decay_radiation())
@@ -0,0 +1,72 @@
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from astropy import units as u
+
+from tardisnuclear.cli import main, read_manifest
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+yields = {'ddt': {'ni56': 0.6, 'co56': 0.01}, 'merger': {'ni56': 0.3}}
+
+
+def run_manifest(tmpdir, processes):
+    add_decay_radiation()
+    for name, masses in yields.items():
+        tmpdir.join(name + '.dat').write(''.join(
+            '{0} {1}\n'.format(isotope, mass)
+            for isotope, mass in masses.items()))
+    manifest = {'output_dir': 'light_curves', 'cutoff_em_energy': 20,
+                'epochs': {'start': 5, 'stop': 300, 'num': 20},
+                'jobs': [{'yield_file': 'ddt.dat'},
+                         {'yield_file': 'merger.dat', 'name': 'merger',
+                          'epochs': [10, 100, 200]}]}
+    tmpdir.join('manifest.json').write(json.dumps(manifest))
+
+    assert main(['run', str(tmpdir.join('manifest.json')),
+                 '--processes', str(processes)]) == 0
+
+    for name, masses in yields.items():
+        light_curve = pd.read_csv(
+            str(tmpdir.join('light_curves', name + '.csv')), index_col=0)
+        model = make_energy_injection_model(cutoff_em_energy=20 * u.keV,
+                                            **masses)
+        expected = model.calculate_injected_energy_per_s(
+            light_curve.index.values)
+        assert light_curve.index.name == 'epoch'
+        assert list(light_curve.columns) == list(expected.columns) + [
+            'total']
+        np.testing.assert_allclose(light_curve[expected.columns].values,
+                                   expected.values, rtol=1e-10)
+        np.testing.assert_allclose(light_curve['total'].values,
+                                   expected.values.sum(axis=1), rtol=1e-10)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_manifest(tmpdir, processes):
+    run_manifest(tmpdir, processes)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_manifest_degenerate_union_chain(tmpdir, monkeypatch, caplog,
+                                             processes):
+    from tardisnuclear import shared_data
+
+    def degenerate_nuclear_data_arrays(*args, **kwargs):
+        raise ValueError('Degenerate decay constants in the decay chain')
+
+    monkeypatch.setattr(shared_data, 'get_nuclear_data_arrays',
+                        degenerate_nuclear_data_arrays)
+    run_manifest(tmpdir, processes)
+    assert 'No closed-form decay of the union' in caplog.text
+
+
+def test_yaml_manifest_without_pyyaml(tmpdir, monkeypatch):
+    tmpdir.join('manifest.yml').write('epochs: [10, 100]\n')
+    monkeypatch.setitem(sys.modules, 'yaml', None)
+    with pytest.raises(ImportError, match='pip install pyyaml'):
+        read_manifest(str(tmpdir.join('manifest.yml')))
@@ -0,0 +1,174 @@
+import numpy as np
+import pytest
+from scipy.linalg import expm
+
+from tardisnuclear.decay_chain import DecayChain, get_decay_chain, day_to_s
+
+epochs = np.array([0.0, 0.5, 3.0, 10.0, 50.0, 200.0, 1000.0])
+
+
+def get_expm_numbers(decay_matrix, numbers, epochs):
+    return np.array([expm(decay_matrix * epoch * day_to_s).dot(numbers)
+                     for epoch in epochs])
+
+
+def test_decay_numbers_bateman():
+    decay_chain = get_decay_chain(['Ni56'])
+    assert decay_chain.isotopes == ['Fe56', 'Co56', 'Ni56']
+    numbers = np.array([0.0, 0.0, 1e50])
+    decayed_numbers = decay_chain.decay_numbers(numbers, epochs)
+
+    lambda_co, lambda_ni = decay_chain.decay_constants[1:]
+    epochs_s = epochs * day_to_s
+    ni56 = 1e50 * np.exp(-lambda_ni * epochs_s)
+    co56 = (1e50 * lambda_ni / (lambda_co - lambda_ni) *
+            (np.exp(-lambda_ni * epochs_s) - np.exp(-lambda_co * epochs_s)))
+    np.testing.assert_allclose(decayed_numbers[:, 2], ni56, rtol=1e-12)
+    np.testing.assert_allclose(decayed_numbers[:, 1], co56, rtol=1e-10,
+                               atol=1e-15 * 1e50)
+    np.testing.assert_allclose(decayed_numbers.sum(axis=1), 1e50,
+                               rtol=1e-12)
+
+
+def test_decay_numbers_expm():
+    decay_chain = get_decay_chain(['Ni56', 'Ni57', 'Co55', 'Ti44'])
+    np.testing.assert_allclose(decay_chain.decay_matrix.sum(axis=0), 0.0,
+                               atol=1e-25)
+    numbers = np.random.RandomState(0).uniform(
+        0, 1e50, size=(3, len(decay_chain)))
+    decayed_numbers = decay_chain.decay_numbers(numbers, epochs)
+    assert decayed_numbers.shape == (3, len(epochs), len(decay_chain))
+    for composition, decayed in zip(numbers, decayed_numbers):
+        np.testing.assert_allclose(
+            decayed, get_expm_numbers(decay_chain.decay_matrix, composition,
+                                      epochs), rtol=1e-9, atol=1e-14 * 1e50)
+
+
+def test_decay_numbers_non_negative():
+    decay_chain = get_decay_chain(['Ni56', 'Ni57'])
+    numbers = np.zeros(len(decay_chain))
+    numbers[decay_chain.isotopes.index('Ni56')] = 1e50
+    numbers[decay_chain.isotopes.index('Ni57')] = 1e49
+    for dtype in (np.float64, np.float32):
+        decayed_numbers = decay_chain.decay_numbers(numbers / 1e40, epochs,
+                                                    dtype=dtype)
+        assert (decayed_numbers >= 0).all()
+        np.testing.assert_allclose(decayed_numbers[0], numbers / 1e40,
+                                   rtol=1e-6, atol=1e-6)
+
+
+def test_single_precision_error_bound():
+    decay_chain = get_decay_chain(['Ni56', 'Ni57', 'Co55', 'Ti44'])
+    numbers = np.random.RandomState(1).uniform(
+        0, 1e10, size=(2, len(decay_chain)))
+    decayed_numbers, relative_error = decay_chain.decay_numbers(
+        numbers, epochs, dtype=np.float32, return_error=True)
+    assert decayed_numbers.dtype == np.float32
+    assert relative_error < 1e-5
+    for composition, decayed in zip(numbers, decayed_numbers):
+        reference = get_expm_numbers(decay_chain.decay_matrix, composition,
+                                     epochs)
+        assert (np.abs(decayed - reference) <=
+                relative_error * composition.sum()).all()
+
+
+def test_single_precision_chunks(monkeypatch):
+    decay_chain = get_decay_chain(['Ni56', 'Ni57'])
+    numbers = np.random.RandomState(2).uniform(0, 1e10,
+                                               size=len(decay_chain))
+    decayed_numbers = decay_chain.decay_numbers(numbers, epochs,
+                                                dtype=np.float32)
+    # one epoch per chunk
+    monkeypatch.setattr(decay_chain, 'max_chunk_elements', 1)
+    np.testing.assert_array_equal(
+        decay_chain.decay_numbers(numbers, epochs, dtype=np.float32),
+        decayed_numbers)
+
+
+def test_decompose_branching_decay_matrix():
+    # 0 -> 1 (30%), 0 -> 2 (70%), 1 -> 3, 2 -> 3, 3 stable
+    decay_constants = np.array([3e-6, 1e-7, 4e-7, 0.0])
+    decay_matrix = np.diag(-decay_constants)
+    decay_matrix[1, 0] = 0.3 * decay_constants[0]
+    decay_matrix[2, 0] = 0.7 * decay_constants[0]
+    decay_matrix[3, 1] = decay_constants[1]
+    decay_matrix[3, 2] = decay_constants[2]
+    # shuffle so that the matrix is not triangular in the given order
+    order = np.array([2, 0, 3, 1])
+    decay_matrix = decay_matrix[np.ix_(order, order)]
+    decay_constants = decay_constants[order]
+
+    eigenvectors, inverse_eigenvectors = DecayChain._decompose_decay_matrix(
+        decay_matrix)
+    for epoch_s in (0.0, 1e5, 1e6, 1e7, 1e8):
+        propagator = (eigenvectors * np.exp(-decay_constants * epoch_s)).dot(
+            inverse_eigenvectors)
+        np.testing.assert_allclose(propagator, expm(decay_matrix * epoch_s),
+                                   atol=1e-12)
+
+
+def test_decompose_degenerate_decay_matrix():
+    decay_matrix = np.array([[-1e-6, 0.0, 0.0],
+                             [1e-6, -1e-6, 0.0],
+                             [0.0, 1e-6, 0.0]])
+    with pytest.raises(ValueError):
+        DecayChain._decompose_decay_matrix(decay_matrix)
+
+
+def make_stepper_numbers(decay_chain):
+    numbers = np.zeros((2, len(decay_chain)))
+    numbers[0, decay_chain.isotopes.index('Ni56')] = 1e50
+    numbers[1, decay_chain.isotopes.index('Ni57')] = 1e49
+    numbers[1, decay_chain.isotopes.index('Co56')] = 1e48
+    return numbers
+
+
+def test_stepper_matches_decay_numbers():
+    decay_chain = get_decay_chain(['Ni56', 'Ni57'])
+    numbers = make_stepper_numbers(decay_chain)
+    stepper = decay_chain.get_stepper(numbers)
+    stream_epochs = np.linspace(0, 500, 1001)[1:]
+    for epoch, stepped_numbers in stepper.iter_epochs(stream_epochs):
+        pass
+    assert epoch == pytest.approx(500)
+    np.testing.assert_allclose(
+        stepped_numbers, decay_chain.decay_numbers(numbers, [500.])[:, 0],
+        rtol=1e-9, atol=1e-14 * 1e50)
+
+
+def test_stepper_forward_only():
+    decay_chain = get_decay_chain(['Ni56'])
+    stepper = decay_chain.get_stepper(np.array([0.0, 0.0, 1e50]), epoch=10.)
+    with pytest.raises(ValueError):
+        stepper.advance_to(5.)
+    with pytest.raises(ValueError):
+        stepper.step(-1.)
+    numbers = stepper.advance_to(10.).copy()
+    np.testing.assert_array_equal(numbers, [0.0, 0.0, 1e50])
+    assert stepper.epoch == 10.
+
+
+def test_stepper_reuses_propagators(monkeypatch):
+    decay_chain = get_decay_chain(['Ni56', 'Ni57'])
+    calls = []
+    get_step_propagator = decay_chain.get_step_propagator
+
+    def counting_get_step_propagator(dt_s):
+        calls.append(dt_s)
+        return get_step_propagator(dt_s)
+
+    monkeypatch.setattr(decay_chain, 'get_step_propagator',
+                        counting_get_step_propagator)
+    stepper = decay_chain.get_stepper(make_stepper_numbers(decay_chain),
+                                      max_cached_steps=2)
+    # regular grid with floating point noise in the epochs
+    for epoch in np.arange(1, 301) * 0.1:
+        stepper.advance_to(epoch)
+    assert len(calls) == 1
+
+    # the recently used 0.1 d step survives the eviction of the 1 d step
+    for dt in (1.0, 0.1, 2.0, 0.1):
+        stepper.step(dt)
+    assert len(calls) == 3
+    assert list(stepper._step_propagators) == [2.0 * day_to_s,
+                                               round(0.1 * day_to_s, 6)]
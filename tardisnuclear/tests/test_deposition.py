@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from tardisnuclear.io.read_henke import HenkeCrossSections
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+
+def make_model():
+    add_decay_radiation()
+    return make_energy_injection_model(Ni56=0.6)
+
+
+def test_deposition_follows_model_parameters():
+    model = make_model()
+    deposition = model.make_gamma_ray_deposition(10000.)
+    time = np.array([20., 100.])
+    optical_depth = deposition.calculate_optical_depth(time)
+    model.ni56 = 1.2
+    np.testing.assert_allclose(deposition.calculate_optical_depth(time),
+                               2 * optical_depth)
+
+
+def test_deposition_photo_absorption_uses_ejecta_composition():
+    model = make_model()
+    table = pd.DataFrame({'energy': [10., 100., 1000., 10000.],
+                          'f2': [1., 2., 1., 0.1]})
+    model.ejecta.henke_cross_sections = HenkeCrossSections(
+        {'Fe': table, 'Co': table, 'Ni': table},
+        {'Fe': 55.845, 'Co': 58.933, 'Ni': 58.693})
+    deposition = model.make_gamma_ray_deposition(10000.,
+                                                 photo_absorption=True)
+    time = np.array([1., 200.])
+    mass_attenuation = model.ejecta.get_mass_attenuation(
+        deposition.line_energy_ev, time)
+    assert (mass_attenuation[:, deposition.line_energy_ev < 1e4] > 0).all()
+    np.testing.assert_allclose(
+        deposition.calculate_opacity(time),
+        deposition.compton_opacity + mass_attenuation)
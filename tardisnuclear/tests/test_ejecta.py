@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tardisnuclear.ejecta import DecayCache, Ejecta, EjectaSet
+from tardisnuclear.io.read_henke import HenkeCrossSections
+
+
+def make_henke_cross_sections():
+    energy = [10., 100., 1000., 10000.]
+    return HenkeCrossSections(
+        {'Fe': pd.DataFrame({'energy': energy, 'f2': [1., 2., 1., 0.1]}),
+         'Co': pd.DataFrame({'energy': energy, 'f2': [3., 6., 3., 0.3]})},
+        {'Fe': 55.845, 'Co': 58.933})
+
+
+def test_mass_attenuation():
+    ejecta = Ejecta(1.0, {'Fe56': 1.0})
+    ejecta.henke_cross_sections = make_henke_cross_sections()
+    # 2 r_e (h c / E) f2 N_A / A at the tabulated 1 keV
+    np.testing.assert_allclose(ejecta.get_mass_attenuation([1000.], [10.]),
+                               [[753.5199109994156]], rtol=1e-6)
+
+
+def test_mass_attenuation_new_element():
+    ejecta = Ejecta(1.0, {'Fe56': 1.0})
+    ejecta.henke_cross_sections = make_henke_cross_sections()
+    ejecta.get_mass_attenuation([1000.], [0.])
+    # Co56 brings a new element into the decay chain
+    ejecta['Fe56'] = 0.5
+    ejecta['Co56'] = 0.5
+    np.testing.assert_allclose(ejecta.get_mass_attenuation([1000.], [0.]),
+                               [[0.5 * 753.5199109994156 +
+                                 0.5 * 2142.109824534422]], rtol=1e-6)
+
+
+def make_decay_cache_key(decay_cache, epoch):
+    return decay_cache.make_key([280560000, 270560000], [1.0, 0.0], [epoch])
+
+
+def test_decay_cache_hits():
+    ejecta = Ejecta(1.0, {'Ni56': 1.0})
+    ejecta.decay_cache = DecayCache(data_version='test')
+    epochs = np.array([1.0, 10.0, 100.0])
+    fractions = ejecta._decay_fractions(epochs)
+    assert ejecta.decay_cache.stats['misses'] == 1
+    np.testing.assert_array_equal(ejecta._decay_fractions(epochs), fractions)
+    assert ejecta.decay_cache.hits == 1
+
+    # another composition is another key
+    ejecta['Co56'] = 0.5
+    ejecta._decay_fractions(epochs)
+    assert ejecta.decay_cache.misses == 2
+    assert len(ejecta.decay_cache) == 2
+
+
+def test_decay_cache_eviction():
+    value = np.zeros(100)
+    decay_cache = DecayCache(maxsize=3, max_nbytes=2 * value.nbytes,
+                             data_version='test')
+    keys = [make_decay_cache_key(decay_cache, epoch) for epoch in range(4)]
+    decay_cache.put(keys[0], value)
+    decay_cache.put(keys[1], value)
+    decay_cache.get(keys[0])
+    # the least recently used array is evicted by bytes before the count
+    decay_cache.put(keys[2], value)
+    assert decay_cache.get(keys[1]) is None
+    assert decay_cache.get(keys[0]) is not None
+    assert decay_cache.nbytes == 2 * value.nbytes
+
+    # larger than the memory tier
+    decay_cache.put(keys[3], np.zeros(300))
+    assert decay_cache.get(keys[3]) is None
+    assert len(decay_cache) == 2
+
+    decay_cache.max_nbytes = 10 * value.nbytes
+    for key in keys:
+        decay_cache.put(key, value)
+    assert len(decay_cache) == 3
+    assert decay_cache.nbytes == 3 * value.nbytes
+
+
+def test_decay_cache_disk(tmpdir):
+    cache_dir = str(tmpdir.join('decay_cache'))
+    value = np.arange(6.0).reshape(2, 3)
+    decay_cache = DecayCache(cache_dir=cache_dir, data_version='test')
+    key = make_decay_cache_key(decay_cache, 1.0)
+    decay_cache.put(key, value)
+
+    decay_cache = DecayCache(cache_dir=cache_dir, data_version='test')
+    cached_value = decay_cache.get(key)
+    np.testing.assert_array_equal(cached_value, value)
+    assert not cached_value.flags.writeable
+    assert decay_cache.disk_hits == 1
+    decay_cache.get(key)
+    assert decay_cache.hits == 1
+
+    decay_cache.clear(disk=True)
+    assert decay_cache.get(key) is None
+
+
+def test_decay_cache_data_version(tmpdir, monkeypatch):
+    from tardisnuclear import nuclear_constants
+    cache_dir = str(tmpdir.join('decay_cache'))
+    decay_cache = DecayCache(cache_dir=cache_dir)
+    key = make_decay_cache_key(decay_cache, 1.0)
+    decay_cache.put(key, np.ones(3))
+    assert make_decay_cache_key(decay_cache, 1.0) == key
+
+    # installing a snapshot invalidates the keys in memory and on disk
+    monkeypatch.setattr(nuclear_constants, '_installed_snapshot_id', 'abc')
+    snapshot_key = make_decay_cache_key(decay_cache, 1.0)
+    assert snapshot_key != key
+    assert DecayCache(cache_dir=cache_dir).get(snapshot_key) is None
+    assert key != make_decay_cache_key(DecayCache(data_version='other'), 1.0)
+
+
+def test_ejecta_set_zero_mass():
+    masses = pd.DataFrame([[0.6, 0.01], [0.0, 0.0], [0.3, 0.0]],
+                          index=['ddt', 'empty', 'merger'],
+                          columns=['Ni56', 'Co56'])
+    ejecta_set = EjectaSet.from_masses(masses)
+    np.testing.assert_allclose(ejecta_set.fractions.sum(axis=1),
+                               [1.0, 0.0, 1.0])
+    decayed_numbers = ejecta_set.get_decayed_numbers([0.0, 10.0, 100.0])
+    assert np.isfinite(decayed_numbers).all()
+    np.testing.assert_array_equal(decayed_numbers[1], 0.0)
+    numbers = ejecta_set.get_numbers()
+    np.testing.assert_allclose(decayed_numbers[:, 0], numbers, rtol=1e-10,
+                               atol=1e-12 * numbers.sum())
@@ -0,0 +1,48 @@
+import pytest
+
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.nuclides import (get_element, get_nuc_id, get_nuc_name,
+                                    get_znum, is_nuclide)
+
+ni56_id = 280560000
+
+
+@pytest.mark.parametrize('alias', ['Ni56', 'ni56', 'NI56', 'Ni-56', ' ni_56 ',
+                                   ni56_id])
+def test_aliases(alias):
+    assert get_nuc_id(alias) == ni56_id
+    assert get_nuc_name(alias) == 'Ni56'
+    # the second resolution comes from the intern table
+    assert get_nuc_id(alias) == ni56_id
+    assert get_nuc_name(alias) == 'Ni56'
+
+
+def test_names_and_ids_round_trip():
+    for name in ['Co56', 'Fe56', 'Ti44', 'Ca44', 'K40']:
+        assert get_nuc_name(get_nuc_id(name)) == name
+        assert get_nuc_id(get_nuc_name(name.lower())) == get_nuc_id(name)
+
+
+def test_elements():
+    assert get_znum('Co56') == 27
+    assert get_element('co56') == 'Co'
+    assert get_element(ni56_id) == 'Ni'
+
+
+@pytest.mark.parametrize('nuclide, expected', [
+    ('Ni56', True), ('ni-56', True), (ni56_id, True), ('Fe', False),
+    ('Ni', False), ('Xx56', False), ('56', False), ('', False)])
+def test_is_nuclide(nuclide, expected):
+    assert is_nuclide(nuclide) == expected
+
+
+def test_invalid_nuclide():
+    with pytest.raises(ValueError):
+        get_nuc_id('Fe')
+    with pytest.raises(ValueError):
+        get_nuc_name('not a nuclide')
+
+
+def test_model_rejects_elements():
+    with pytest.raises(ValueError):
+        make_energy_injection_model(Fe=1.0)
@@ -0,0 +1,60 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from astropy import units as u
+
+from tardisnuclear.decay_chain import get_decay_chain
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.shared_data import (SharedNuclearData,
+                                       get_nuclear_data_arrays,
+                                       publish_nuclear_data)
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+epochs = np.linspace(5, 300, 20)
+masses = {'Ni56': 0.6, 'Co56': 0.01}
+
+
+def _calculate_attached(handle):
+    # runs in a fresh (spawned) process without the caches of the parent
+    nuclear_data = SharedNuclearData.attach(handle)
+    nuclear_data.install()
+    assert get_decay_chain(['Ni56']) is nuclear_data.decay_chain
+    injected_energy = nuclear_data.calculate_injected_energy_per_s(
+        nuclear_data.get_numbers(masses), epochs)
+    return (nuclear_data.isotopes, injected_energy,
+            nuclear_data.channel_energy_per_decay.values.copy())
+
+
+@pytest.mark.parametrize('cutoff_em_energy', [20 * u.keV, np.inf * u.keV])
+def test_shared_nuclear_data(cutoff_em_energy):
+    add_decay_radiation()
+    model = make_energy_injection_model(cutoff_em_energy=cutoff_em_energy,
+                                        **masses)
+    expected = model.calculate_injected_energy_per_s(epochs)
+
+    with publish_nuclear_data(['Ni56'],
+                              cutoff_em_energy=cutoff_em_energy) as shared:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            isotopes, injected_energy, channel_energy_per_decay = pool.apply(
+                _calculate_attached, (shared.handle, ))
+
+    np.testing.assert_allclose(injected_energy,
+                               expected[isotopes].values, rtol=1e-10)
+    np.testing.assert_allclose(
+        channel_energy_per_decay,
+        model.channel_energy_per_decay[isotopes].values)
+
+
+def test_shared_nuclear_data_views():
+    add_decay_radiation()
+    arrays = get_nuclear_data_arrays(['Ni56'])
+    nuclear_data = SharedNuclearData(arrays)
+    assert nuclear_data.isotopes == get_decay_chain(['Ni56']).isotopes
+    assert nuclear_data.decay_chain.eigenvectors is arrays['eigenvectors']
+    assert np.shares_memory(nuclear_data.channel_energy_per_decay.values,
+                            arrays['channel_energy_per_decay'])
+    np.testing.assert_array_equal(nuclear_data.decay_chain.decay_matrix,
+                                  get_decay_chain(['Ni56']).decay_matrix)
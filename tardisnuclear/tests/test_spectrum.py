@@ -0,0 +1,27 @@
+import numpy as np
+
+from astropy import units as u
+
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.spectrum import DecaySpectrum
+from tardisnuclear.tests.helpers import add_decay_radiation
+
+
+def test_line_luminosity_matches_em_energy():
+    add_decay_radiation()
+    # 1238 keV of Co56 is above the cutoff and outside the grid
+    model = make_energy_injection_model(cutoff_em_energy=1000 * u.keV,
+                                        Ni56=0.6, Ni57=0.02)
+    time = np.array([5.0, 20.0, 100.0, 400.0])
+    spectrum = DecaySpectrum(model.decay_radiation, ['Ni56', 'Ni57'],
+                             np.linspace(0, 1000, 101))
+    assert 1238.29 * u.keV.to(u.erg) not in spectrum.lines.energy.values
+
+    luminosity = spectrum.calculate_ejecta_spectrum(model.ejecta, time)
+    assert luminosity.shape == (len(time), 100)
+    # the untabulated annihilation photons of the positrons are not lines
+    em_energy_per_s = (model.calculate_em_energy_per_s(time).sum(axis=1) -
+                       model.calculate_annihilation_energy_per_s(time).sum(
+                           axis=1))
+    np.testing.assert_allclose(luminosity.sum(axis=1), em_energy_per_s,
+                               rtol=1e-8)
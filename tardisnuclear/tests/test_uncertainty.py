@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from astropy import units as u
+
+from tardisnuclear.decay_chain import get_decay_chain
+from tardisnuclear.models.base import make_energy_injection_model
+from tardisnuclear.nuclear_data import electron_rest_energy
+from tardisnuclear.tests.helpers import add_decay_radiation
+from tardisnuclear.uncertainty import (NuclearDataMonteCarlo,
+                                       StreamingQuantiles)
+
+quantiles = [0.01, 0.16, 0.5, 0.84, 0.99]
+
+
+def check_quantiles(summary, samples):
+    np.testing.assert_allclose(summary.mean, samples.mean(axis=0),
+                               rtol=1e-10)
+    np.testing.assert_allclose(summary.std, samples.std(axis=0), rtol=1e-8)
+    # within one (possibly widened) bin of the exact quantiles
+    assert (np.abs(summary.quantiles(quantiles) -
+                   np.quantile(samples, quantiles, axis=0)) <=
+            summary.bin_width).all()
+
+
+def test_streaming_quantiles():
+    samples = np.random.RandomState(0).standard_normal((20000, 3)) * [
+        1.0, 10.0, 1e-3] + [0.0, 100.0, 5.0]
+    summary = StreamingQuantiles(n_bins=1024)
+    for batch in np.split(samples, 10):
+        summary.update(batch)
+    check_quantiles(summary, samples)
+
+
+def test_streaming_quantiles_widen():
+    random_state = np.random.RandomState(1)
+    # every batch is shifted beyond the range of the first batch
+    batches = [random_state.standard_normal((2000, 2)) * [1.0, 1e3] +
+               [3.0 * i, -3e3 * i] for i in range(8)]
+    samples = np.vstack(batches)
+    summary = StreamingQuantiles(n_bins=1024)
+    for batch in batches:
+        summary.update(batch)
+    assert summary.n_rebinned > 0
+    assert summary.counts.sum(axis=1).tolist() == [len(samples)] * 2
+    assert (summary.lower <= samples.min(axis=0)).all()
+    assert (summary.lower + summary.n_bins * summary.bin_width >
+            samples.max(axis=0)).all()
+    check_quantiles(summary, samples)
+
+
+def test_decay_numbers_sampled_nominal():
+    decay_chain = get_decay_chain(['Ni56', 'Ni57', 'Co55', 'Ti44'])
+    epochs = np.array([0.0, 3.0, 50.0, 1000.0])
+    numbers = np.random.RandomState(2).uniform(0, 1e50, len(decay_chain))
+    decayed_numbers = decay_chain.decay_numbers_sampled(
+        numbers, epochs, np.tile(decay_chain.decay_constants, (3, 1)))
+    assert decayed_numbers.shape == (3, len(epochs), len(decay_chain))
+    for sample in decayed_numbers:
+        np.testing.assert_allclose(
+            sample, decay_chain.decay_numbers(numbers, epochs), rtol=1e-10,
+            atol=1e-14 * numbers.sum())
+
+
+def test_monte_carlo_without_uncertainties():
+    add_decay_radiation()
+    model = make_energy_injection_model(Ni56=0.6)
+    monte_carlo = NuclearDataMonteCarlo(model, seed=0)
+    monte_carlo.half_life_uncertainties = np.zeros(len(monte_carlo.half_lives))
+    monte_carlo.energy_per_decay_uncertainties[:] = 0.0
+    epochs = np.linspace(5, 300, 10)
+    summary = monte_carlo.summarize(epochs, 50, batch_size=20)
+    for column in ('mean', 'q0.16', 'q0.5', 'q0.84'):
+        np.testing.assert_allclose(summary[column], summary['nominal'],
+                                   rtol=1e-6)
+    np.testing.assert_allclose(
+        summary['nominal'].values,
+        model.calculate_injected_energy_per_s(epochs).values.sum(axis=1),
+        rtol=1e-10)
+
+
+def test_monte_carlo_annihilation_variance():
+    add_decay_radiation()
+    variances = []
+    # the Co56 gamma rays are above both cutoffs - only the annihilation
+    # photons (without tabulated lines) are added above 511 keV
+    for cutoff_em_energy in (20 * u.keV, 600 * u.keV):
+        model = make_energy_injection_model(
+            cutoff_em_energy=cutoff_em_energy, Ni56=0.6)
+        monte_carlo = NuclearDataMonteCarlo(model)
+        co56_idx = monte_carlo.decay_chain.isotopes.index('Co56')
+        variances.append(
+            monte_carlo.energy_per_decay_uncertainties[co56_idx]**2)
+    # two photons of m_e c^2 per positron of intensity 0.196 +- 0.00196
+    np.testing.assert_allclose(variances[1] - variances[0],
+                               (2 * electron_rest_energy * 0.00196)**2,
+                               rtol=1e-8)
+
+
+def test_monte_carlo_follows_parameters():
+    add_decay_radiation()
+    model = make_energy_injection_model(Ni56=0.6)
+    model.ni56 = 0.3
+    monte_carlo = NuclearDataMonteCarlo(model)
+    epochs = np.linspace(5, 300, 10)
+    summary = monte_carlo.summarize(epochs, 10)
+    np.testing.assert_allclose(summary['nominal'].values, model(epochs)[1],
+                               rtol=1e-10)
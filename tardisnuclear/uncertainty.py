@@ -0,0 +1,326 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from astropy import units as u
+
+from tardisnuclear.decay_chain import get_decay_chain
+from tardisnuclear.nuclear_data import (electron_rest_energy,
+                                        lepton_channels, em_channels)
+
+logger = logging.getLogger(__name__)
+
+
+def _get_table_variance(table, mask=None):
+    """
+    Variance of the energy per decay (sum of energy * intensity) of a table
+    of independent lines
+    """
+    if table is None or len(table) == 0:
+        return 0.0
+    energy_uncert = (table.energy_uncert.values
+                     if 'energy_uncert' in table.columns else 0.0)
+    intensity_uncert = (table.intensity_uncert.values
+                        if 'intensity_uncert' in table.columns else 0.0)
+    variance = ((table.intensity.values * energy_uncert)**2 +
+                (table.energy.values * intensity_uncert)**2)
+    variance = np.broadcast_to(variance, (len(table), ))
+    if mask is not None:
+        variance = variance[mask]
+    return variance.sum()
+
+
+class StreamingQuantiles(object):
+    """
+    Approximate quantiles of many columns (e.g. epochs) from a stream of
+    sample batches in fixed memory.
+
+    Every column is histogrammed on `n_bins` bins whose range is set from
+    the first batch (widened by `padding` times its span). A column whose
+    range is exceeded by a later batch is rebinned onto bins that are a
+    power of two wider and aligned with the old edges, so that the old
+    counts merge exactly and no sample is clamped; the quantiles of that
+    column are then resolved to the wider bins. The mean and standard
+    deviation are accumulated exactly.
+
+    Parameters
+    ----------
+    n_bins : int
+        [default = 2048]
+    padding : float
+        [default = 1.0]
+    """
+
+    def __init__(self, n_bins=2048, padding=1.0):
+        self.n_bins = n_bins
+        self.padding = padding
+        self.counts = None
+        self.n_samples = 0
+        self.n_rebinned = 0
+
+    def _init_bins(self, samples):
+        lower = samples.min(axis=0)
+        upper = samples.max(axis=0)
+        span = upper - lower
+        span[span == 0] = np.abs(upper[span == 0]) * 1e-6 + 1e-300
+        self.lower = lower - self.padding * span
+        self.bin_width = (1 + 2 * self.padding) * span / self.n_bins
+        self.counts = np.zeros((samples.shape[1], self.n_bins), dtype=np.int64)
+        self.sum = np.zeros(samples.shape[1])
+        self.sum_squared_deviation = np.zeros(samples.shape[1])
+        self.reference = samples.mean(axis=0)
+
+    def _widen(self, column, lower, upper):
+        """
+        Rebin a column so that its range covers [lower, upper] (padded by
+        `padding` times the new span on the exceeded sides)
+        """
+        old_lower = self.lower[column]
+        bin_width = self.bin_width[column]
+        old_upper = old_lower + self.n_bins * bin_width
+        span = max(upper, old_upper) - min(lower, old_lower)
+        if lower < old_lower:
+            lower -= self.padding * span
+        if upper >= old_upper:
+            upper += self.padding * span
+        # new edges on the old grid, n_below old bins below the old range
+        n_below = max(np.ceil((old_lower - lower) / bin_width), 0.0)
+        n_old_bins = n_below + max(np.ceil((upper - old_lower) / bin_width),
+                                   self.n_bins) + 1
+        factor = max(2.0 ** np.ceil(np.log2(n_old_bins / self.n_bins)), 2.0)
+        new_lower = old_lower - n_below * bin_width
+
+        centers = old_lower + (np.arange(self.n_bins) + 0.5) * bin_width
+        new_idx = np.clip(np.floor((centers - new_lower) /
+                                   (factor * bin_width)).astype(np.int64),
+                          0, self.n_bins - 1)
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        np.add.at(counts, new_idx, self.counts[column])
+        self.counts[column] = counts
+        self.lower[column] = new_lower
+        self.bin_width[column] = factor * bin_width
+        self.n_rebinned += 1
+
+    def update(self, samples):
+        """
+        Add a batch of samples of shape (n_samples, n_columns)
+        """
+        samples = np.atleast_2d(samples)
+        if self.counts is None:
+            self._init_bins(samples)
+        lower = samples.min(axis=0)
+        upper = samples.max(axis=0)
+        exceeded = np.flatnonzero(
+            (lower < self.lower) |
+            (upper >= self.lower + self.n_bins * self.bin_width))
+        for column in exceeded:
+            self._widen(column, lower[column], upper[column])
+        if len(exceeded) > 0:
+            logger.debug('Widened the histogram range of {0} '
+                         'columns'.format(len(exceeded)))
+
+        bin_idx = np.clip(np.floor((samples - self.lower) /
+                                   self.bin_width).astype(np.int64),
+                          0, self.n_bins - 1)
+        column_idx = np.broadcast_to(np.arange(samples.shape[1]),
+                                     samples.shape)
+        np.add.at(self.counts, (column_idx, bin_idx), 1)
+
+        deviation = samples - self.reference
+        self.sum += deviation.sum(axis=0)
+        self.sum_squared_deviation += (deviation**2).sum(axis=0)
+        self.n_samples += len(samples)
+
+    @property
+    def mean(self):
+        return self.reference + self.sum / self.n_samples
+
+    @property
+    def std(self):
+        mean_deviation = self.sum / self.n_samples
+        return np.sqrt(np.maximum(
+            self.sum_squared_deviation / self.n_samples - mean_deviation**2,
+            0.0))
+
+    def quantiles(self, q):
+        """
+        Quantiles (linearly interpolated within the bins)
+
+        Parameters
+        ----------
+        q : list of float
+            quantiles in [0, 1]
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_quantiles, n_columns)
+        """
+        cumulative = np.cumsum(self.counts, axis=1) / float(self.n_samples)
+        cumulative = np.hstack((np.zeros((len(cumulative), 1)), cumulative))
+        edges = np.arange(self.n_bins + 1)
+        result = np.empty((len(q), len(cumulative)))
+        for j, column_cumulative in enumerate(cumulative):
+            result[:, j] = np.interp(q, column_cumulative, edges)
+        return self.lower + result * self.bin_width
+
+
+class NuclearDataMonteCarlo(object):
+    """
+    Monte Carlo propagation of the nuclear data uncertainties through the
+    light curve of an energy injection model.
+
+    Every realization draws the energy per decay of each isotope (from the
+    energy and intensity uncertainties of its lines, which are independent)
+    and its half-life (from the ENSDF half-life uncertainty). A batch of
+    realizations is decayed and turned into light curves as one
+    (n_samples, n_epochs) computation, and the light curves are reduced to
+    streaming quantiles so that the number of realizations is not limited
+    by memory.
+
+    Parameters
+    ----------
+    energy_injection : ~tardisnuclear.models.base.BaseEnergyInjection
+        the isotope masses of its current parameter values are used
+    seed : int
+        random seed [default = None]
+    """
+
+    def __init__(self, energy_injection, seed=None):
+        self.energy_injection = energy_injection
+        ejecta = energy_injection.ejecta
+        self.decay_chain = get_decay_chain(ejecta.isotopes)
+        self.random_state = np.random.RandomState(seed)
+
+        nuclear_constants = self.decay_chain.nuclear_constants
+        self.half_lives = nuclear_constants.half_lives
+        self.half_life_uncertainties = (
+            nuclear_constants.half_life_uncertainties)
+
+        self.energy_per_decay = (
+            energy_injection.em_energy_per_decay +
+            energy_injection.lepton_energy_per_decay)[
+            self.decay_chain.isotopes].values[0]
+        self.energy_per_decay_uncertainties = np.sqrt(
+            self._get_energy_per_decay_variance())
+
+        self.numbers = energy_injection.get_initial_numbers(self.decay_chain)
+
+    def _get_energy_per_decay_variance(self):
+        cutoff_energy = self.energy_injection.cutoff_em_energy.to(
+            u.erg).value
+        decay_radiation = self.energy_injection.decay_radiation
+        variance = np.zeros(len(self.decay_chain))
+        for i, isotope in enumerate(self.decay_chain.isotopes):
+            isotope_data = decay_radiation[isotope]
+            for channel in lepton_channels:
+                variance[i] += _get_table_variance(
+                    isotope_data.get(channel, None))
+            # the tabulated annihilation lines are part of the gamma_rays
+            # table (see `DecayRadiation.get_channel_energy_per_decay`)
+            for channel in em_channels:
+                table = isotope_data.get(channel, None)
+                if table is not None:
+                    variance[i] += _get_table_variance(
+                        table, mask=table.energy.values < cutoff_energy)
+            variance[i] += self._get_annihilation_variance(isotope_data,
+                                                           cutoff_energy)
+        return variance
+
+    @staticmethod
+    def _get_annihilation_variance(isotope_data, cutoff_energy):
+        """
+        Variance of the two m_e c^2 photons per positron that are added if
+        the annihilation lines are not tabulated (from the uncertainty of
+        the positron intensities)
+        """
+        beta_plus = isotope_data.get('beta_plus', None)
+        gamma_rays = isotope_data.get('gamma_rays', None)
+        if (beta_plus is None or electron_rest_energy >= cutoff_energy or
+                'intensity_uncert' not in beta_plus.columns):
+            return 0.0
+        if (gamma_rays is not None and
+                gamma_rays.type.str.startswith('Annihil').any()):
+            return 0.0
+        return (2 * electron_rest_energy)**2 * (
+            beta_plus.intensity_uncert.values**2).sum()
+
+    def sample(self, n_samples):
+        """
+        Draw realizations of the nuclear data
+
+        Returns
+        -------
+        decay_constants : numpy.ndarray
+            array of shape (n_samples, n_isotopes) in 1/s
+        energy_per_decay : numpy.ndarray
+            array of shape (n_samples, n_isotopes) in erg
+        """
+        shape = (n_samples, len(self.decay_chain))
+        unstable = np.isfinite(self.half_lives)
+        half_lives = np.abs(self.half_lives[unstable] +
+                            self.half_life_uncertainties[unstable] *
+                            self.random_state.standard_normal(
+                                (n_samples, unstable.sum())))
+        decay_constants = np.zeros(shape)
+        decay_constants[:, unstable] = np.log(2) / half_lives
+
+        energy_per_decay = np.abs(
+            self.energy_per_decay + self.energy_per_decay_uncertainties *
+            self.random_state.standard_normal(shape))
+        return decay_constants, energy_per_decay
+
+    def calculate_light_curves(self, epochs, n_samples):
+        """
+        Light curves (erg/s) of `n_samples` realizations of the nuclear data
+
+        Returns
+        -------
+            : numpy.ndarray
+            array of shape (n_samples, n_epochs)
+        """
+        decay_constants, energy_per_decay = self.sample(n_samples)
+        decayed_numbers = self.decay_chain.decay_numbers_sampled(
+            self.numbers, epochs, decay_constants)
+        return np.einsum('sti,si->st', decayed_numbers,
+                         decay_constants * energy_per_decay)
+
+    def summarize(self, epochs, n_samples, quantiles=(0.16, 0.5, 0.84),
+                  batch_size=1000, n_bins=2048):
+        """
+        Quantiles of the light curve over realizations of the nuclear data,
+        computed in batches of `batch_size`
+
+        Parameters
+        ----------
+        epochs : numpy.ndarray
+            epochs in days
+        n_samples : int
+        quantiles : tuple of float
+            [default = (0.16, 0.5, 0.84)]
+        batch_size : int
+            [default = 1000]
+        n_bins : int
+            histogram bins of the streaming quantiles [default = 2048]
+
+        Returns
+        -------
+            : pandas.DataFrame
+            nominal light curve, mean, std and quantiles (erg/s) indexed by
+            epoch
+        """
+        epochs = np.atleast_1d(epochs)
+        summary = StreamingQuantiles(n_bins=n_bins)
+        for start in range(0, n_samples, batch_size):
+            summary.update(self.calculate_light_curves(
+                epochs, min(batch_size, n_samples - start)))
+
+        nominal = self.decay_chain.decay_numbers(self.numbers, epochs).dot(
+            self.decay_chain.decay_constants * self.energy_per_decay)
+        result = pd.DataFrame({'nominal': nominal, 'mean': summary.mean,
+                               'std': summary.std}, index=epochs)
+        for q, values in zip(quantiles, summary.quantiles(quantiles)):
+            result['q{0:g}'.format(q)] = values
+        result.index.name = 'epoch'
+        return result